@@ -0,0 +1,460 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import *
+
+import requests
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from models import (
+    Base,
+    User,
+    Gambler,
+    GamblingSeason,
+    GamblingSeasonState,
+    PropBetTarget,
+    Parlay,
+    Pick,
+    PickVeto,
+    VetoVote,
+    ParlayState,
+    SlateType,
+    PropBetType,
+    PropBetDirection,
+    VetoApprovalStatus,
+)
+from services.parlay_counters import refresh_season_parlay_counters
+from utils.auth import hash_password
+from .synthetic_season import SyntheticSeasonConfig, generate_synthetic_season
+
+# End-to-end load test. Seeds a scratch database with a synthetic season, boots
+# main:app under uvicorn (or targets --base-url), logs in as every seeded gambler and
+# drives a weighted mix of reads and writes from one thread per gambler:
+#
+#   python -m benchmarks.load_harness --database-url sqlite+aiosqlite:////tmp/load.db --reset \
+#       --budget '*=500' --budget get_season_time_series=1500
+#
+# Latencies are reported per operation_id, and the run fails if a p95 budget or the
+# error rate limit is exceeded. --reset drops every table in the target database.
+
+PASSWORD = "load-test"
+
+DEFAULT_MIX = {
+    "get_season_parlays": 30,
+    "create_pick": 15,
+    "submit_veto_vote": 10,
+    "grade_and_close": 10,
+    "get_season_gambler_performances": 20,
+    "get_season_time_series": 15,
+    # Replaces the four reads above when a client opens a season, opt in with --mix
+    "get_season_dashboard": 0,
+    # What a list view would call instead of get_season_parlays, opt in with --mix
+    "get_season_parlay_summaries": 0,
+}
+
+@dataclass
+class SeededSeason:
+    season_id: int
+    # username -> gambler id
+    gamblers: dict[str, int]
+    target_identifiers: list[str]
+    building_parlay_ids: list[int]
+    # gambler id -> ids of their OPEN parlays with ungraded picks
+    open_parlays: dict[int, list[int]]
+    # veto id -> (vetoing gambler id, picking gambler id)
+    pending_vetoes: dict[int, tuple[int, int]]
+
+async def seed_database(database_url: str, config: SyntheticSeasonConfig, open_parlays_per_gambler: int, building_parlays: int) -> SeededSeason:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    synthetic = generate_synthetic_season(config)
+    rng = random.Random(config.seed)
+    password = hash_password(PASSWORD)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        users = [
+            User(username=f"load{i}", password=password, first_name=f"Load{i}", last_name="Tester")
+            for i in range(len(synthetic.gambler_ids))
+        ]
+        season = GamblingSeason(year=2025, name="Load test", state=GamblingSeasonState.IN_PROGRESS)
+        db.add_all([*users, season])
+        await db.flush()
+        gamblers = {
+            synthetic_id: Gambler(user_id=user.id, gambling_season_id=season.id)
+            for synthetic_id, user in zip(synthetic.gambler_ids, users)
+        }
+        targets = {
+            t.id: PropBetTarget(identifier=t.identifier, player_name=t.player_name, team_name=t.team_name)
+            for t in synthetic.targets
+        }
+        db.add_all([*gamblers.values(), *targets.values()])
+        await db.flush()
+
+        start_date = datetime.date(2025, 9, 4)
+        for record in synthetic.parlays:
+            parlay = Parlay(
+                gambling_season_id=season.id,
+                owner_id=gamblers[synthetic.parlay_owners[record.id]].id,
+                slate_type=rng.choice(list(SlateType)),
+                competition_date=start_date + datetime.timedelta(days=record.order // 3),
+                state=record.state,
+                wager_pp=5,
+                result=record.result,
+                order=record.order
+            )
+            for pick_record in record.picks:
+                pick = Pick(
+                    gambler_id=gamblers[pick_record.gambler_id].id,
+                    prop_bet_target_id=targets[pick_record.prop_bet_target_id].id,
+                    prop_type=pick_record.prop_type,
+                    line=rng.choice([0.5, 1.5, 24.5, 49.5, 74.5]),
+                    direction=pick_record.direction,
+                    sauce_factor=pick_record.sauce_factor,
+                    result=pick_record.result
+                )
+                for veto_record in pick_record.vetoes:
+                    pick.vetoes.append(PickVeto(
+                        gambler_id=gamblers[veto_record.gambler_id].id,
+                        approval_status=veto_record.approval_status,
+                        result=veto_record.result,
+                        votes=[
+                            VetoVote(gambler_id=gamblers[v.gambler_id].id, affirmative=v.affirmative)
+                            for v in veto_record.votes
+                        ]
+                    ))
+                parlay.picks.append(pick)
+            db.add(parlay)
+        await db.flush()
+
+        order = len(synthetic.parlays)
+        target_list = list(targets.values())
+        gambler_list = list(gamblers.values())
+
+        def new_parlay(owner: Gambler, state: ParlayState, picks_by: list[Gambler]):
+            nonlocal order
+            order += 1
+            parlay = Parlay(
+                gambling_season_id=season.id,
+                owner_id=owner.id,
+                slate_type=rng.choice(list(SlateType)),
+                competition_date=start_date + datetime.timedelta(days=order // 3),
+                state=state,
+                wager_pp=5,
+                order=order
+            )
+            for gambler in picks_by:
+                parlay.picks.append(Pick(
+                    gambler_id=gambler.id,
+                    prop_bet_target_id=rng.choice(target_list).id,
+                    prop_type=rng.choice(list(PropBetType)),
+                    line=rng.choice([0.5, 1.5, 24.5, 49.5, 74.5]),
+                    direction=rng.choice(list(PropBetDirection))
+                ))
+            db.add(parlay)
+            return parlay
+
+        open_parlays = {
+            gambler.id: [new_parlay(gambler, ParlayState.OPEN, gambler_list) for _ in range(open_parlays_per_gambler)]
+            for gambler in gambler_list
+        }
+        building = [
+            new_parlay(gambler_list[i % len(gambler_list)], ParlayState.BUILDING, gambler_list)
+            for i in range(building_parlays)
+        ]
+        await db.flush()
+
+        # One pending veto per building parlay for the gamblers to vote on
+        pending_vetoes: dict[int, tuple[int, int]] = {}
+        vetoes: list[PickVeto] = []
+        for parlay in building:
+            pick = rng.choice(parlay.picks)
+            vetoer = rng.choice([g for g in gambler_list if g.id != pick.gambler_id])
+            veto = PickVeto(pick_id=pick.id, gambler_id=vetoer.id, approval_status=VetoApprovalStatus.PENDING)
+            db.add(veto)
+            vetoes.append(veto)
+        await db.flush()
+        for veto, parlay in zip(vetoes, building):
+            pick_gambler_id = next(p.gambler_id for p in parlay.picks if p.id == veto.pick_id)
+            pending_vetoes[veto.id] = (veto.gambler_id, pick_gambler_id)
+        await db.commit()
+        # Commits, and doesn't rely on the app's flush hooks being imported
+        await refresh_season_parlay_counters(season.id, db)
+
+        seeded = SeededSeason(
+            season_id=season.id,
+            gamblers={user.username: gamblers[synthetic_id].id for synthetic_id, user in zip(synthetic.gambler_ids, users)},
+            target_identifiers=[t.identifier for t in target_list],
+            building_parlay_ids=[p.id for p in building],
+            open_parlays={gambler_id: [p.id for p in parlays] for gambler_id, parlays in open_parlays.items()},
+            pending_vetoes=pending_vetoes
+        )
+    await engine.dispose()
+    return seeded
+
+@dataclass
+class OperationStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+
+def percentile(sorted_values: list[float], p: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class LoadRun:
+    # State shared by every virtual gambler. Pools of parlays and vetoes are consumed
+    # under a lock so two gamblers never grade the same parlay or overshoot a vote.
+
+    def __init__(self, base_url: str, seeded: SeededSeason, mix: dict[str, int], seed: int) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.seeded = seeded
+        self.mix = mix
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.stats: dict[str, OperationStats] = defaultdict(OperationStats)
+        self.routes: dict[str, tuple[str, str]] = {}
+        self.required_votes = len(seeded.gamblers) // 2
+        self.vote_counts: dict[int, list[int]] = {veto_id: [0, 0] for veto_id in seeded.pending_vetoes}
+        self.voters: dict[int, set[int]] = {veto_id: set() for veto_id in seeded.pending_vetoes}
+
+    def load_routes(self):
+        # Paths are looked up by operation_id so the harness follows the app's routes
+        openapi = requests.get(f"{self.base_url}/openapi.json", timeout=30).json()
+        for path, methods in openapi["paths"].items():
+            for method, operation in methods.items():
+                self.routes[operation["operationId"]] = (method.upper(), path)
+
+    def call(self, session: requests.Session, operation_id: str, path_params: dict[str, Any] | None = None, **kwargs: Any):
+        method, path = self.routes[operation_id]
+        url = self.base_url + path.format(**(path_params or {}))
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=60, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response = None
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self.lock:
+            stats = self.stats[operation_id]
+            stats.latencies_ms.append(elapsed_ms)
+            if not ok:
+                stats.errors += 1
+        return response if ok else None
+
+    def login(self, username: str):
+        session = requests.Session()
+        response = self.call(session, "login", json={"username": username, "password": PASSWORD})
+        if response is None:
+            raise RuntimeError(f"Could not log in as {username}")
+        session.headers["Authorization"] = f"Bearer {response.json()['token']}"
+        return session
+
+    def run_gambler(self, username: str, deadline: float, worker_index: int):
+        rng = random.Random(self.seed * 1000 + worker_index)
+        gambler_id = self.seeded.gamblers[username]
+        session = self.login(username)
+        season = {"season_id": self.seeded.season_id}
+        operations = list(self.mix)
+        weights = [self.mix[o] for o in operations]
+        while time.perf_counter() < deadline:
+            match rng.choices(operations, weights=weights)[0]:
+                case "get_season_parlays":
+                    self.call(session, "get_season_parlays", season, params={"limit": 20, "offset": rng.randrange(0, 200, 20)})
+                case "create_pick":
+                    self.call(session, "create_pick", json={
+                        "gambler_id": gambler_id,
+                        "parlay_id": rng.choice(self.seeded.building_parlay_ids),
+                        "target": {
+                            "identifier": rng.choice(self.seeded.target_identifiers),
+                            "team_name": "Load team",
+                            "player_name": None
+                        },
+                        "direction": rng.choice(list(PropBetDirection)),
+                        "line": rng.choice([0.5, 1.5, 24.5]),
+                        "sauce_factor": None,
+                        "prop_type": rng.choice(list(PropBetType))
+                    })
+                case "submit_veto_vote":
+                    self.vote(session, gambler_id, rng)
+                case "grade_and_close":
+                    self.grade_and_close(session, gambler_id, rng)
+                case "get_season_gambler_performances":
+                    self.call(session, "get_season_gambler_performances", season)
+                case "get_season_time_series":
+                    self.call(session, "get_season_time_series", season)
+                case "get_season_dashboard":
+                    self.call(session, "get_season_dashboard", season)
+                case "get_season_parlay_summaries":
+                    self.call(session, "get_season_parlay_summaries", season, params={"limit": 20, "offset": rng.randrange(0, 200, 20)})
+
+    def vote(self, session: requests.Session, gambler_id: int, rng: random.Random):
+        affirmative = rng.random() < 0.6
+        with self.lock:
+            candidates = [
+                veto_id for veto_id, (vetoer_id, picker_id) in self.seeded.pending_vetoes.items()
+                if gambler_id not in (vetoer_id, picker_id) and gambler_id not in self.voters[veto_id]
+            ]
+            if not candidates:
+                return
+            veto_id = rng.choice(candidates)
+            self.voters[veto_id].add(gambler_id)
+            counts = self.vote_counts[veto_id]
+            counts[0 if affirmative else 1] += 1
+            # Mirrors update_veto_approval_status: the veto stops taking votes once
+            # either side reaches the required count
+            if max(counts) >= self.required_votes:
+                del self.seeded.pending_vetoes[veto_id]
+        self.call(session, "submit_veto_vote", {"veto_id": veto_id}, json={"gambler_id": gambler_id, "affirmative": affirmative})
+
+    def grade_and_close(self, session: requests.Session, gambler_id: int, rng: random.Random):
+        with self.lock:
+            parlay_ids = self.seeded.open_parlays.get(gambler_id)
+            if not parlay_ids:
+                return
+            parlay_id = parlay_ids.pop()
+        response = self.call(session, "get_parlay", {"parlay_id": parlay_id})
+        if response is None:
+            return
+        for pick in response.json()["parlay"]["picks"]:
+            result = rng.choices(["Win", "Loss", "Push", "Void"], weights=[55, 38, 3, 4])[0]
+            self.call(session, "update_pick_result", {"pick_id": pick["id"]}, json={"result": result})
+        response = self.call(session, "finalize_parlay_result", {"parlay_id": parlay_id}, json={})
+        if response is None:
+            return
+        self.call(session, "close_parlay", {"parlay_id": parlay_id}, json={"parlay_result": response.json()["possible_results"][0]})
+
+    def run(self, duration_s: float):
+        self.load_routes()
+        deadline = time.perf_counter() + duration_s
+        threads = [
+            threading.Thread(target=self.run_gambler, args=(username, deadline, i), daemon=True)
+            for i, username in enumerate(self.seeded.gamblers)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    def report(self, elapsed_s: float):
+        report: dict[str, dict[str, Any]] = {}
+        for operation_id, stats in sorted(self.stats.items()):
+            latencies = sorted(stats.latencies_ms)
+            report[operation_id] = {
+                "count": len(latencies),
+                "errors": stats.errors,
+                "throughput_rps": round(len(latencies) / elapsed_s, 2),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+            }
+        return report
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout_s: float = 60):
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The app exited before it became ready")
+        try:
+            if requests.get(f"{base_url}/openapi.json", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError("Timed out waiting for the app to start")
+
+def parse_key_values(values: list[str], cast_value: Callable[[str], Any]) -> dict[str, Any]:
+    parsed: dict[str, Any] = {}
+    for value in values:
+        key, _, raw = value.partition("=")
+        parsed[key] = cast_value(raw)
+    return parsed
+
+def check_budgets(report: dict[str, dict[str, Any]], budgets: dict[str, float], max_error_rate: float) -> list[str]:
+    failures: list[str] = []
+    for operation_id, row in report.items():
+        budget = budgets.get(operation_id, budgets.get("*"))
+        if budget is not None and row["p95_ms"] is not None and row["p95_ms"] > budget:
+            failures.append(f"{operation_id}: p95 {row['p95_ms']:.1f}ms exceeds the {budget:.0f}ms budget")
+        if row["count"] and row["errors"] / row["count"] > max_error_rate:
+            failures.append(f"{operation_id}: {row['errors']} of {row['count']} requests failed")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive a realistic request mix against a seeded app")
+    parser.add_argument("--database-url", required=True, help="Scratch database to seed, e.g. sqlite+aiosqlite:////tmp/load.db")
+    parser.add_argument("--reset", action="store_true", help="Required: drops every table in --database-url before seeding")
+    parser.add_argument("--base-url", default=None, help="Target an already running app instead of starting uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--app-workers", type=int, default=1)
+    parser.add_argument("--gamblers", type=int, default=8)
+    parser.add_argument("--parlays", type=int, default=300)
+    parser.add_argument("--open-parlays-per-gambler", type=int, default=5)
+    parser.add_argument("--building-parlays", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", action="append", default=[], help="operation=weight, overrides the default mix")
+    parser.add_argument("--budget", action="append", default=[], help="operation_id=p95 ms, '*' applies to every operation")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--out", type=Path, default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if not args.reset:
+        parser.error("--reset is required, since seeding drops every table in --database-url")
+
+    seeded = asyncio.run(seed_database(
+        args.database_url,
+        SyntheticSeasonConfig(gamblers=args.gamblers, parlays=args.parlays, seed=args.seed),
+        args.open_parlays_per_gambler,
+        args.building_parlays
+    ))
+
+    process: subprocess.Popen | None = None
+    base_url = args.base_url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        env = {**os.environ, "DATABASE_URL": args.database_url}
+        env.setdefault("SECRET", os.urandom(32).hex())
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--workers", str(args.app_workers), "--log-level", "warning"],
+            env=env
+        )
+    try:
+        if process is not None:
+            wait_until_ready(base_url, process)
+        load_run = LoadRun(base_url, seeded, {**DEFAULT_MIX, **parse_key_values(args.mix, int)}, args.seed)
+        elapsed_s = load_run.run(args.duration)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = load_run.report(elapsed_s)
+    print(f"{'operation_id':36} {'count':>7} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for operation_id, row in report.items():
+        print(f"{operation_id:36} {row['count']:7} {row['errors']:7} {row['throughput_rps']:8.1f} {row['p50_ms']:9.1f} {row['p95_ms']:9.1f} {row['p99_ms']:9.1f}")
+    if args.out is not None:
+        args.out.write_text(json.dumps({"duration_s": elapsed_s, "operations": report}, indent=2))
+
+    failures = check_budgets(report, parse_key_values(args.budget, float), args.max_error_rate)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import copy
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import *
+
+from services.metric_calculator import GamblerMetricsCalculator
+from services.performance_time_series import TimeSeriesCalculator
+from services.season_performance_calculator import SeasonPerformanceCalculator
+from services.score_correctors.score_corrector_2025 import GamblerScoreCorrector2025
+from utils.parlays import finalize_parlay_results
+from .synthetic_season import SyntheticSeasonConfig, generate_synthetic_season
+
+# Times the services layer against synthetic seasons and writes the results as JSON
+# so runs from different commits can be compared:
+#
+#   python -m benchmarks.services_benchmark
+#   python -m benchmarks.services_benchmark --baseline benchmarks/results/<sha>.json
+
+SCALES = {
+    "small": SyntheticSeasonConfig(gamblers=6, parlays=50),
+    "medium": SyntheticSeasonConfig(gamblers=10, parlays=250),
+    "large": SyntheticSeasonConfig(gamblers=16, parlays=1000),
+}
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    scale: str
+    rounds: int
+    min_s: float
+    median_s: float
+    mean_s: float
+
+def time_rounds(fn: Callable[[Any], Any], setup: Callable[[], Any], rounds: int) -> list[float]:
+    timings: list[float] = []
+    for _ in range(rounds):
+        state = setup()
+        start = time.perf_counter()
+        fn(state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def finalize_all(parlays: list[Any]):
+    for parlay in parlays:
+        coroutine = finalize_parlay_results(parlay, cast(Any, None))
+        try:
+            coroutine.send(None)
+        except StopIteration:
+            pass
+
+def benchmarks_for_scale(config: SyntheticSeasonConfig) -> dict[str, tuple[Callable[[Any], Any], Callable[[], Any]]]:
+    season = generate_synthetic_season(config)
+    open_season = generate_synthetic_season(SyntheticSeasonConfig(**{**asdict(config), "close_parlays": False}))
+    calculators = GamblerMetricsCalculator.calculator_dict_from_parlays(season.gambler_ids, cast(Any, season.parlays))
+    return {
+        "calculator_dict_from_parlays": (
+            lambda _: GamblerMetricsCalculator.calculator_dict_from_parlays(season.gambler_ids, cast(Any, season.parlays)),
+            lambda: None
+        ),
+        "season_performance_calculator": (
+            lambda _: SeasonPerformanceCalculator(calculators, GamblerScoreCorrector2025).performances,
+            lambda: None
+        ),
+        "time_series_calculator": (
+            lambda _: TimeSeriesCalculator(season.gambler_ids, cast(Any, season.parlays), GamblerScoreCorrector2025).create_time_series(),
+            lambda: None
+        ),
+        # finalize_parlay_results mutates the parlays, so every round gets a fresh copy
+        "finalize_parlay_results": (
+            finalize_all,
+            lambda: copy.deepcopy(open_season.parlays)
+        ),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results: list[BenchmarkResult], baseline_path: Path):
+    baseline = {
+        (r["name"], r["scale"]): r["median_s"]
+        for r in json.loads(baseline_path.read_text())["results"]
+    }
+    for result in results:
+        baseline_median = baseline.get((result.name, result.scale))
+        if baseline_median is None:
+            continue
+        print(f"{result.name:32} {result.scale:8} {baseline_median * 1000:10.2f}ms -> {result.median_s * 1000:10.2f}ms ({result.median_s / baseline_median:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the metric services against synthetic seasons")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--out", type=Path, default=None, help="Defaults to benchmarks/results/<git revision>.json")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier results file to compare medians against")
+    args = parser.parse_args()
+
+    results: list[BenchmarkResult] = []
+    for scale in args.scales:
+        for name, (fn, setup) in benchmarks_for_scale(SCALES[scale]).items():
+            timings = time_rounds(fn, setup, args.rounds)
+            result = BenchmarkResult(
+                name=name,
+                scale=scale,
+                rounds=args.rounds,
+                min_s=min(timings),
+                median_s=statistics.median(timings),
+                mean_s=statistics.fmean(timings)
+            )
+            results.append(result)
+            print(f"{name:32} {scale:8} median {result.median_s * 1000:10.2f}ms")
+
+    revision = git_revision()
+    out: Path = args.out or Path(__file__).parent / "results" / f"{revision}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "revision": revision,
+        "python": platform.python_version(),
+        "scales": {scale: asdict(SCALES[scale]) for scale in args.scales},
+        "results": [asdict(r) for r in results],
+    }, indent=2))
+    print(f"Wrote {out}")
+
+    if args.baseline is not None:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
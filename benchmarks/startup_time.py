@@ -0,0 +1,78 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import *
+
+# Import-time profile of main, the work a restarted dyno does before it can serve.
+# Runs `python -X importtime -c "import main"` in fresh interpreters, reports the
+# slowest modules and fails if the median total is over the budget:
+#
+#   python -m benchmarks.startup_time --budget-ms 800
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+@dataclass
+class ImportTiming:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+def profile_imports(module: str) -> list[ImportTiming]:
+    env = {**os.environ}
+    # Importing main only needs these to be set, nothing connects at import time
+    env.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    env.setdefault("SECRET", "startup-time-profile")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    timings: list[ImportTiming] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append(ImportTiming(
+            module=name.strip(),
+            depth=(len(name) - len(name.lstrip()) - 1) // 2,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us)
+        ))
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import time of the app")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the median import time is over this")
+    args = parser.parse_args()
+
+    rounds = [profile_imports(args.module) for _ in range(args.rounds)]
+    totals_ms = [
+        next(t.cumulative_us for t in timings if t.module == args.module) / 1000
+        for timings in rounds
+    ]
+    median_ms = statistics.median(totals_ms)
+
+    # The slowest round's tree is the most useful one to read
+    timings = rounds[totals_ms.index(max(totals_ms))]
+    print(f"import {args.module}: median {median_ms:.1f}ms over {args.rounds} rounds (min {min(totals_ms):.1f}ms)")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module (top level imports of {args.module})")
+    direct = [t for t in timings if t.depth == 1]
+    for t in sorted(direct, key=lambda t: t.cumulative_us, reverse=True)[:args.top]:
+        print(f"{t.cumulative_us / 1000:14.1f} {t.self_us / 1000:9.1f}  {t.module}")
+    print(f"\n{'self ms':>9}  module (slowest anywhere)")
+    for t in sorted(timings, key=lambda t: t.self_us, reverse=True)[:args.top]:
+        print(f"{t.self_us / 1000:9.1f}  {t.module}")
+
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"\nFAIL import {args.module} took {median_ms:.1f}ms, over the {args.budget_ms:.0f}ms budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import random
+from dataclasses import dataclass, field
+from typing import *
+
+from models import PickResult, PropBetType, PropBetDirection, SauceFactor, VetoApprovalStatus, ParlayState
+from services.records import ParlayRecord, PickRecord, PickVetoRecord, PropBetTargetRecord, VetoVoteRecord
+from utils.parlays import finalize_parlay_results, map_pick_result_to_veto_result
+
+# Deterministic synthetic seasons built from the same records the metric services
+# consume, so benchmarks need no database. The same config and seed always produce
+# the same season.
+
+@dataclass
+class SyntheticSeasonConfig:
+    gamblers: int
+    parlays: int
+    seed: int = 0
+    targets: int = 200
+    # Chance that a gambler has a pick in a given parlay
+    participation: float = 0.85
+    # Chance that a parlay has a veto
+    veto_rate: float = 0.1
+    # When False every parlay is left OPEN with graded picks, ready to be finalized
+    close_parlays: bool = True
+
+@dataclass(slots=True)
+class SyntheticTarget:
+    id: int
+    identifier: str
+    player_name: str | None
+    team_name: str
+
+@dataclass
+class SyntheticSeason:
+    gambler_ids: list[int]
+    targets: list[SyntheticTarget]
+    parlays: list[ParlayRecord]
+    parlay_owners: dict[int, int] = field(default_factory=dict)
+
+TEAMS = [f"Team {i}" for i in range(32)]
+
+def _pick_result(rng: random.Random, win_probability: float, sauce_factor: SauceFactor | None):
+    roll = rng.random()
+    if roll < 0.03:
+        return PickResult.PUSH
+    if roll < 0.07:
+        return PickResult.VOID
+    if sauce_factor == SauceFactor.SPICY:
+        win_probability -= 0.15
+    elif sauce_factor == SauceFactor.BITCH:
+        win_probability += 0.15
+    return PickResult.WIN if rng.random() < win_probability else PickResult.LOSS
+
+def _veto(rng: random.Random, veto_id: int, pick: PickRecord, gambler_ids: list[int]):
+    vetoer_id = rng.choice([g for g in gambler_ids if g != pick.gambler_id])
+    votes = [
+        VetoVoteRecord(gambler_id=gambler_id, affirmative=rng.random() < 0.6)
+        for gambler_id in gambler_ids
+        if gambler_id != vetoer_id and rng.random() < 0.8
+    ]
+    # Mirrors update_veto_approval_status with a terminal status required
+    required = len(gambler_ids) // 2
+    affirmative = len([v for v in votes if v.affirmative])
+    if affirmative >= required:
+        approval_status = VetoApprovalStatus.APPROVED
+    elif len(votes) - affirmative >= required:
+        approval_status = VetoApprovalStatus.REJECTED
+    else:
+        approval_status = VetoApprovalStatus.UNDECIDED
+    return PickVetoRecord(id=veto_id, gambler_id=vetoer_id, approval_status=approval_status, result=None, votes=votes)
+
+def _close_parlay(parlay: ParlayRecord):
+    # finalize_parlay_results never awaits the session, so the coroutine finishes on
+    # its first step. Driving it by hand keeps the generator usable inside an event loop.
+    coroutine = finalize_parlay_results(cast(Any, parlay), cast(Any, None))
+    try:
+        coroutine.send(None)
+    except StopIteration as finished:
+        _, possible_results = finished.value
+    else:
+        raise RuntimeError("finalize_parlay_results unexpectedly suspended")
+    parlay.result = possible_results[0]
+    parlay.state = ParlayState.CLOSED
+
+def generate_synthetic_season(config: SyntheticSeasonConfig) -> SyntheticSeason:
+    rng = random.Random(config.seed)
+    gambler_ids = list(range(1, config.gamblers + 1))
+    targets = [
+        SyntheticTarget(
+            id=i,
+            identifier=f"synthetic-{i}",
+            player_name=None if i % 5 == 0 else f"Player {i}",
+            team_name=TEAMS[i % len(TEAMS)]
+        )
+        for i in range(1, config.targets + 1)
+    ]
+    # Popular targets and prop types get picked far more often than the long tail
+    target_weights = [1 / rank for rank in range(1, len(targets) + 1)]
+    prop_types = list(PropBetType)
+    skills = {gambler_id: rng.uniform(0.45, 0.65) for gambler_id in gambler_ids}
+    prop_type_weights = {gambler_id: [rng.paretovariate(1.5) for _ in prop_types] for gambler_id in gambler_ids}
+
+    season = SyntheticSeason(gambler_ids=gambler_ids, targets=targets, parlays=[])
+    pick_id = 0
+    veto_id = 0
+    for order in range(1, config.parlays + 1):
+        parlay = ParlayRecord(id=order, order=order, state=ParlayState.OPEN, result=None)
+        season.parlay_owners[parlay.id] = rng.choice(gambler_ids)
+        for gambler_id in gambler_ids:
+            if rng.random() >= config.participation:
+                continue
+            pick_id += 1
+            target = rng.choices(targets, weights=target_weights)[0]
+            sauce_factor = rng.choices([None, SauceFactor.SPICY, SauceFactor.BITCH], weights=[75, 15, 10])[0]
+            parlay.picks.append(PickRecord(
+                id=pick_id,
+                gambler_id=gambler_id,
+                prop_bet_target_id=target.id,
+                prop_type=rng.choices(prop_types, weights=prop_type_weights[gambler_id])[0],
+                direction=rng.choice(list(PropBetDirection)),
+                sauce_factor=sauce_factor,
+                result=_pick_result(rng, skills[gambler_id], sauce_factor),
+                prop_bet_target=PropBetTargetRecord(player_name=target.player_name, team_name=target.team_name)
+            ))
+
+        if len(parlay.picks) > 1 and rng.random() < config.veto_rate:
+            veto_id += 1
+            pick = rng.choice(parlay.picks)
+            veto = _veto(rng, veto_id, pick, gambler_ids)
+            if veto.approval_status == VetoApprovalStatus.APPROVED:
+                veto.result = map_pick_result_to_veto_result(cast(PickResult, pick.result))
+            pick.vetoes.append(veto)
+        if config.close_parlays:
+            _close_parlay(parlay)
+        season.parlays.append(parlay)
+
+    return season
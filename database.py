@@ -1,12 +1,65 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import asyncio
+from contextlib import asynccontextmanager
 
-from utils.env_vars import EnvVarName, load_env_var
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, SessionTransaction
+
+from utils.env_vars import EnvVarName, load_env_var, load_env_var_or_default
+from utils.sqlite_profile import SQLITE_BEGIN_OPTION, SqlitePragmas, SqliteProfile, configure_sqlite_engine, is_sqlite_url
 
 DATABASE_URL = load_env_var(EnvVarName.DATABASE_URL)
 
 engine = create_async_engine(DATABASE_URL)
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
-async def get_db():
+# On a tuned SQLite database writes take the write lock as soon as their transaction
+# begins, see begin_write
+SERIALIZE_SQLITE_WRITERS = False
+if is_sqlite_url(DATABASE_URL):
+    sqlite_profile = SqliteProfile(load_env_var_or_default(EnvVarName.SQLITE_PROFILE, SqliteProfile.TUNED))
+    configure_sqlite_engine(engine, sqlite_profile, SqlitePragmas.from_env())
+    SERIALIZE_SQLITE_WRITERS = sqlite_profile == SqliteProfile.TUNED
+
+# SQLite has one writer at a time anyway. Queueing this process's writers here keeps
+# them in order and off SQLite's busy handler, which only the other workers still hit.
+sqlite_writer_lock = asyncio.Lock()
+SQLITE_WRITER_LOCK_KEY = "sqlite_writer_lock"
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+@event.listens_for(Session, "after_transaction_end")
+def release_sqlite_writer_lock(session: Session, transaction: SessionTransaction):
+    if transaction.parent is None and session.info.pop(SQLITE_WRITER_LOCK_KEY, None) is not None:
+        sqlite_writer_lock.release()
+
+async def begin_write(session: AsyncSession):
+    # Call before the first statement of a transaction that writes. On tuned SQLite it
+    # takes the writer lock and begins IMMEDIATE; both are let go when the transaction
+    # ends, so whatever the session reads after committing runs in an ordinary
+    # deferred transaction and doesn't hold up other writers. Handlers therefore do
+    # all their writes before their one commit.
+    if not SERIALIZE_SQLITE_WRITERS:
+        return
+    await sqlite_writer_lock.acquire()
+    session.sync_session.info[SQLITE_WRITER_LOCK_KEY] = True
+    try:
+        await session.connection(execution_options={SQLITE_BEGIN_OPTION: "IMMEDIATE"})
+    except BaseException:
+        if session.sync_session.info.pop(SQLITE_WRITER_LOCK_KEY, None) is not None:
+            sqlite_writer_lock.release()
+        raise
+
+@asynccontextmanager
+async def write_session():
+    # For writes outside a request, e.g. background jobs
+    async with async_session() as session:
+        await begin_write(session)
+        yield session
+
+async def get_db(request: Request):
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        if request.method not in READ_METHODS:
+            await begin_write(session)
+        yield session
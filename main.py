@@ -2,16 +2,69 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=".env")
 
 import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter, Request, HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 
-from database import get_db
+from database import DATABASE_URL, get_db, async_session, engine, write_session
 from routers.auth import router as auth_router
 from routers.gambling_seasons import router as gambling_season_router
 from routers.parlays import router as parlays_router
 from routers.picks import router as pick_router
 from routers.vetoes import router as veto_router
+from routers.users import router as users_router
+from routers.prop_bet_targets import router as prop_bet_targets_router
+from routers.metrics import router as metrics_router
+from routers.admin import router as admin_router, ADMIN_USERNAMES, PROFILE_OUTPUT_DIR, PROFILE_SAMPLE_INTERVAL_S, is_admin_token
+from services.executor import metrics_executor
+from services.invalidation import invalidation_bus
+from services.recompute_queue import recompute_queue
+from services.prop_target_search import prop_target_search
+from utils.request_metrics import RequestMetricsMiddleware, request_metrics
+from utils.request_profiler import RequestProfilerMiddleware
+from utils.query_budget import QueryBudgetMode, QueryBudgetMiddleware, enable_raiseload, install_query_recorder
+from utils.env_vars import EnvVarName, load_env_var_or_default
+from utils.openapi_schema import serve_committed_openapi
 
-app = FastAPI()
+request_metrics.instrument_engine(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with async_session() as db:
+        await prop_target_search.load(db)
+    await invalidation_bus.start(async_session, write_session, DATABASE_URL)
+    await recompute_queue.start()
+    yield
+    await recompute_queue.stop()
+    await invalidation_bus.stop()
+    await metrics_executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+serve_committed_openapi(app)
+
+# Without admins nobody can ask for a profile, so skip the middleware entirely. Added before
+# the metrics middleware so it runs inside it and can read the request's SQL time.
+if ADMIN_USERNAMES:
+    app.add_middleware(
+        RequestProfilerMiddleware,
+        is_admin=is_admin_token,
+        output_dir=PROFILE_OUTPUT_DIR,
+        interval_s=PROFILE_SAMPLE_INTERVAL_S
+    )
+app.add_middleware(RequestMetricsMiddleware)
+
+# Test mode: fail requests that go over their SQL statement budget or lazy load
+if QueryBudgetMode(load_env_var_or_default(EnvVarName.QUERY_BUDGET_MODE, QueryBudgetMode.OFF)) == QueryBudgetMode.ENFORCE:
+    install_query_recorder(engine)
+    enable_raiseload()
+    app.add_middleware(QueryBudgetMiddleware)
+
+# A parlay or pick changed by a concurrent request between being read and written,
+# see check_if_match in routers/common.py
+@app.exception_handler(StaleDataError)
+async def handle_concurrent_modification(request: Request, exc: StaleDataError):
+    return JSONResponse(status_code=409, content={"detail": "Modified by another request, reload and try again"})
 
 # fast_url_snippets = [
 #     "login",
@@ -35,4 +88,8 @@ app.include_router(auth_router)
 app.include_router(gambling_season_router)
 app.include_router(parlays_router)
 app.include_router(pick_router)
-app.include_router(veto_router)
\ No newline at end of file
+app.include_router(veto_router)
+app.include_router(users_router)
+app.include_router(prop_bet_targets_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
\ No newline at end of file
@@ -1,7 +1,7 @@
 import datetime
 from enum import StrEnum
 
-from sqlalchemy import Float, ForeignKey, Enum as SQLEnum, Integer, String, null
+from sqlalchemy import Float, ForeignKey, Enum as SQLEnum, Index, Integer, JSON, String, false, null
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -39,6 +39,8 @@ class GamblingSeason(Base):
     year: Mapped[int]
     name: Mapped[str]
     state: Mapped[GamblingSeasonState] = mapped_column(SQLEnum(GamblingSeasonState))
+    # Last sequence number handed out to the season's change log
+    change_sequence: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     gamblers: Mapped[list["Gambler"]] = relationship(back_populates="gambling_season")
     parlays: Mapped[list["Parlay"]] = relationship(back_populates="gambling_season")
@@ -54,6 +56,11 @@ class PropBetTarget(Base):
 
 class Pick(Base):
     __tablename__ = "picks"
+    __table_args__ = (
+        # For the pick filters of /parlays/search
+        Index("ix_picks_target_gambler", "prop_bet_target_id", "gambler_id"),
+        Index("ix_picks_gambler_type", "gambler_id", "prop_type"),
+    )
 
     gambler_id: Mapped[int] = mapped_column(ForeignKey("gamblers.id"))
     prop_bet_target_id: Mapped[int] = mapped_column(ForeignKey("prop_bet_targets.id"))
@@ -64,6 +71,10 @@ class Pick(Base):
     direction: Mapped[PropBetDirection] = mapped_column(SQLEnum(PropBetDirection))
     sauce_factor: Mapped[SauceFactor | None] = mapped_column(SQLEnum(SauceFactor), nullable=True, default=None)
     result: Mapped[PickResult | None] = mapped_column(SQLEnum(PickResult), nullable=True, default=None)
+    # Bumped on every update, which only applies if the row is still at the version read
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version_id}
 
     gambler: Mapped["Gambler"] = relationship(back_populates="picks")
     vetoes: Mapped[list["PickVeto"]] = relationship(back_populates="pick", cascade="all, delete-orphan")
@@ -95,6 +106,13 @@ class VetoVote(Base):
 
 class Parlay(Base):
     __tablename__ = "parlays"
+    __table_args__ = (
+        # Season listings filter by season and page by order
+        Index("ix_parlays_season_order", "gambling_season_id", "order"),
+        # For /parlays/search, which always filters by season and sorts by date
+        Index("ix_parlays_season_slate_date", "gambling_season_id", "slate_type", "competition_date"),
+        Index("ix_parlays_season_owner_date", "gambling_season_id", "owner_id", "competition_date"),
+    )
 
     gambling_season_id: Mapped[int] = mapped_column(ForeignKey("gambling_seasons.id"))
     owner_id: Mapped[int] = mapped_column(ForeignKey("gamblers.id"))
@@ -105,8 +123,43 @@ class Parlay(Base):
     payout_pp: Mapped[float | None] = mapped_column(Float, nullable=True, default=None)
     result: Mapped[ParlayResult | None] = mapped_column(SQLEnum(ParlayResult), nullable=True, default=None)
     order: Mapped[int] = mapped_column(Integer, nullable=False)
+    # See Pick.version_id. Pick edits bump their parlay's version too.
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    # Kept up to date by services.parlay_counters
+    pick_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    graded_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    pending_veto: Mapped[bool] = mapped_column(nullable=False, default=False, server_default=false())
+
+    __mapper_args__ = {"version_id_col": version_id}
 
     picks: Mapped[list[Pick]] = relationship(back_populates="parlay", cascade="all, delete-orphan")
     gambling_season: Mapped[GamblingSeason] = relationship(back_populates="parlays")
     owner: Mapped[Gambler] = relationship(back_populates="owned_parlays")
 
+class CacheInvalidation(Base):
+    # Read by services.invalidation when workers share caches through database polling
+    __tablename__ = "cache_invalidations"
+
+    season_id: Mapped[int | None] = mapped_column(Integer, nullable=True, default=None)
+    version: Mapped[str | None] = mapped_column(String, nullable=True, default=None)
+    prop_bet_target_ids: Mapped[list[int]] = mapped_column(JSON, default=list)
+    origin: Mapped[str]
+
+class ChangeEntityType(StrEnum):
+    PARLAY = "Parlay"
+    PICK = "Pick"
+    VETO = "Veto"
+    VOTE = "Vote"
+
+class SeasonChange(Base):
+    # Written by services.change_log whenever a parlay, pick, veto or vote is flushed
+    __tablename__ = "season_changes"
+    __table_args__ = (Index("ix_season_changes_season_sequence", "gambling_season_id", "sequence"),)
+
+    gambling_season_id: Mapped[int] = mapped_column(ForeignKey("gambling_seasons.id"))
+    sequence: Mapped[int]
+    entity_type: Mapped[ChangeEntityType] = mapped_column(SQLEnum(ChangeEntityType))
+    entity_id: Mapped[int]
+    # The parlay to resend for this change
+    parlay_id: Mapped[int]
+    deleted: Mapped[bool] = mapped_column(default=False)
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from models import User
+from utils.env_vars import EnvVarName, load_env_var_or_default
+from .auth import manager
+
+# Comma separated usernames allowed to profile requests and read the profiles
+ADMIN_USERNAMES = frozenset(
+    username.strip()
+    for username in load_env_var_or_default(EnvVarName.ADMIN_USERNAMES, "").split(",")
+    if username.strip()
+)
+PROFILE_OUTPUT_DIR = Path(load_env_var_or_default(EnvVarName.PROFILE_OUTPUT_DIR, "profiles"))
+PROFILE_SAMPLE_INTERVAL_S = float(load_env_var_or_default(EnvVarName.PROFILE_SAMPLE_INTERVAL_MS, "1")) / 1000
+
+async def is_admin_token(token: str):
+    try:
+        user = await manager.get_current_user(token)
+    except HTTPException:
+        return False
+    return user.username in ADMIN_USERNAMES
+
+async def require_admin(user: User = Depends(manager)):
+    if user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Only admins can access this resource")
+    return user
+
+router = APIRouter(
+    prefix="/admin",
+    dependencies=[Depends(require_admin)],
+    tags=["Admin"]
+)
+
+class ListProfilesResponseData(BaseModel):
+    profile_ids: list[str]
+
+@router.get("/profiles", operation_id="list_request_profiles", response_model=ListProfilesResponseData)
+async def list_request_profiles():
+    if not PROFILE_OUTPUT_DIR.exists():
+        return ListProfilesResponseData(profile_ids=[])
+    return ListProfilesResponseData(
+        profile_ids=sorted((p.stem for p in PROFILE_OUTPUT_DIR.glob("*.folded")), reverse=True)
+    )
+
+@router.get("/profiles/{profile_id}", operation_id="get_request_profile", response_class=PlainTextResponse)
+async def get_request_profile(profile_id: str):
+    path = PROFILE_OUTPUT_DIR / f"{profile_id}.folded"
+    # Profile ids never contain path separators, so this also rules out traversal
+    if "/" in profile_id or "\\" in profile_id or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(path.read_text())
@@ -1,11 +1,11 @@
-from email.policy import default
-from tkinter import UNDERLINE
 from typing import *
 from datetime import date
 from pydantic import BaseModel
 
-from sqlalchemy import Select, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Select, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
@@ -29,6 +29,11 @@ from models import (
     ParlayState,
     ParlayResult
 )
+from services.invalidation import InvalidationMessage, invalidation_bus
+from services.prop_target_index import prop_target_indexes
+from services.prop_target_search import SearchableTarget, prop_target_search
+from utils.env_vars import EnvVarName, load_env_var_or_default
+from utils.lru_cache import LRUCache
 
 class GamblerResponseData(BaseModel):
     id: int
@@ -101,6 +106,7 @@ class PickResponseData(BaseModel):
     veto: Optional[PickVetoResponseData]
     prop_bet_target: PropBetTargetResponseData
     prop_type: PropBetType
+    version: int
 
     @classmethod
     def from_model(cls, model: Pick):
@@ -115,6 +121,7 @@ class PickResponseData(BaseModel):
             sauce_factor=model.sauce_factor,
             result=model.result,
             prop_type=model.prop_type,
+            version=model.version_id,
             veto=PickVetoResponseData.from_model(veto) if veto else None,
             prop_bet_target=PropBetTargetResponseData.from_model(model.prop_bet_target)
         )
@@ -129,6 +136,7 @@ class ParlayResponseData(BaseModel):
     state: ParlayState
     result: ParlayResult | None
     order: int
+    version: int
 
     @classmethod
     def from_model(cls, model: Parlay):
@@ -142,56 +150,139 @@ class ParlayResponseData(BaseModel):
             picks=picks,
             state=model.state,
             result=model.result,
-            order=model.order
+            order=model.order,
+            version=model.version_id
+        )
+
+class ParlaySummaryResponseData(BaseModel):
+    # A parlay without its picks, from the parlay row alone
+    id: int
+    owner_id: int
+    slate_type: SlateType
+    wager_pp: float
+    competition_date: date
+    state: ParlayState
+    result: ParlayResult | None
+    order: int
+    version: int
+    pick_count: int
+    graded_count: int
+    pending_veto: bool
+
+    @classmethod
+    def from_model(cls, model: Parlay):
+        return cls(
+            id=model.id,
+            owner_id=model.owner_id,
+            slate_type=model.slate_type,
+            wager_pp=model.wager_pp,
+            competition_date=model.competition_date,
+            state=model.state,
+            result=model.result,
+            order=model.order,
+            version=model.version_id,
+            pick_count=model.pick_count,
+            graded_count=model.graded_count,
+            pending_veto=model.pending_veto
         )
     
-async def get_required_veto_vote_count(veto: PickVeto, db: AsyncSession):
-    pick = (await db.execute(
-        select(Pick).where(Pick.id == veto.pick_id)
-            .options(
-                selectinload(Pick.parlay)
-                .selectinload(Parlay.gambling_season)
-                .selectinload(GamblingSeason.gamblers)
-            )
-    )).scalar_one()
-    return (len(pick.parlay.gambling_season.gamblers) // 2)
+def get_required_veto_vote_count(gambling_season: GamblingSeason):
+    return (len(gambling_season.gamblers) // 2)
 
-async def update_veto_approval_status(veto: PickVeto, db: AsyncSession, require_terminal_status=False) -> bool:
+def update_veto_approval_status(veto: PickVeto, gambling_season: GamblingSeason, require_terminal_status=False) -> bool:
+    # gambling_season is the veto's season, with its gamblers loaded
     if veto.approval_status in [VetoApprovalStatus.APPROVED, VetoApprovalStatus.REJECTED, VetoApprovalStatus.UNDECIDED]:
         return False
 
     affirmative_votes_cnt = len([vote for vote in veto.votes if vote.affirmative])
     negative_count = len([vote for vote in veto.votes if not vote.affirmative])
 
-    required_count = await get_required_veto_vote_count(veto, db)
+    required_count = get_required_veto_vote_count(gambling_season)
     veto_approved = False
+    # Left for the caller to commit along with the rest of its changes
     if affirmative_votes_cnt >= required_count:
         veto.approval_status = VetoApprovalStatus.APPROVED
-        await db.commit()
         veto_approved = True
     elif negative_count >= required_count:
         veto.approval_status = VetoApprovalStatus.REJECTED
-        await db.commit()
     elif require_terminal_status:
         veto.approval_status = VetoApprovalStatus.UNDECIDED
-        await db.commit()
     return veto_approved
     
-async def get_or_create_prop_bet_target(target_request_data: PropBetTargetRequestData, db: AsyncSession) -> PropBetTarget:
-    existing_target_query = await db.execute(
-        select(PropBetTarget).where(PropBetTarget.identifier == target_request_data.identifier)
-    )
-    target = existing_target_query.scalar_one_or_none()
-    if target is None:
-        target = PropBetTarget(
-            identifier=target_request_data.identifier,
-            team_name=target_request_data.team_name,
-            player_name=target_request_data.player_name
-        )
-        db.add(target)
-        await db.commit()
-        await db.refresh(target)
-    return target
+# Prop bet targets are never updated or deleted, so an identifier always maps to the
+# same id once its row is committed.
+prop_bet_target_ids: LRUCache[str, int] = LRUCache(
+    max_entries=int(load_env_var_or_default(EnvVarName.PROP_BET_TARGET_ID_CACHE_MAX_ENTRIES, "4096"))
+)
+NEW_PROP_BET_TARGETS_KEY = "new_prop_bet_targets"
+# Ids of the targets created by the session's commits, for publish_season_change
+COMMITTED_PROP_BET_TARGET_IDS_KEY = "committed_prop_bet_target_ids"
+
+# Targets inserted in a transaction only become visible to the id cache and the search
+# index once that transaction commits.
+@event.listens_for(Session, "after_commit")
+def publish_new_prop_bet_targets(session: Session):
+    for target in session.info.pop(NEW_PROP_BET_TARGETS_KEY, []):
+        prop_bet_target_ids.put(target.identifier, target.id)
+        prop_target_search.add_target(target)
+        session.info.setdefault(COMMITTED_PROP_BET_TARGET_IDS_KEY, []).append(target.id)
+
+@event.listens_for(Session, "after_rollback")
+def discard_new_prop_bet_targets(session: Session):
+    session.info.pop(NEW_PROP_BET_TARGETS_KEY, None)
+
+def insert_for_dialect(db: AsyncSession):
+    match db.get_bind().dialect.name:
+        case "postgresql":
+            return postgresql.insert
+        case "sqlite":
+            return sqlite.insert
+        case dialect_name:
+            raise ValueError(f"No upsert support for the {dialect_name} dialect!")
+
+async def get_or_create_prop_bet_target_ids(target_request_datas: Iterable[PropBetTargetRequestData], db: AsyncSession) -> dict[str, int]:
+    # Resolves every identifier to an id with at most one INSERT ... ON CONFLICT DO
+    # NOTHING and one SELECT, inside the caller's transaction. Concurrent requests
+    # creating the same target both end up with the row that won the insert.
+    requested = {t.identifier: t for t in target_request_datas}
+    target_ids: dict[str, int] = {}
+    for identifier in requested:
+        cached_id = prop_bet_target_ids.get(identifier)
+        if cached_id is not None:
+            target_ids[identifier] = cached_id
+
+    missing = [t for identifier, t in requested.items() if identifier not in target_ids]
+    if missing:
+        insert = insert_for_dialect(db)
+        inserted = (await db.execute(
+            insert(PropBetTarget)
+            .values([
+                {"identifier": t.identifier, "team_name": t.team_name, "player_name": t.player_name}
+                for t in missing
+            ])
+            .on_conflict_do_nothing(index_elements=[PropBetTarget.identifier])
+            .returning(PropBetTarget.id, PropBetTarget.identifier, PropBetTarget.player_name, PropBetTarget.team_name)
+        )).all()
+        new_targets = db.sync_session.info.setdefault(NEW_PROP_BET_TARGETS_KEY, [])
+        for id, identifier, player_name, team_name in inserted:
+            target_ids[identifier] = id
+            new_targets.append(SearchableTarget(id=id, identifier=identifier, player_name=player_name, team_name=team_name))
+
+        existing = [t.identifier for t in missing if t.identifier not in target_ids]
+        if existing:
+            uncommitted = {t.identifier for t in new_targets}
+            for id, identifier in (await db.execute(
+                select(PropBetTarget.id, PropBetTarget.identifier)
+                .where(PropBetTarget.identifier.in_(existing))
+            )).tuples().all():
+                target_ids[identifier] = id
+                if identifier not in uncommitted:
+                    prop_bet_target_ids.put(identifier, id)
+
+    return target_ids
+
+async def get_or_create_prop_bet_target_id(target_request_data: PropBetTargetRequestData, db: AsyncSession) -> int:
+    return (await get_or_create_prop_bet_target_ids([target_request_data], db))[target_request_data.identifier]
 
 async def check_user_access_to_parlay(user: User, parlay_or_id: int | Parlay, db: AsyncSession):
     if isinstance(parlay_or_id, int):
@@ -228,6 +319,34 @@ async def check_user_is_gambler(user: User, gambler_id: int, db: AsyncSession):
         raise HTTPException(status_code=403, detail="User cannot make a request on behalf of that gambler!")
 
 
+async def get_season_version(gambling_season_id: int, db: AsyncSession) -> str:
+    # Identifies everything that feeds the season metrics. The change log's flush hook
+    # bumps the season's change_sequence in the same transaction as every insert,
+    # update or delete of a parlay, pick, veto or vote in it, so unlike timestamps it
+    # can't repeat across two writes.
+    change_sequence = (await db.execute(
+        select(GamblingSeason.change_sequence).where(GamblingSeason.id == gambling_season_id)
+    )).scalar_one()
+    return str(change_sequence)
+
+async def publish_season_change(gambling_season_id: int, db: AsyncSession, parlay_id: int | None = None):
+    # Call after committing a change to the season. Re-reads the changed parlay into
+    # this worker's prop target index, then tells every worker to drop what they have
+    # cached for older versions of the season.
+    index = await prop_target_indexes.sync_parlay(parlay_id, db) if parlay_id is not None else None
+    version = await get_season_version(gambling_season_id, db)
+    if index is not None:
+        index.version = version
+    # Ends the read transaction so its connection goes back to the pool. Publishing may
+    # wait for the SQLite writer lock, whose holder could otherwise be left waiting for
+    # a connection held here.
+    await db.commit()
+    await invalidation_bus.publish(InvalidationMessage(
+        season_id=gambling_season_id,
+        version=version,
+        prop_bet_target_ids=db.sync_session.info.pop(COMMITTED_PROP_BET_TARGET_IDS_KEY, [])
+    ))
+
 async def check_season_in_progress(gambling_season_id: int, db: AsyncSession):
     season = (await db.execute(
         select(GamblingSeason).where(GamblingSeason.id == gambling_season_id)
@@ -235,6 +354,30 @@ async def check_season_in_progress(gambling_season_id: int, db: AsyncSession):
     if season.state != GamblingSeasonState.IN_PROGRESS:
         raise HTTPException(status_code=403, detail="Cannot make changes to a season that is not in progress!")
 
+# Optimistic concurrency: parlays and picks carry a version that every update bumps
+# (see version_id_col on the models). Clients send the ETags of the versions they last
+# saw in If-Match and get a 409 if any of them moved on. Without the header the update
+# still fails with a 409 if a concurrent request committed in between, see main.py.
+def parlay_etag(parlay: Parlay):
+    return f'"parlay-{parlay.id}.{parlay.version_id}"'
+
+def pick_etag(pick: Pick):
+    return f'"pick-{pick.id}.{pick.version_id}"'
+
+def check_if_match(if_match: str | None, *etags: str):
+    if if_match is None or if_match.strip() == "*":
+        return
+    # Versions only ever go up, so weak and strong comparison are the same here
+    listed = {tag.strip().removeprefix("W/") for tag in if_match.split(",")}
+    stale = [etag for etag in etags if etag not in listed]
+    if stale:
+        raise HTTPException(status_code=409, detail=f"Modified since last read, current versions are {', '.join(stale)}")
+
+def bump_parlay_version(parlay: Parlay):
+    # For changes to a parlay's picks: the parlay is updated along with them, so they
+    # conflict with concurrent changes to the parlay's state and its other picks
+    flag_modified(parlay, "state")
+
 
 def add_selects_to_parlay_query(select: Select[Tuple[Parlay]]):
     return select.options(
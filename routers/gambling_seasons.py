@@ -1,9 +1,14 @@
+import asyncio
+import datetime
+from dataclasses import dataclass
 from enum import StrEnum
+from typing import *
+
 from fastapi import Depends, HTTPException, Query
 from fastapi.routing import APIRouter
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 
 from models import (
@@ -17,13 +22,26 @@ from models import (
     ParlayState,
     User
 )
-from database import get_db
+from database import get_db, async_session, write_session
 from .auth import manager
-from .common import GamblerResponseData, ParlayResponseData, add_selects_to_parlay_query
+from .admin import require_admin
+from .common import GamblerResponseData, ParlayResponseData, ParlaySummaryResponseData, add_selects_to_parlay_query, get_season_version
 
-from services.season_performance_calculator import SeasonPerformanceCalculator, GamblerPerformance, get_season_score_corrector_class
-from services.performance_time_series import TimeSeriesCalculator, TimeSeriesDatum
-from services.metric_calculator import GamblerMetricsCalculator
+from services.season_performance_calculator import GamblerPerformance, SCORE_CORRECTOR_CLASSES, get_season_score_corrector_class
+from services.performance_time_series import TimeSeriesDatum
+from services.records import stream_closed_parlay_records
+from services.season_loader import load_season_calculators
+from services.executor import metrics_executor
+from services.invalidation import InvalidationMessage, invalidation_bus
+from services.metric_tasks import compute_gambler_performances, compute_time_series, compute_season_backtest
+from services.backtesting import GamblerBacktestResult
+from services.change_log import compact_season_changes, load_season_changes
+from services.prop_target_index import PropTargetSortKey, prop_target_indexes
+from services.recompute_queue import RecomputeStatus, recompute_queue
+from services.common import ProjectedGamblerStanding
+from utils.env_vars import EnvVarName, load_env_var_or_default
+from utils.lru_cache import LRUCache
+from utils.single_flight import SingleFlightCache
 
 router = APIRouter(
     prefix="/gambling_seasons",
@@ -31,6 +49,38 @@ router = APIRouter(
     tags=["GamblingSeason"]
 )
 
+season_analytics_cache: SingleFlightCache[tuple[str, int, str], dict] = SingleFlightCache(
+    max_entries=int(load_env_var_or_default(EnvVarName.SEASON_CACHE_MAX_ENTRIES, "128")),
+    ttl_s=float(load_env_var_or_default(EnvVarName.SEASON_CACHE_TTL_S, "30"))
+)
+
+def drop_stale_season_analytics(message: InvalidationMessage):
+    # Keys are (kind, season id, season version)
+    if message.season_id is None:
+        season_analytics_cache.clear()
+    else:
+        season_analytics_cache.invalidate(lambda key: key[1] == message.season_id and key[2] != message.version)
+
+invalidation_bus.subscribe(drop_stale_season_analytics)
+
+@dataclass
+class SeasonAnalyticsSnapshot:
+    version: str
+    computed_at: datetime.datetime
+    payload: dict
+
+# The last payload built for each (kind, season id), whatever its version. Served while
+# the season is queued for a rebuild so reads don't compute it themselves.
+latest_season_analytics: LRUCache[tuple[str, int], SeasonAnalyticsSnapshot] = LRUCache(
+    max_entries=int(load_env_var_or_default(EnvVarName.SEASON_CACHE_MAX_ENTRIES, "128"))
+)
+
+class SeasonDataFreshnessResponseData(BaseModel):
+    # False while serving the previous build until a queued rebuild finishes
+    up_to_date: bool
+    computed_at: datetime.datetime
+    recompute_status: RecomputeStatus
+
 class ListGamblingSeasonEl(BaseModel):
     gambler_id: int
     id: int
@@ -59,6 +109,87 @@ async def get_user_gambling_seasions(user: UserModel=Depends(manager)):
     )
 
 
+class GetSeasonCacheStatsResponseData(BaseModel):
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+    entries: int
+    in_flight: int
+
+@router.get("/cache_stats", operation_id="get_season_cache_stats", response_model=GetSeasonCacheStatsResponseData, dependencies=[Depends(require_admin)])
+async def get_season_cache_stats():
+    stats = season_analytics_cache.stats
+    return GetSeasonCacheStatsResponseData(
+        hits=stats.hits,
+        misses=stats.misses,
+        coalesced=stats.coalesced,
+        evictions=stats.evictions,
+        entries=len(season_analytics_cache),
+        in_flight=season_analytics_cache.in_flight
+    )
+
+
+class ScoreCorrectorBacktestRequestData(BaseModel):
+    score_correctors: list[str]
+    # Defaults to every season the user gambled in
+    season_ids: list[int] | None = None
+
+class SeasonBacktestEl(BaseModel):
+    season_id: int
+    year: int
+    baseline_score_corrector: str
+    results: dict[str, dict[int, GamblerBacktestResult]]
+
+class ScoreCorrectorBacktestResponseData(BaseModel):
+    seasons: list[SeasonBacktestEl]
+
+async def load_backtest_season(season_id: int, score_corrector_classes: dict[str, type]):
+    async with async_session() as db:
+        gambling_season = (await db.execute(
+            select(GamblingSeasonModel)
+            .where(GamblingSeasonModel.id == season_id)
+            .options(
+                selectinload(GamblingSeasonModel.gamblers)
+            )
+        )).scalar_one()
+        calculators = await load_season_calculators([g.id for g in gambling_season.gamblers], season_id, db)
+
+    baseline_class = get_season_score_corrector_class(gambling_season.year)
+    results = await metrics_executor.run(
+        compute_season_backtest,
+        calculators,
+        baseline_class,
+        score_corrector_classes,
+        size=max((c.mc.overall.total for c in calculators.values()), default=0)
+    )
+    return SeasonBacktestEl(
+        season_id=season_id,
+        year=gambling_season.year,
+        baseline_score_corrector=baseline_class.__name__,
+        results=results
+    )
+
+@router.post("/score_corrector_backtest", operation_id="backtest_score_correctors", response_model=ScoreCorrectorBacktestResponseData)
+async def backtest_score_correctors(body: ScoreCorrectorBacktestRequestData, user: UserModel = Depends(manager)):
+    unknown = [name for name in body.score_correctors if name not in SCORE_CORRECTOR_CLASSES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown score correctors: {', '.join(unknown)}")
+    user_season_ids = {g.gambling_season_id for g in user.gamblers}
+    season_ids = sorted(user_season_ids) if body.season_ids is None else body.season_ids
+    if not set(season_ids) <= user_season_ids:
+        raise HTTPException(status_code=403, detail="User is not a gambler in every requested gambling season")
+
+    # Each season is loaded once and all correctors are evaluated against it; seasons
+    # are loaded and evaluated concurrently.
+    score_corrector_classes = {name: SCORE_CORRECTOR_CLASSES[name] for name in body.score_correctors}
+    seasons = await asyncio.gather(*[
+        load_backtest_season(season_id, score_corrector_classes)
+        for season_id in season_ids
+    ])
+    return ScoreCorrectorBacktestResponseData(seasons=list(seasons))
+
+
 class GetGamblingSeasonResponseData(BaseModel):
     id: int
     gambler_id: int
@@ -67,8 +198,7 @@ class GetGamblingSeasonResponseData(BaseModel):
     state: GamblingSeasonState
     gamblers: dict[int, GamblerResponseData]
 
-@router.get("/{season_id}", operation_id="get_gambling_season", response_model=GetGamblingSeasonResponseData)
-async def get_gambling_season(season_id: int, db: AsyncSession=Depends(get_db), user: UserModel = Depends(manager)):
+async def load_gambling_season(season_id: int, user: UserModel, db: AsyncSession) -> GetGamblingSeasonResponseData:
     result = await db.execute(
         select(GamblingSeasonModel)
         .where(GamblingSeasonModel.id == season_id)
@@ -92,6 +222,10 @@ async def get_gambling_season(season_id: int, db: AsyncSession=Depends(get_db),
         gamblers=all_gamblers
     )
 
+@router.get("/{season_id}", operation_id="get_gambling_season", response_model=GetGamblingSeasonResponseData)
+async def get_gambling_season(season_id: int, db: AsyncSession=Depends(get_db), user: UserModel = Depends(manager)):
+    return await load_gambling_season(season_id, user, db)
+
 class GetSeasonParlaysResponseData(BaseModel):
     parlays: list[ParlayResponseData]
     next_offset: int
@@ -104,15 +238,14 @@ class GetSeasonParlaysSortParam(StrEnum):
     ASC = "asc"
     DESC = "desc"
 
-@router.get("/{season_id}/parlays", operation_id="get_season_parlays", response_model=GetSeasonParlaysResponseData)
-async def get_season_parlays(
-    season_id: int, 
-    db: AsyncSession=Depends(get_db),
-    limit: int = Query(20, description="The number of results to return"),
-    offset: int = Query(0, description="Offset to start descending query"),
-    state: ParlayState | None = Query(None, description="State of parlays to retrieve"),
-    sort: GetSeasonParlaysSortParam = Query(GetSeasonParlaysSortParam.ASC, description="How to sort parlays in query")
-):
+async def load_season_parlays(
+    season_id: int,
+    db: AsyncSession,
+    limit: int,
+    offset: int,
+    state: ParlayState | None,
+    sort: GetSeasonParlaysSortParam
+) -> GetSeasonParlaysResponseData:
     query = select(Parlay).where(Parlay.gambling_season_id==season_id)
     if state is not None:
         query = query.where(Parlay.state == state)
@@ -139,40 +272,182 @@ async def get_season_parlays(
         parlays=[ParlayResponseData.from_model(p) for p in parlays]
     )
 
+@router.get("/{season_id}/parlays", operation_id="get_season_parlays", response_model=GetSeasonParlaysResponseData)
+async def get_season_parlays(
+    season_id: int, 
+    db: AsyncSession=Depends(get_db),
+    limit: int = Query(20, description="The number of results to return"),
+    offset: int = Query(0, description="Offset to start descending query"),
+    state: ParlayState | None = Query(None, description="State of parlays to retrieve"),
+    sort: GetSeasonParlaysSortParam = Query(GetSeasonParlaysSortParam.ASC, description="How to sort parlays in query")
+):
+    return await load_season_parlays(season_id, db, limit, offset, state, sort)
+
+class GetSeasonParlaySummariesResponseData(BaseModel):
+    next_offset: int
+    parlays: list[ParlaySummaryResponseData]
+
+@router.get("/{season_id}/parlay_summaries", operation_id="get_season_parlay_summaries", response_model=GetSeasonParlaySummariesResponseData)
+async def get_season_parlay_summaries(
+    season_id: int,
+    user: User = Depends(manager),
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(20, description="The number of results to return"),
+    offset: int = Query(0, description="Offset to start descending query"),
+    state: ParlayState | None = Query(None, description="State of parlays to retrieve"),
+    sort: GetSeasonParlaysSortParam = Query(GetSeasonParlaysSortParam.ASC, description="How to sort parlays in query")
+) -> GetSeasonParlaySummariesResponseData | HTTPException:
+    # For list views: one query on the parlays table, with the counts of each parlay's
+    # picks read from its counter columns. get_parlay has the picks themselves.
+    if season_id not in {g.gambling_season_id for g in user.gamblers}:
+        raise HTTPException(status_code=403, detail="User is not a gambler in gambling season")
+
+    query = select(Parlay).where(Parlay.gambling_season_id == season_id)
+    if state is not None:
+        query = query.where(Parlay.state == state)
+    query_sort = Parlay.order.desc() if sort == GetSeasonParlaysSortParam.DESC else Parlay.order.asc()
+    parlays = (await db.execute(query.order_by(query_sort).limit(limit).offset(offset))).scalars().all()
+    return GetSeasonParlaySummariesResponseData(
+        next_offset=offset + len(parlays),
+        parlays=[ParlaySummaryResponseData.from_model(p) for p in parlays]
+    )
+
+class GetSeasonChangesResponseData(BaseModel):
+    # Pass back as since on the next poll
+    cursor: int
+    has_more: bool
+    parlays: list[ParlayResponseData]
+    deleted_parlay_ids: list[int]
+
+@router.get("/{season_id}/changes", operation_id="get_season_changes", response_model=GetSeasonChangesResponseData)
+async def get_season_changes(
+    season_id: int,
+    since: int = Query(0, ge=0, description="Cursor returned by the previous poll, 0 for everything"),
+    limit: int = Query(100, ge=1, le=1000, description="The number of change sequence numbers to return"),
+    user: User = Depends(manager),
+    db: AsyncSession = Depends(get_db)
+) -> GetSeasonChangesResponseData | HTTPException:
+    if season_id not in {g.gambling_season_id for g in user.gamblers}:
+        raise HTTPException(status_code=403, detail="User is not a gambler in gambling season")
+
+    batch = await load_season_changes(season_id, since, limit, db)
+    parlays = {
+        p.id: p for p in (await db.execute(
+            add_selects_to_parlay_query(select(Parlay).where(Parlay.id.in_(batch.parlay_ids)))
+        )).scalars().all()
+    } if batch.parlay_ids else {}
+    return GetSeasonChangesResponseData(
+        cursor=batch.cursor,
+        has_more=batch.has_more,
+        parlays=[ParlayResponseData.from_model(parlays[parlay_id]) for parlay_id in batch.parlay_ids if parlay_id in parlays],
+        deleted_parlay_ids=[parlay_id for parlay_id in batch.parlay_ids if parlay_id not in parlays]
+    )
+
 class GetSeasonGamblerPerformancesResponseData(BaseModel):
     performances: dict[int, GamblerPerformance]
+    freshness: SeasonDataFreshnessResponseData
 
 
+async def load_season_gambler_performances(season_id: int):
+    async with async_session() as db:
+        gambling_season = (await db.execute(
+            select(GamblingSeasonModel)
+            .where(GamblingSeasonModel.id == season_id)
+            .options(
+                selectinload(GamblingSeasonModel.gamblers)
+            )
+        )).scalar_one()
+        gambler_ids = [g.id for g in gambling_season.gamblers]
+        calculators = await load_season_calculators(gambler_ids, season_id, db)
+
+    score_corrector_class = get_season_score_corrector_class(gambling_season.year)
+    performances = await metrics_executor.run(
+        compute_gambler_performances,
+        calculators,
+        score_corrector_class,
+        size=max((c.mc.overall.total for c in calculators.values()), default=0)
+    )
+    return {"performances": performances}
+
 @router.get("/{season_id}/gambler_performances", operation_id="get_season_gambler_performances", response_model=GetSeasonGamblerPerformancesResponseData)
 async def get_season_gambler_performances(
     season_id: int,
     user: User = Depends(manager),
     db: AsyncSession = Depends(get_db)
 ) -> GetSeasonGamblerPerformancesResponseData | HTTPException:
-    gambling_season = (await db.execute(
-        select(GamblingSeasonModel)
-        .where(GamblingSeasonModel.id == season_id)
-        .options(
-            selectinload(GamblingSeasonModel.gamblers)
-        )
-    )).scalar_one()
-    parlays = (
-        await db.execute(
-            add_selects_to_parlay_query(select(Parlay).where(Parlay.gambling_season_id == season_id))
-        )
-    ).scalars().all()
+    payload, freshness = await get_season_analytics("gambler_performances", season_id, db)
+    return GetSeasonGamblerPerformancesResponseData.model_validate({**payload, "freshness": freshness})
 
-    gambler_ids = [g.id for g in gambling_season.gamblers]
+class GetSeasonTimeSeriesResponseData(BaseModel):
+    time_series: dict[int, list[TimeSeriesDatum]]
+    freshness: SeasonDataFreshnessResponseData
+
+async def load_season_time_series(season_id: int):
+    async with async_session() as db:
+        gambling_season = (await db.execute(
+            select(GamblingSeasonModel)
+            .where(GamblingSeasonModel.id == season_id)
+            .options(
+                selectinload(GamblingSeasonModel.gamblers)
+            )
+        )).scalar_one()
+        # The time series itself grows with the number of parlays, so the compact
+        # records are collected and handed to the executor in one go.
+        parlay_records = [p async for p in stream_closed_parlay_records(season_id, db)]
 
-    calculators = GamblerMetricsCalculator.calculator_dict_from_parlays(gambler_ids, list(parlays))
     score_corrector_class = get_season_score_corrector_class(gambling_season.year)
-    season_calculator = SeasonPerformanceCalculator(calculators, score_corrector_class)
-    return GetSeasonGamblerPerformancesResponseData(
-        performances=season_calculator.performances
+    time_series = await metrics_executor.run(
+        compute_time_series,
+        [g.id for g in gambling_season.gamblers],
+        parlay_records,
+        score_corrector_class,
+        size=len(parlay_records)
     )
+    return {"time_series": time_series}
 
-class GetSeasonTimeSeriesResponseData(BaseModel):
-    time_series: dict[int, list[TimeSeriesDatum]]
+SEASON_ANALYTICS_LOADERS: dict[str, Callable[[int], Awaitable[dict]]] = {
+    "gambler_performances": load_season_gambler_performances,
+    "time_series": load_season_time_series
+}
+
+async def compute_season_analytics(kind: str, season_id: int, season_version: str) -> SeasonAnalyticsSnapshot:
+    payload = await season_analytics_cache.get_or_compute(
+        (kind, season_id, season_version),
+        lambda: SEASON_ANALYTICS_LOADERS[kind](season_id)
+    )
+    snapshot = latest_season_analytics.get((kind, season_id))
+    if snapshot is None or snapshot.version != season_version or snapshot.payload is not payload:
+        snapshot = SeasonAnalyticsSnapshot(version=season_version, computed_at=datetime.datetime.now(datetime.UTC), payload=payload)
+        latest_season_analytics.put((kind, season_id), snapshot)
+    return snapshot
+
+async def get_season_analytics(kind: str, season_id: int, db: AsyncSession) -> tuple[dict, SeasonDataFreshnessResponseData]:
+    season_version = await get_season_version(season_id, db)
+    snapshot = latest_season_analytics.get((kind, season_id))
+    up_to_date = snapshot is not None and snapshot.version == season_version
+    if snapshot is None or up_to_date or not recompute_queue.is_pending(season_id):
+        snapshot = await compute_season_analytics(kind, season_id, season_version)
+        up_to_date = True
+    return snapshot.payload, SeasonDataFreshnessResponseData(
+        up_to_date=up_to_date,
+        computed_at=snapshot.computed_at,
+        recompute_status=recompute_queue.state(season_id).status
+    )
+
+async def rebuild_season_analytics(season_id: int):
+    async with async_session() as db:
+        season_version = await get_season_version(season_id, db)
+        await prop_target_indexes.get(season_id, season_version, db)
+    for kind in SEASON_ANALYTICS_LOADERS:
+        await compute_season_analytics(kind, season_id, season_version)
+
+recompute_queue.register("season_analytics", rebuild_season_analytics)
+
+async def compact_changes(season_id: int):
+    async with write_session() as db:
+        await compact_season_changes(season_id, db)
+
+recompute_queue.register("season_changes", compact_changes)
 
 @router.get("{season_id}/time_series", operation_id="get_season_time_series", response_model=GetSeasonTimeSeriesResponseData)
 async def get_season_time_series(
@@ -180,6 +455,69 @@ async def get_season_time_series(
     user: User = Depends(manager),
     db: AsyncSession = Depends(get_db)
 ) -> GetSeasonTimeSeriesResponseData | HTTPException:
+    payload, freshness = await get_season_analytics("time_series", season_id, db)
+    return GetSeasonTimeSeriesResponseData.model_validate({**payload, "freshness": freshness})
+
+
+class GetSeasonDashboardResponseData(BaseModel):
+    season: GetGamblingSeasonResponseData
+    open_parlays: GetSeasonParlaysResponseData
+    recent_closed_parlays: GetSeasonParlaysResponseData
+    gambler_performances: GetSeasonGamblerPerformancesResponseData
+
+T = TypeVar("T")
+
+async def in_new_session(load: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    async with async_session() as db:
+        return await load(db)
+
+@router.get("/{season_id}/dashboard", operation_id="get_season_dashboard", response_model=GetSeasonDashboardResponseData)
+async def get_season_dashboard(
+    season_id: int,
+    open_limit: int = Query(20, ge=1, le=100, description="The number of open parlays to return"),
+    closed_limit: int = Query(5, ge=1, le=100, description="The number of most recently closed parlays to return"),
+    user: User = Depends(manager)
+) -> GetSeasonDashboardResponseData | HTTPException:
+    # Everything the client loads when opening a season, checked once up front and then
+    # loaded concurrently, each part on its own pooled session
+    if season_id not in {g.gambling_season_id for g in user.gamblers}:
+        raise HTTPException(status_code=403, detail="User is not a gambler in gambling season")
+
+    season, open_parlays, recent_closed_parlays, (performances, freshness) = await asyncio.gather(
+        in_new_session(lambda db: load_gambling_season(season_id, user, db)),
+        in_new_session(lambda db: load_season_parlays(season_id, db, open_limit, 0, ParlayState.OPEN, GetSeasonParlaysSortParam.ASC)),
+        in_new_session(lambda db: load_season_parlays(season_id, db, closed_limit, 0, ParlayState.CLOSED, GetSeasonParlaysSortParam.DESC)),
+        in_new_session(lambda db: get_season_analytics("gambler_performances", season_id, db))
+    )
+    return GetSeasonDashboardResponseData(
+        season=season,
+        open_parlays=open_parlays,
+        recent_closed_parlays=recent_closed_parlays,
+        gambler_performances=GetSeasonGamblerPerformancesResponseData.model_validate({**performances, "freshness": freshness})
+    )
+
+
+class GetSeasonProjectedStandingsResponseData(BaseModel):
+    simulations: int
+    remaining_parlays: int
+    standings: dict[int, ProjectedGamblerStanding]
+
+@router.get("/{season_id}/projected_standings", operation_id="get_season_projected_standings", response_model=GetSeasonProjectedStandingsResponseData)
+async def get_season_projected_standings(
+    season_id: int,
+    remaining_parlays: int = Query(ge=0, description="Number of parlays still to be played this season"),
+    simulations: int = Query(5000, ge=1, le=100000, description="Number of seasons to simulate"),
+    seed: int | None = Query(None, description="Seed for a reproducible projection"),
+    user: User = Depends(manager),
+    db: AsyncSession = Depends(get_db)
+) -> GetSeasonProjectedStandingsResponseData | HTTPException:
+    if season_id not in {g.gambling_season_id for g in user.gamblers}:
+        raise HTTPException(status_code=403, detail="User is not a gambler in gambling season")
+
+    # numpy is only needed here, so it's imported on first use instead of at startup
+    import numpy as np
+    from services.standings_projection import ProjectionInputs, current_corrected_scores, simulate_standings_chunk, summarize_projection
+
     gambling_season = (await db.execute(
         select(GamblingSeasonModel)
         .where(GamblingSeasonModel.id == season_id)
@@ -187,15 +525,78 @@ async def get_season_time_series(
             selectinload(GamblingSeasonModel.gamblers)
         )
     )).scalar_one()
-    parlays = (
-        await db.execute(
-            add_selects_to_parlay_query(select(Parlay).where(Parlay.gambling_season_id == season_id))
+    score_corrector_class = get_season_score_corrector_class(gambling_season.year)
+
+    gambler_ids = [g.id for g in gambling_season.gamblers]
+    calculators = await load_season_calculators(gambler_ids, season_id, db)
+    closed_parlay_count = (await db.execute(
+        select(func.count(Parlay.id))
+        .where(
+            Parlay.gambling_season_id == season_id,
+            Parlay.state == ParlayState.CLOSED,
+            Parlay.result.is_not(None)
         )
-    ).scalars().all()
+    )).scalar_one()
 
-    score_corrector_class = get_season_score_corrector_class(gambling_season.year)
-    # parlays = list(parlays[:5])
-    time_series = TimeSeriesCalculator([g.id for g in gambling_season.gamblers], list(parlays), score_corrector_class)
-    return GetSeasonTimeSeriesResponseData(
-        time_series=time_series.create_time_series()
-    )
\ No newline at end of file
+    inputs = ProjectionInputs.from_calculators(calculators, score_corrector_class, closed_parlay_count, remaining_parlays)
+    chunk_count = min(simulations, metrics_executor.max_workers)
+    chunk_sizes = [simulations // chunk_count + (1 if i < simulations % chunk_count else 0) for i in range(chunk_count)]
+    chunk_seeds = np.random.SeedSequence(seed).spawn(chunk_count)
+    chunks = await asyncio.gather(*[
+        # Sized by simulated picks: a projection's cost barely depends on the season so
+        # far, so only trivial ones stay on the event loop
+        metrics_executor.run(simulate_standings_chunk, inputs, chunk_size, chunk_seed, size=chunk_size * remaining_parlays * len(gambler_ids))
+        for chunk_size, chunk_seed in zip(chunk_sizes, chunk_seeds)
+    ])
+
+    return GetSeasonProjectedStandingsResponseData(
+        simulations=simulations,
+        remaining_parlays=remaining_parlays,
+        standings=summarize_projection(inputs, current_corrected_scores(calculators, score_corrector_class), chunks)
+    )
+
+
+class PropTargetLeaderboardEl(BaseModel):
+    prop_bet_target_id: int
+    name: str
+    total: int
+    wins: int
+    losses: int
+    bozos: int
+    pushes: int
+    voids: int
+    win_rate: float | None
+
+class GetSeasonPropTargetLeaderboardResponseData(BaseModel):
+    targets: list[PropTargetLeaderboardEl]
+
+@router.get("/{season_id}/prop_target_leaderboard", operation_id="get_season_prop_target_leaderboard", response_model=GetSeasonPropTargetLeaderboardResponseData)
+async def get_season_prop_target_leaderboard(
+    season_id: int,
+    sort: PropTargetSortKey = Query(PropTargetSortKey.VOLUME, description="Stat to rank prop bet targets by"),
+    limit: int = Query(10, ge=1, le=100, description="The number of targets to return"),
+    min_picks: int = Query(1, ge=1, description="Only rank targets picked at least this many times"),
+    ascending: bool = Query(False, description="Return the lowest ranked targets instead"),
+    user: User = Depends(manager),
+    db: AsyncSession = Depends(get_db)
+) -> GetSeasonPropTargetLeaderboardResponseData | HTTPException:
+    if season_id not in {g.gambling_season_id for g in user.gamblers}:
+        raise HTTPException(status_code=403, detail="User is not a gambler in gambling season")
+
+    season_version = await get_season_version(season_id, db)
+    index = await prop_target_indexes.get(season_id, season_version, db)
+    return GetSeasonPropTargetLeaderboardResponseData(
+        targets=[
+            PropTargetLeaderboardEl(
+                prop_bet_target_id=t.prop_bet_target_id,
+                name=t.name,
+                total=t.total,
+                wins=t.wins,
+                losses=t.losses,
+                bozos=t.bozos,
+                pushes=t.pushes,
+                voids=t.voids,
+                win_rate=t.win_rate()
+            ) for t in index.top(sort, limit, min_picks=min_picks, ascending=ascending)
+        ]
+    )
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.recompute_queue import recompute_queue
+from utils.request_metrics import request_metrics
+from .common import prop_bet_target_ids
+from .gambling_seasons import season_analytics_cache
+from .users import completed_season_partials_cache
+
+# Scraped by Prometheus, which can't log in, so this router has no auth dependency
+router = APIRouter(tags=["Metrics"])
+
+def cache_stats():
+    for cache_name, cache in (("season_analytics", season_analytics_cache), ("completed_season_partials", completed_season_partials_cache)):
+        labels = f'cache="{cache_name}"'
+        yield "cache_hits_total", labels, cache.stats.hits
+        yield "cache_misses_total", labels, cache.stats.misses
+        yield "cache_coalesced_total", labels, cache.stats.coalesced
+        yield "cache_evictions_total", labels, cache.stats.evictions
+        yield "cache_entries", labels, len(cache)
+    yield "cache_entries", 'cache="prop_bet_target_ids"', len(prop_bet_target_ids)
+
+def recompute_queue_stats():
+    stats = recompute_queue.stats
+    yield "season_recompute_requested_total", "", stats.requested
+    yield "season_recompute_coalesced_total", "", stats.coalesced
+    yield "season_recompute_completed_total", "", stats.completed
+    yield "season_recompute_retried_total", "", stats.retried
+    yield "season_recompute_failed_total", "", stats.failed
+    yield "season_recompute_queued", "", recompute_queue.queued
+    yield "season_recompute_running", "", recompute_queue.running
+
+request_metrics.add_collector(cache_stats)
+request_metrics.add_collector(recompute_queue_stats)
+
+@router.get("/metrics", operation_id="get_metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
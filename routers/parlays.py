@@ -1,7 +1,6 @@
-from curses.ascii import HT
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
@@ -10,9 +9,10 @@ from database import get_db
 from models.constants import ParlayResult, ParlayState, SlateType, PropBetDirection, SauceFactor
 from models.db import Parlay, Pick, PickVeto, User, PropBetType
 
-from .common import ParlayResponseData,PropBetTargetRequestData, get_or_create_prop_bet_target, check_user_access_to_parlay, check_gambler_access_to_season, check_user_is_gambler, query_parlay_with_selects, update_veto_approval_status, check_season_in_progress
+from .common import ParlayResponseData, ParlaySummaryResponseData, PropBetTargetRequestData, get_or_create_prop_bet_target_ids, check_user_access_to_parlay, check_gambler_access_to_season, check_user_is_gambler, query_parlay_with_selects, update_veto_approval_status, check_season_in_progress, publish_season_change, check_if_match, parlay_etag
 from .auth import manager
 from utils.parlays import finalize_parlay_results as finalize_parlay_results_helper
+from services.recompute_queue import recompute_queue
 
 router = APIRouter(
     prefix="/parlays", 
@@ -20,13 +20,84 @@ router = APIRouter(
     tags=["Parlays"]
 )
 
+class SearchParlaysResponseData(BaseModel):
+    parlays: list[ParlaySummaryResponseData]
+    # Pass back as after for the next page, None on the last one
+    next_cursor: str | None
+
+def parse_search_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        competition_date, parlay_id = cursor.split("_")
+        return date.fromisoformat(competition_date), int(parlay_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor {cursor}")
+
+# Declared before /{parlay_id} so "search" isn't taken for a parlay id
+@router.get("/search", operation_id="search_parlays", response_model=SearchParlaysResponseData)
+async def search_parlays(
+    gambling_season_id: int,
+    owner_id: int | None = Query(None, description="Gambler who owns the parlay"),
+    gambler_id: int | None = Query(None, description="Gambler with a pick in the parlay"),
+    prop_bet_target_id: int | None = Query(None, description="Target of a pick in the parlay"),
+    prop_type: PropBetType | None = Query(None, description="Prop type of a pick in the parlay"),
+    slate_type: SlateType | None = Query(None),
+    from_date: date | None = Query(None, description="Earliest competition date, inclusive"),
+    to_date: date | None = Query(None, description="Latest competition date, inclusive"),
+    result: ParlayResult | None = Query(None),
+    after: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="The number of results to return"),
+    user: User = Depends(manager),
+    db: AsyncSession = Depends(get_db)
+) -> SearchParlaysResponseData | HTTPException:
+    # Newest first, paged on (competition_date, id) so pages stay stable while parlays
+    # are added. Every filter runs within the season on one of the composite indexes
+    # on parlays, with the pick filters going through the ones on picks.
+    if gambling_season_id not in {g.gambling_season_id for g in user.gamblers}:
+        raise HTTPException(status_code=403, detail="User is not a gambler in gambling season")
+
+    query = select(Parlay).where(Parlay.gambling_season_id == gambling_season_id)
+    if owner_id is not None:
+        query = query.where(Parlay.owner_id == owner_id)
+    if slate_type is not None:
+        query = query.where(Parlay.slate_type == slate_type)
+    if from_date is not None:
+        query = query.where(Parlay.competition_date >= from_date)
+    if to_date is not None:
+        query = query.where(Parlay.competition_date <= to_date)
+    if result is not None:
+        query = query.where(Parlay.result == result)
+
+    # All the pick filters have to match the same pick
+    pick_filters = []
+    if gambler_id is not None:
+        pick_filters.append(Pick.gambler_id == gambler_id)
+    if prop_bet_target_id is not None:
+        pick_filters.append(Pick.prop_bet_target_id == prop_bet_target_id)
+    if prop_type is not None:
+        pick_filters.append(Pick.prop_type == prop_type)
+    if pick_filters:
+        query = query.where(Parlay.id.in_(select(Pick.parlay_id).where(*pick_filters)))
+
+    if after is not None:
+        query = query.where(tuple_(Parlay.competition_date, Parlay.id) < parse_search_cursor(after))
+
+    parlays = (await db.execute(
+        query.order_by(Parlay.competition_date.desc(), Parlay.id.desc()).limit(limit + 1)
+    )).scalars().all()
+    page = parlays[:limit]
+    return SearchParlaysResponseData(
+        parlays=[ParlaySummaryResponseData.from_model(p) for p in page],
+        next_cursor=f"{page[-1].competition_date.isoformat()}_{page[-1].id}" if len(parlays) > limit else None
+    )
+
 class GetParlayResponseData(BaseModel):
     parlay: ParlayResponseData
 
 @router.get("/{parlay_id}", operation_id="get_parlay", response_model=GetParlayResponseData)
-async def get_parlay(parlay_id: int, db: AsyncSession=Depends(get_db), user: User = Depends(manager)):
+async def get_parlay(parlay_id: int, response: Response, db: AsyncSession=Depends(get_db), user: User = Depends(manager)):
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
     await check_user_access_to_parlay(user, parlay, db)
+    response.headers["ETag"] = parlay_etag(parlay)
 
     return GetParlayResponseData(
         parlay=ParlayResponseData.from_model(parlay)
@@ -69,6 +140,7 @@ async def create_parlay(
     )
     db.add(parlay)
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db)
     await db.refresh(parlay)
     response_parlay = (await query_parlay_with_selects(parlay.id, db)).scalar_one()
     return CreateParlayResponseData(
@@ -86,8 +158,9 @@ class UpdateParlayResponseData(BaseModel):
     parlay: ParlayResponseData
 
 @router.patch("/", operation_id="update_parlay", response_model=UpdateParlayResponseData)
-async def update_parlay(body: UpdateParlayRequestData, db: AsyncSession = Depends(get_db)) -> UpdateParlayResponseData:
+async def update_parlay(body: UpdateParlayRequestData, if_match: str | None = Header(None), db: AsyncSession = Depends(get_db)) -> UpdateParlayResponseData:
     parlay = (await query_parlay_with_selects(body.parlay_id, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay))
     await check_season_in_progress(parlay.gambling_season_id, db)
     updated = False
     if body.competition_date:
@@ -105,6 +178,7 @@ async def update_parlay(body: UpdateParlayRequestData, db: AsyncSession = Depend
     
     if updated:
         await db.commit()
+        await publish_season_change(parlay.gambling_season_id, db)
         parlay = (await query_parlay_with_selects(body.parlay_id, db)).scalar_one()
     
     return UpdateParlayResponseData(
@@ -117,14 +191,16 @@ class ClaimParlayRequestData(BaseModel):
 class ClaimParlayResponseData(BaseModel): ...
 
 @router.post("/{parlay_id}/claim", operation_id="claim_parlay", response_model=ClaimParlayResponseData)
-async def claim_parlay(parlay_id: int, body: ClaimParlayRequestData, db: AsyncSession = Depends(get_db), user: User = Depends(manager)):
+async def claim_parlay(parlay_id: int, body: ClaimParlayRequestData, if_match: str | None = Header(None), db: AsyncSession = Depends(get_db), user: User = Depends(manager)):
     await check_user_is_gambler(user, body.gambler_id, db)
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay))
     await check_season_in_progress(parlay.gambling_season_id, db)
     await check_user_access_to_parlay(user, parlay, db)
 
     parlay.owner_id = body.gambler_id
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db)
     return ClaimParlayResponseData()
 
 
@@ -142,11 +218,10 @@ class LockParlayRequestData(BaseModel):
 class LockParlayResponseData(BaseModel):
     parlay: ParlayResponseData
 
-async def apply_pick_overrides(pick: Pick, override: PickOverrideRequestData, db: AsyncSession):
+def apply_pick_overrides(pick: Pick, override: PickOverrideRequestData, target_ids: dict[str, int]):
     change_applied = False
     if override.prop_bet_target is not None:
-        target = await get_or_create_prop_bet_target(override.prop_bet_target, db)
-        pick.prop_bet_target = target
+        pick.prop_bet_target_id = target_ids[override.prop_bet_target.identifier]
         change_applied = True
     if override.direction is not None:
         pick.direction = override.direction
@@ -161,8 +236,6 @@ async def apply_pick_overrides(pick: Pick, override: PickOverrideRequestData, db
         pick.prop_type = override.prop_type
         change_applied = True
     
-    if change_applied:
-        await db.commit()
     return change_applied
 
 class UnlockParlayRequestData(BaseModel): ...
@@ -173,10 +246,12 @@ class UnlockParlayResponseData(BaseModel):
 async def unlock_parlay(
     parlay_id: int, 
     body: UnlockParlayRequestData,
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(manager)
 ) -> UnlockParlayResponseData | HTTPException:
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay))
     await check_season_in_progress(parlay.gambling_season_id, db)
     if parlay.owner.user_id != user.id:
         raise HTTPException(status_code=403, detail="Only the owner can unlock a parlay!")
@@ -192,6 +267,7 @@ async def unlock_parlay(
 
     parlay.state = ParlayState.BUILDING
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db, parlay_id=parlay_id)
     db.expire_all()
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
     return UnlockParlayResponseData(
@@ -202,10 +278,12 @@ async def unlock_parlay(
 async def lock_parlay(
     parlay_id: int,
     body: LockParlayRequestData,
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(manager)
 ) -> LockParlayResponseData | HTTPException:
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay))
 
     await check_season_in_progress(parlay.gambling_season_id, db)
     await check_user_access_to_parlay(user, parlay, db)
@@ -216,16 +294,22 @@ async def lock_parlay(
     if parlay.state != ParlayState.BUILDING:
         raise HTTPException(status_code=500, detail="Cannot lock a parlay that is not in the BUILDING state!")
     
+    # Changed first so the parlay's version is checked at the first flush below,
+    # before any of its picks are touched
+    parlay.state = ParlayState.OPEN
+    override_targets = [o.prop_bet_target for o in body.pick_overrides.values() if o.prop_bet_target is not None]
+    target_ids = await get_or_create_prop_bet_target_ids(override_targets, db) if override_targets else {}
     for pick in parlay.picks:
         pick_override_data = body.pick_overrides.get(pick.id)
         if pick_override_data is not None and pick_override_data.pick_id == pick.id:
-            await apply_pick_overrides(pick, pick_override_data, db)
+            apply_pick_overrides(pick, pick_override_data, target_ids)
         
         for veto in pick.vetoes:
-            await update_veto_approval_status(veto, db, require_terminal_status=True)
+            update_veto_approval_status(veto, parlay.gambling_season, require_terminal_status=True)
         
-    parlay.state = ParlayState.OPEN
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db, parlay_id=parlay_id)
+    db.expire_all()
 
     refreshed_parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
     return LockParlayResponseData(
@@ -273,11 +357,13 @@ class CloseParlayResponseData(BaseModel):
 async def close_parlay(
     parlay_id: int,
     body: CloseParlayRequestData,
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(manager)
 ) -> CloseParlayResponseData | HTTPException:
     
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay))
     await check_season_in_progress(parlay.gambling_season_id, db)
     if parlay.owner.user_id != user.id:
         raise HTTPException(status_code=403, detail="Only a parlay owner can close a parlay!")
@@ -292,6 +378,8 @@ async def close_parlay(
     parlay.result = body.parlay_result
     parlay.state = ParlayState.CLOSED
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db, parlay_id=parlay_id)
+    recompute_queue.enqueue(parlay.gambling_season_id)
     db.expire_all()
 
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
@@ -309,9 +397,11 @@ async def reopen_parlay(
     parlay_id: int,
     body: ReopenParlayRequestData,
     user: User = Depends(manager),
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db)
 ) -> ReopenParlayResponseData | HTTPException:
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay))
     await check_season_in_progress(parlay.gambling_season_id, db)
     if parlay.owner.user_id != user.id:
         raise HTTPException(status_code=403, detail="Only the owner can reopen a parlay!")
@@ -323,6 +413,8 @@ async def reopen_parlay(
 
     parlay.state = ParlayState.OPEN
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db, parlay_id=parlay_id)
+    recompute_queue.enqueue(parlay.gambling_season_id)
     db.expire_all()
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
     return ReopenParlayResponseData(
@@ -336,9 +428,11 @@ class DeleteParlayResponseData(BaseModel):
 async def delete_parlay(
     parlay_id: int,
     user: User = Depends(manager),
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db)
 ) -> DeleteParlayResponseData | HTTPException:
     parlay = (await query_parlay_with_selects(parlay_id, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay))
 
     await check_season_in_progress(parlay.gambling_season_id, db)
     await check_user_access_to_parlay(user, parlay, db)
@@ -348,6 +442,7 @@ async def delete_parlay(
     
     await db.delete(parlay)
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db)
     return DeleteParlayResponseData(
         success=True
     )
@@ -362,11 +457,13 @@ class SwapParlayOrderResponseData(BaseModel):
 @router.post("/swap_order", operation_id="swap_parlay_order", response_model=SwapParlayOrderResponseData)
 async def swap_parlay_order(
     body: SwapParlayOrderRequestData,
+    if_match: str | None = Header(None),
     user: User = Depends(manager),
     db: AsyncSession = Depends(get_db)
 ) -> SwapParlayOrderResponseData | HTTPException:
     parlay_1 = (await query_parlay_with_selects(body.parlay_id_1, db)).scalar_one()
     parlay_2 = (await query_parlay_with_selects(body.parlay_id_2, db)).scalar_one()
+    check_if_match(if_match, parlay_etag(parlay_1), parlay_etag(parlay_2))
 
     await check_season_in_progress(parlay_1.gambling_season_id, db)
     await check_user_access_to_parlay(user, parlay_1, db)
@@ -377,6 +474,7 @@ async def swap_parlay_order(
     
     parlay_1.order, parlay_2.order = parlay_2.order, parlay_1.order
     await db.commit()
+    await publish_season_change(parlay_1.gambling_season_id, db)
     return SwapParlayOrderResponseData(
         success=True
     )
\ No newline at end of file
@@ -1,6 +1,6 @@
 from enum import StrEnum
 from typing import cast
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,6 +16,7 @@ from models import (
     ParlayState,
     Parlay,
     PickResult,
+    PickVeto,
     VetoResult,
     VetoApprovalStatus
 )
@@ -24,13 +25,21 @@ from .auth import manager
 from .common import (
     PickResponseData,
     PropBetTargetRequestData,
-    get_or_create_prop_bet_target,
+    get_or_create_prop_bet_target_id,
+    get_or_create_prop_bet_target_ids,
     map_pick_result_to_veto_result,
     query_pick_with_selects,
     check_user_access_to_parlay,
     check_season_in_progress,
-    query_parlay_with_selects
+    query_parlay_with_selects,
+    add_selects_to_parlay_query,
+    publish_season_change,
+    check_if_match,
+    pick_etag,
+    bump_parlay_version
 )
+from services.prop_target_search import prop_target_search
+from services.recompute_queue import recompute_queue
 
 router = APIRouter(
     prefix="/picks", 
@@ -38,7 +47,7 @@ router = APIRouter(
     tags=["Picks"]
 )
 
-async def user_can_edit_picks(parlay: Parlay, user: User):
+def user_can_edit_picks(parlay: Parlay, user: User):
     return parlay.state == ParlayState.BUILDING or parlay.owner.user_id == user.id
 
 def user_can_override_picks(parlay: Parlay, user: User):
@@ -73,11 +82,11 @@ async def create_pick(
 
     await check_user_access_to_parlay(user, parlay, db)
 
-    target = await get_or_create_prop_bet_target(body.target, db)
+    target_id = await get_or_create_prop_bet_target_id(body.target, db)
 
     pick = Pick(
         gambler_id=body.gambler_id,
-        prop_bet_target_id=target.id,
+        prop_bet_target_id=target_id,
         parlay_id=body.parlay_id,
         line=body.line,
         direction=body.direction,
@@ -87,14 +96,81 @@ async def create_pick(
     )
     db.add(pick)
     await db.commit()
-    await db.refresh(pick)
-    
+    prop_target_search.record_pick(parlay.gambling_season_id, target_id)
+    await publish_season_change(parlay.gambling_season_id, db)
+
     pick = (await query_pick_with_selects(pick.id, db)).scalar_one()
     
     return CreatePickResponseData(
         pick=PickResponseData.from_model(pick)
     )
 
+class CreatePicksRequestData(BaseModel):
+    picks: list[CreatePickRequestData]
+
+class CreatePicksResponseData(BaseModel):
+    picks: list[PickResponseData]
+
+@router.post("/bulk", operation_id="create_picks", response_model=CreatePicksResponseData)
+async def create_picks(
+    body: CreatePicksRequestData,
+    user: User = Depends(manager),
+    db: AsyncSession = Depends(get_db)
+) -> CreatePicksResponseData | HTTPException:
+    # Every parlay is loaded in one query, however many the picks are spread over
+    parlay_ids = {p.parlay_id for p in body.picks}
+    parlays: dict[int, Parlay] = {
+        parlay.id: parlay for parlay in (await db.execute(
+            add_selects_to_parlay_query(select(Parlay).where(Parlay.id.in_(parlay_ids)))
+        )).scalars().all()
+    }
+    if len(parlays) != len(parlay_ids):
+        raise HTTPException(status_code=404, detail="Parlay not found")
+    for gambling_season_id in {parlay.gambling_season_id for parlay in parlays.values()}:
+        await check_season_in_progress(gambling_season_id, db)
+
+    for parlay in parlays.values():
+        if not user_can_edit_picks(parlay, user):
+            raise HTTPException(status_code=500, detail="After a parlay has been locked in, only the owner can change picks!")
+
+        await check_user_access_to_parlay(user, parlay, db)
+
+    # Every target is resolved in one statement and every pick lands in one commit
+    target_ids = await get_or_create_prop_bet_target_ids([p.target for p in body.picks], db)
+    picks = [
+        Pick(
+            gambler_id=p.gambler_id,
+            prop_bet_target_id=target_ids[p.target.identifier],
+            parlay_id=p.parlay_id,
+            line=p.line,
+            direction=p.direction,
+            sauce_factor=p.sauce_factor,
+            prop_type=p.prop_type,
+            corrected_line=p.corrected_line
+        ) for p in body.picks
+    ]
+    db.add_all(picks)
+    await db.commit()
+    for pick in picks:
+        prop_target_search.record_pick(parlays[pick.parlay_id].gambling_season_id, pick.prop_bet_target_id)
+    for gambling_season_id in {parlay.gambling_season_id for parlay in parlays.values()}:
+        await publish_season_change(gambling_season_id, db)
+
+    created_picks = {
+        pick.id: pick for pick in (await db.execute(
+            select(Pick).where(Pick.id.in_([pick.id for pick in picks]))
+            .options(
+                selectinload(Pick.vetoes)
+                .selectinload(PickVeto.votes)
+            ).options(
+                selectinload(Pick.prop_bet_target)
+            )
+        )).scalars().all()
+    }
+    return CreatePicksResponseData(
+        picks=[PickResponseData.from_model(created_picks[pick.id]) for pick in picks]
+    )
+
 class UpdatePickRequestData(BaseModel):
     target: PropBetTargetRequestData | None = None
     prop_type: PropBetType | None = None
@@ -109,10 +185,12 @@ async def update_pick(
     pick_id: int,
     body: UpdatePickRequestData, 
     user: User = Depends(manager), 
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db)
 ) -> UpdatePickResponseData | HTTPException:
 
     pick = (await query_pick_with_selects(pick_id, db)).scalar_one()
+    check_if_match(if_match, pick_etag(pick))
     parlay = (await query_parlay_with_selects(pick.parlay_id, db)).scalar_one()
 
     await check_season_in_progress(parlay.gambling_season_id, db)
@@ -125,7 +203,7 @@ async def update_pick(
     if pick.corrected_line:
         raise HTTPException(status_code=500, detail="Cannot update a pick after an override has been applied!")
 
-    target_id = (await get_or_create_prop_bet_target(body.target, db)).id if body.target else None
+    target_id = await get_or_create_prop_bet_target_id(body.target, db) if body.target else None
     delete_veto = False
     if target_id:
         pick.prop_bet_target_id = target_id
@@ -145,7 +223,9 @@ async def update_pick(
         for veto in pick.vetoes:
             await db.delete(veto)
     
+    bump_parlay_version(parlay)
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db, parlay_id=parlay.id)
     await db.refresh(pick)
 
     pick = (await query_pick_with_selects(pick.id, db)).scalar_one()
@@ -164,10 +244,12 @@ class OverridePickResponseData(BaseModel):
 async def apply_pick_override(
     pick_id: int,
     body: OverridePickRequestData,
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(manager)
 ) -> OverridePickResponseData | HTTPException:
     pick = (await query_pick_with_selects(pick_id, db)).scalar_one()
+    check_if_match(if_match, pick_etag(pick))
     parlay = (await query_parlay_with_selects(pick.parlay_id, db)).scalar_one()
 
     await check_season_in_progress(parlay.gambling_season_id, db)
@@ -177,7 +259,7 @@ async def apply_pick_override(
             raise HTTPException(status_code=500, detail="Only the parlay owner can override picks!")
     
     if body.target:
-        pick.prop_bet_target_id = (await get_or_create_prop_bet_target(body.target, db)).id
+        pick.prop_bet_target_id = await get_or_create_prop_bet_target_id(body.target, db)
     if body.prop_type:
         pick.prop_type = body.prop_type
     if body.direction:
@@ -190,7 +272,9 @@ async def apply_pick_override(
         for veto in pick.vetoes:
             await db.delete(veto)
     
+    bump_parlay_version(parlay)
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db, parlay_id=parlay.id)
     pick = (await query_pick_with_selects(pick.id, db)).scalar_one()
     return OverridePickResponseData(
         pick=PickResponseData.from_model(pick)
@@ -212,11 +296,13 @@ class UpdatePickResultResponseData(BaseModel):
 async def update_pick_result(
     pick_id: int, 
     body: UpdatePickResultRequestData, 
+    if_match: str | None = Header(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(manager)
 ) -> UpdatePickResultResponseData | HTTPException:
     
     pick = (await query_pick_with_selects(pick_id, db)).scalar_one()
+    check_if_match(if_match, pick_etag(pick))
     parlay = (await query_parlay_with_selects(pick.parlay_id, db)).scalar_one()
 
     await check_season_in_progress(parlay.gambling_season_id, db)
@@ -236,6 +322,8 @@ async def update_pick_result(
             veto.result = map_pick_result_to_veto_result(mapped_result)
     
     await db.commit()
+    await publish_season_change(parlay.gambling_season_id, db, parlay_id=parlay.id)
+    recompute_queue.enqueue(parlay.gambling_season_id)
     pick = (await query_pick_with_selects(pick_id, db)).scalar_one()
     return UpdatePickResultResponseData(
         pick = PickResponseData.from_model(pick)
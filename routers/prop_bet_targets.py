@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from models import User
+from .auth import manager
+
+from services.prop_target_search import prop_target_search
+
+router = APIRouter(
+    prefix="/prop_bet_targets",
+    dependencies=[Depends(manager)],
+    tags=["PropBetTargets"]
+)
+
+class SearchPropBetTargetEl(BaseModel):
+    id: int
+    identifier: str
+    player_name: str | None
+    team_name: str
+    season_pick_count: int
+
+class SearchPropBetTargetsResponseData(BaseModel):
+    targets: list[SearchPropBetTargetEl]
+
+@router.get("/search", operation_id="search_prop_bet_targets", response_model=SearchPropBetTargetsResponseData)
+async def search_prop_bet_targets(
+    q: str = Query(min_length=1, description="Prefix of any word in the player or team name"),
+    season_id: int | None = Query(None, description="Rank matches by how often they were picked in this season"),
+    limit: int = Query(10, ge=1, le=50, description="The number of results to return"),
+    user: User = Depends(manager),
+    db: AsyncSession = Depends(get_db)
+) -> SearchPropBetTargetsResponseData | HTTPException:
+    if season_id is not None and not any(g.gambling_season_id == season_id for g in user.gamblers):
+        raise HTTPException(status_code=403, detail="User is not a gambler in gambling season")
+
+    results = await prop_target_search.search(q, season_id, limit, db)
+    return SearchPropBetTargetsResponseData(
+        targets=[
+            SearchPropBetTargetEl(
+                id=target.id,
+                identifier=target.identifier,
+                player_name=target.player_name,
+                team_name=target.team_name,
+                season_pick_count=count
+            ) for target, count in results
+        ]
+    )
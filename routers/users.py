@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db, async_session
+from models import User, Gambler, GamblingSeasonState
+from .auth import manager
+from .common import get_season_version
+
+from services.invalidation import InvalidationMessage, invalidation_bus
+from services.metric_calculator import GamblerMetricsCalculator, GamblerAdvancedMetrics
+from services.season_loader import load_season_calculators
+from utils.env_vars import EnvVarName, load_env_var_or_default
+from utils.single_flight import SingleFlightCache
+
+router = APIRouter(
+    prefix="/users",
+    dependencies=[Depends(manager)],
+    tags=["Users"]
+)
+
+# Per-season counters for every gambler in a completed season. Completed seasons can
+# no longer change, so entries never expire and are only dropped by the LRU bound.
+completed_season_partials_cache: SingleFlightCache[tuple[int, str], dict[int, GamblerMetricsCalculator]] = SingleFlightCache(
+    max_entries=int(load_env_var_or_default(EnvVarName.CAREER_CACHE_MAX_ENTRIES, "64")),
+    ttl_s=float("inf")
+)
+
+def drop_stale_season_partials(message: InvalidationMessage):
+    # A version bump on a completed season means it was edited or reopened
+    if message.season_id is None:
+        completed_season_partials_cache.clear()
+    else:
+        completed_season_partials_cache.invalidate(lambda key: key[0] == message.season_id and key[1] != message.version)
+
+invalidation_bus.subscribe(drop_stale_season_partials)
+
+async def load_season_partial(season_id: int):
+    async with async_session() as db:
+        gambler_ids = (await db.execute(
+            select(Gambler.id).where(Gambler.gambling_season_id == season_id)
+        )).scalars().all()
+        return await load_season_calculators(list(gambler_ids), season_id, db)
+
+class CareerSeasonEl(BaseModel):
+    gambler_id: int
+    gambling_season_id: int
+    name: str
+    year: int
+    state: GamblingSeasonState
+
+class GetUserCareerResponseData(BaseModel):
+    seasons: list[CareerSeasonEl]
+    metrics: GamblerAdvancedMetrics
+
+@router.get("/me/career", operation_id="get_user_career", response_model=GetUserCareerResponseData)
+async def get_user_career(user: User = Depends(manager), db: AsyncSession = Depends(get_db)):
+    gamblers = sorted(user.gamblers, key=lambda g: (g.gambling_season.year, g.gambling_season.id))
+
+    career = GamblerMetricsCalculator()
+    for gambler in gamblers:
+        season = gambler.gambling_season
+        if season.state == GamblingSeasonState.COMPLETE:
+            season_version = await get_season_version(season.id, db)
+            partial = await completed_season_partials_cache.get_or_compute(
+                (season.id, season_version),
+                lambda season_id=season.id: load_season_partial(season_id)
+            )
+        else:
+            partial = await load_season_calculators([gambler.id], season.id, db)
+        career.merge(partial[gambler.id])
+
+    return GetUserCareerResponseData(
+        seasons=[
+            CareerSeasonEl(
+                gambler_id=g.id,
+                gambling_season_id=g.gambling_season.id,
+                name=g.gambling_season.name,
+                year=g.gambling_season.year,
+                state=g.gambling_season.state
+            ) for g in gamblers
+        ],
+        metrics=career.get_advanced_metrics()
+    )
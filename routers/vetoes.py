@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models import Pick, User, PickVeto, Parlay, VetoApprovalStatus, VetoVote, GamblingSeason
 from .auth import manager
-from .common import PickVetoResponseData, VetoVoteResponseData, check_user_access_to_parlay, check_user_is_gambler, query_veto_with_selects, update_veto_approval_status, query_pick_with_selects, check_season_in_progress
+from .common import PickVetoResponseData, VetoVoteResponseData, check_user_access_to_parlay, check_user_is_gambler, query_veto_with_selects, update_veto_approval_status, query_pick_with_selects, check_season_in_progress, publish_season_change
 
 
 router = APIRouter(
@@ -61,6 +61,7 @@ async def create_pick_veto(
     )
     db.add(veto)
     await db.commit()
+    await publish_season_change(pick.parlay.gambling_season_id, db)
     await db.refresh(veto)
     return CreatePickVetoResponseData(
         veto=PickVetoResponseData(
@@ -92,7 +93,7 @@ async def submit_veto_vote(
 
     veto = (await query_veto_with_selects(veto_id, db)).scalar_one()
 
-    await check_user_access_to_parlay(user, veto.pick.parlay_id, db)
+    await check_user_access_to_parlay(user, veto.pick.parlay, db)
     await check_season_in_progress(veto.pick.parlay.gambling_season_id, db)
 
     if veto.gambler_id == body.gambler_id:
@@ -102,24 +103,21 @@ async def submit_veto_vote(
     elif veto.approval_status != VetoApprovalStatus.PENDING:
         raise HTTPException(status_code=500, detail="This veto has already been approved or rejected")
     
-    vote = (await db.execute(
-        select(VetoVote).where(VetoVote.gambler_id == body.gambler_id, VetoVote.veto_id == veto_id)
-    )).scalar_one_or_none()
+    # The veto's votes are already loaded, and adding to them keeps them current for
+    # the approval check below without loading them again
+    vote = next((v for v in veto.votes if v.gambler_id == body.gambler_id), None)
 
     if vote:
         vote.affirmative = body.affirmative
     else:
         vote = VetoVote(
-            veto_id = veto_id,
             gambler_id = body.gambler_id,
             affirmative = body.affirmative
         )
-        db.add(vote)
+        veto.votes.append(vote)
+    update_veto_approval_status(veto, veto.pick.parlay.gambling_season, require_terminal_status=False)
     await db.commit()
-    await db.refresh(vote)
-    db.expire(veto)
-    veto = (await query_veto_with_selects(veto_id, db)).scalar_one()
-    await update_veto_approval_status(veto, db, require_terminal_status=False)
+    await publish_season_change(veto.pick.parlay.gambling_season_id, db)
     
     return SubmitVetoVoteResponseData(
         vote=VetoVoteResponseData.from_model(model=vote)
@@ -138,4 +136,5 @@ async def delete_veto(veto_id: int, db: AsyncSession = Depends(get_db), user: Us
     
     await db.delete(veto)
     await db.commit()
+    await publish_season_change(veto.pick.parlay.gambling_season_id, db)
     return DeleteVetoResponseData()
@@ -0,0 +1,71 @@
+from typing import *
+
+from pydantic import BaseModel
+
+from .metric_calculator import GamblerMetricsCalculator, GamblerAdvancedMetrics
+from .score_correctors.score_corrector import GamblerScoreCorrector
+from .season_performance_calculator import calc_corrected_score
+
+# Replays a season's final metrics under other score correctors. The metrics pass is
+# the expensive part, so it happens once per season and every corrector is then
+# evaluated against the same metrics.
+
+class GamblerBacktestResult(BaseModel):
+    gambler_id: int
+    baseline_score: float
+    baseline_rank: int
+    corrected_score: float
+    rank: int
+    score_delta: float
+    # Positive when the gambler moves up the standings
+    rank_change: int
+
+def corrected_scores(
+        metrics: dict[int, GamblerAdvancedMetrics],
+        score_corrector_class: type[GamblerScoreCorrector]
+    ) -> dict[int, float]:
+    score_corrector = score_corrector_class(metrics)
+    deductions = score_corrector.deductions()
+    augmentations = score_corrector.augmentations()
+    return {
+        gambler_id: calc_corrected_score(
+            gambler_metrics.overall.win_rate,
+            [c.adjustment for c in deductions.get(gambler_id, {}).values()]
+            + [c.adjustment for c in augmentations.get(gambler_id, {}).values()]
+        )
+        for gambler_id, gambler_metrics in metrics.items()
+    }
+
+def rank_scores(scores: dict[int, float]) -> dict[int, int]:
+    # Competition ranking: gamblers tied on score share the higher rank
+    return {
+        gambler_id: 1 + sum(1 for other in scores.values() if other > score)
+        for gambler_id, score in scores.items()
+    }
+
+def backtest_season(
+        calculators: dict[int, GamblerMetricsCalculator],
+        baseline_class: type[GamblerScoreCorrector],
+        score_corrector_classes: dict[str, type[GamblerScoreCorrector]]
+    ) -> dict[str, dict[int, GamblerBacktestResult]]:
+    metrics = {gambler_id: calculator.get_advanced_metrics() for gambler_id, calculator in calculators.items()}
+    baseline_scores = corrected_scores(metrics, baseline_class)
+    baseline_ranks = rank_scores(baseline_scores)
+
+    results: dict[str, dict[int, GamblerBacktestResult]] = {}
+    for name, score_corrector_class in score_corrector_classes.items():
+        scores = corrected_scores(metrics, score_corrector_class)
+        ranks = rank_scores(scores)
+        results[name] = {
+            gambler_id: GamblerBacktestResult(
+                gambler_id=gambler_id,
+                baseline_score=baseline_scores[gambler_id],
+                baseline_rank=baseline_ranks[gambler_id],
+                corrected_score=scores[gambler_id],
+                rank=ranks[gambler_id],
+                score_delta=round(scores[gambler_id] - baseline_scores[gambler_id], 4),
+                rank_change=baseline_ranks[gambler_id] - ranks[gambler_id]
+            )
+            for gambler_id in metrics
+        }
+    return results
@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+from typing import *
+
+from sqlalchemy import Connection, delete, event, func, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import ChangeEntityType, GamblingSeason, Parlay, Pick, PickVeto, SeasonChange, VetoVote
+from services.parlay_counters import refresh_parlay_counters
+
+# Append-only log of the parlays, picks, vetoes and votes changed in each season, so
+# clients can ask for what changed since the last sequence number they saw instead of
+# refetching the season. Rows are written by a flush hook in the same transaction as
+# the change, so every handler is covered without having to remember to call anything.
+# Each flush takes the next sequence number of every season it touches; the counter
+# row stays locked until commit, so within a season sequence order is commit order.
+
+@dataclass
+class PendingChange:
+    entity_type: ChangeEntityType
+    entity_id: int
+    deleted: bool
+    parlay_id: int | None = None
+    pick_id: int | None = None
+    veto_id: int | None = None
+    season_id: int | None = None
+
+def _loaded_values(session: Session, connection: Connection, model: type, column: Any, ids: set[int]) -> dict[int, int]:
+    # Reads the column from objects already in the session where possible and only
+    # queries for the rest. Expired attributes aren't touched, so nothing lazy loads.
+    values: dict[int, int] = {}
+    missing: set[int] = set()
+    for id in ids:
+        obj = session.identity_map.get(Session.identity_key(model, id))
+        value = inspect(obj).dict.get(column.key) if obj is not None else None
+        if value is None:
+            missing.add(id)
+        else:
+            values[id] = value
+    if missing:
+        values.update(connection.execute(select(model.id, column).where(model.id.in_(missing))).tuples().all())
+    return values
+
+def _pending_changes(session: Session) -> list[PendingChange]:
+    modified = [(obj, False) for obj in session.new]
+    modified += [(obj, False) for obj in session.dirty if session.is_modified(obj, include_collections=False)]
+    modified += [(obj, True) for obj in session.deleted]
+
+    changes: list[PendingChange] = []
+    for obj, deleted in modified:
+        match obj:
+            case Parlay():
+                changes.append(PendingChange(ChangeEntityType.PARLAY, obj.id, deleted, parlay_id=obj.id, season_id=obj.gambling_season_id))
+            case Pick():
+                changes.append(PendingChange(ChangeEntityType.PICK, obj.id, deleted, parlay_id=obj.parlay_id))
+                # A pick moved to another parlay changes the one it left too
+                for previous_parlay_id in inspect(obj).attrs.parlay_id.history.deleted:
+                    if previous_parlay_id is not None and previous_parlay_id != obj.parlay_id:
+                        changes.append(PendingChange(ChangeEntityType.PICK, obj.id, deleted, parlay_id=previous_parlay_id))
+            case PickVeto():
+                changes.append(PendingChange(ChangeEntityType.VETO, obj.id, deleted, pick_id=obj.pick_id))
+            case VetoVote():
+                changes.append(PendingChange(ChangeEntityType.VOTE, obj.id, deleted, veto_id=obj.veto_id))
+    return changes
+
+@event.listens_for(Session, "after_flush")
+def record_season_changes(session: Session, flush_context):
+    changes = _pending_changes(session)
+    if not changes:
+        return
+    connection = session.connection()
+
+    veto_pick_ids = _loaded_values(session, connection, PickVeto, PickVeto.pick_id, {c.veto_id for c in changes if c.veto_id is not None})
+    for change in changes:
+        if change.veto_id is not None:
+            change.pick_id = veto_pick_ids.get(change.veto_id)
+    pick_parlay_ids = _loaded_values(session, connection, Pick, Pick.parlay_id, {c.pick_id for c in changes if c.parlay_id is None and c.pick_id is not None})
+    for change in changes:
+        if change.parlay_id is None and change.pick_id is not None:
+            change.parlay_id = pick_parlay_ids.get(change.pick_id)
+    parlay_season_ids = _loaded_values(session, connection, Parlay, Parlay.gambling_season_id, {c.parlay_id for c in changes if c.season_id is None and c.parlay_id is not None})
+    for change in changes:
+        if change.season_id is None and change.parlay_id is not None:
+            change.season_id = parlay_season_ids.get(change.parlay_id)
+
+    # Votes only count towards a veto's approval status, which is a change to the veto
+    refresh_parlay_counters(session, connection, {
+        c.parlay_id for c in changes
+        if c.parlay_id is not None and c.entity_type in [ChangeEntityType.PICK, ChangeEntityType.VETO]
+    })
+
+    # Children deleted along with their parent can't be traced back any more, but the
+    # parent's own change already covers their parlay
+    by_season: dict[int, dict[tuple[ChangeEntityType, int, int], PendingChange]] = {}
+    for change in changes:
+        if change.season_id is not None and change.parlay_id is not None:
+            by_season.setdefault(change.season_id, {})[(change.entity_type, change.entity_id, change.parlay_id)] = change
+
+    rows: list[dict[str, Any]] = []
+    for season_id, season_changes in sorted(by_season.items()):
+        sequence = connection.execute(
+            update(GamblingSeason)
+            .where(GamblingSeason.id == season_id)
+            .values(change_sequence=GamblingSeason.change_sequence + 1, updated_at=GamblingSeason.updated_at)
+            .returning(GamblingSeason.change_sequence)
+        ).scalar_one()
+        rows += [
+            {
+                "gambling_season_id": season_id,
+                "sequence": sequence,
+                "entity_type": change.entity_type,
+                "entity_id": change.entity_id,
+                "parlay_id": change.parlay_id,
+                "deleted": change.deleted
+            } for change in season_changes.values()
+        ]
+    if rows:
+        connection.execute(insert(SeasonChange), rows)
+
+@dataclass
+class SeasonChangeBatch:
+    # The sequence number to poll from next
+    cursor: int
+    # Parlays changed after the requested cursor, oldest change first
+    parlay_ids: list[int]
+    has_more: bool
+
+async def load_season_changes(gambling_season_id: int, since: int, limit: int, db: AsyncSession) -> SeasonChangeBatch:
+    # Pages by whole sequence numbers so a transaction's changes are never split
+    sequences = (await db.execute(
+        select(SeasonChange.sequence)
+        .where(SeasonChange.gambling_season_id == gambling_season_id, SeasonChange.sequence > since)
+        .distinct()
+        .order_by(SeasonChange.sequence)
+        .limit(limit + 1)
+    )).scalars().all()
+    if not sequences:
+        return SeasonChangeBatch(cursor=since, parlay_ids=[], has_more=False)
+
+    cursor = sequences[min(limit, len(sequences)) - 1]
+    parlay_ids = (await db.execute(
+        select(SeasonChange.parlay_id)
+        .where(
+            SeasonChange.gambling_season_id == gambling_season_id,
+            SeasonChange.sequence > since,
+            SeasonChange.sequence <= cursor
+        )
+        .group_by(SeasonChange.parlay_id)
+        .order_by(func.max(SeasonChange.sequence))
+    )).scalars().all()
+    return SeasonChangeBatch(cursor=cursor, parlay_ids=list(parlay_ids), has_more=len(sequences) > limit)
+
+async def compact_season_changes(gambling_season_id: int, db: AsyncSession):
+    # Only the latest change of each entity matters to a client, whatever its cursor,
+    # so older ones are dropped. The log then holds at most one row per entity.
+    latest = (
+        select(func.max(SeasonChange.id))
+        .where(SeasonChange.gambling_season_id == gambling_season_id)
+        .group_by(SeasonChange.entity_type, SeasonChange.entity_id, SeasonChange.parlay_id)
+    )
+    await db.execute(
+        delete(SeasonChange)
+        .where(SeasonChange.gambling_season_id == gambling_season_id, SeasonChange.id.not_in(latest))
+    )
+    await db.commit()
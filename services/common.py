@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+from pydantic import BaseModel
+
 from models import Parlay, Pick, PickVeto, PickResult, VetoResult, PropBetType, SauceFactor, VetoApprovalStatus, ParlayState, PropBetDirection
 
 @dataclass
@@ -108,4 +110,17 @@ def get_gambler_picks_veto_pairs(gambler_id: int, sorted_parlays: list[Parlay])
         pv_pair = pick_veto_pair_from_parlay(gambler_id, parlay)
         if pv_pair:
             pick_veto_pairs.append(pv_pair)
-    return pick_veto_pairs
\ No newline at end of file
+    return pick_veto_pairs
+
+# Lives here rather than in standings_projection so routers can use it without
+# importing numpy at startup
+class ProjectedGamblerStanding(BaseModel):
+    gambler_id: int
+    current_corrected_score: float
+    mean_corrected_score: float
+    p10_corrected_score: float
+    p50_corrected_score: float
+    p90_corrected_score: float
+    expected_rank: float
+    # Index 0 is the probability of finishing first
+    rank_probabilities: list[float]
@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import StrEnum
+from typing import *
+
+from fastapi import HTTPException
+
+from utils.env_vars import EnvVarName, load_env_var_or_default
+
+T = TypeVar("T")
+
+class MetricsExecutorMode(StrEnum):
+    AUTO = "auto"
+    PROCESS = "process"
+    THREAD = "thread"
+    INLINE = "inline"
+
+def gil_disabled():
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+def process_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+# Runs CPU-bound metric computations off the event loop. Tasks must be module-level
+# functions that take and return picklable values (see services.records), since in
+# process mode they run in a worker process.
+class MetricsExecutor:
+
+    def __init__(
+            self,
+            mode: MetricsExecutorMode,
+            max_workers: int,
+            timeout_s: float,
+            max_pending: int,
+            inline_max_parlays: int
+        ) -> None:
+        if mode == MetricsExecutorMode.AUTO:
+            mode = MetricsExecutorMode.THREAD if gil_disabled() else MetricsExecutorMode.PROCESS
+        self.mode = mode
+        self.max_workers = max_workers
+        self.timeout_s = timeout_s
+        self.max_pending = max_pending
+        self.inline_max_parlays = inline_max_parlays
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            mode=MetricsExecutorMode(load_env_var_or_default(EnvVarName.METRICS_EXECUTOR, MetricsExecutorMode.AUTO)),
+            max_workers=int(load_env_var_or_default(EnvVarName.METRICS_EXECUTOR_WORKERS, str(min(4, os.cpu_count() or 1)))),
+            timeout_s=float(load_env_var_or_default(EnvVarName.METRICS_EXECUTOR_TIMEOUT_S, "30")),
+            max_pending=int(load_env_var_or_default(EnvVarName.METRICS_EXECUTOR_MAX_PENDING, "16")),
+            inline_max_parlays=int(load_env_var_or_default(EnvVarName.METRICS_INLINE_MAX_PARLAYS, "25"))
+        )
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == MetricsExecutorMode.THREAD:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="metrics")
+            else:
+                # Forking a process that's running an event loop and holds database
+                # connections copies both into every worker
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=process_context())
+        return self._executor
+
+    def _release(self, _: asyncio.Future):
+        self._pending -= 1
+
+    async def run(self, fn: Callable[..., T], *args: Any, size: int) -> T:
+        if self.mode == MetricsExecutorMode.INLINE or size <= self.inline_max_parlays:
+            return fn(*args)
+
+        if self._pending >= self.max_pending:
+            raise HTTPException(status_code=503, detail="Too many metric computations in progress, try again shortly!")
+
+        future = asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        # The slot is held until the worker finishes, even if the caller times out,
+        # so abandoned work still counts against the queue bound.
+        self._pending += 1
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_s)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Metric computation timed out!")
+
+    async def shutdown(self):
+        # Waits for running tasks so no worker outlives the app, without blocking
+        # the event loop while it does
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+metrics_executor = MetricsExecutor.from_env()
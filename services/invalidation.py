@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from dataclasses import asdict, dataclass, field
+from enum import StrEnum
+from typing import *
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models import CacheInvalidation
+from utils.env_vars import EnvVarName, load_env_var_or_default
+
+# Tells every worker that a season changed, so in-process caches keyed by season
+# can drop whatever was computed from an older version. Mutating handlers publish
+# after they commit; the message is applied to this worker's caches immediately and
+# fanned out to the other workers through the configured backend:
+#
+#   in_process  single worker, nothing leaves the process
+#   database    rows in cache_invalidations, polled by every worker (works on SQLite)
+#   postgres    LISTEN/NOTIFY on a dedicated asyncpg connection
+
+logger = logging.getLogger(__name__)
+
+class InvalidationBackendMode(StrEnum):
+    IN_PROCESS = "in_process"
+    DATABASE = "database"
+    POSTGRES = "postgres"
+
+@dataclass
+class InvalidationMessage:
+    # None means everything, e.g. after messages may have been missed
+    season_id: int | None
+    version: str | None
+    prop_bet_target_ids: list[int] = field(default_factory=list)
+    origin: str = ""
+
+Subscriber = Callable[[InvalidationMessage], None]
+# Opens a session for writing, see database.write_session
+WriteSessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+class InvalidationBackend:
+
+    async def start(self, bus: "InvalidationBus"):
+        pass
+
+    async def publish(self, message: InvalidationMessage):
+        pass
+
+    async def stop(self):
+        pass
+
+class InProcessInvalidationBackend(InvalidationBackend):
+    pass
+
+class DatabasePollingInvalidationBackend(InvalidationBackend):
+    # Only rows inserted after a worker starts are delivered to it. Rows are pruned
+    # once every worker has had ample time to see them.
+    #
+    # Ids are handed out when a row is inserted, not when it commits, so a row can
+    # become visible after rows with higher ids have already been read. Each poll
+    # therefore re-reads the last reorder_window ids and skips the ones it already
+    # delivered; a row is only missed if more than reorder_window later rows are read
+    # before it commits.
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        write_session_factory: WriteSessionFactory,
+        poll_interval_s: float,
+        retained_rows: int = 1000,
+        reorder_window: int = 100
+    ) -> None:
+        self.session_factory = session_factory
+        self.write_session_factory = write_session_factory
+        self.poll_interval_s = poll_interval_s
+        self.retained_rows = max(retained_rows, reorder_window)
+        self.reorder_window = reorder_window
+        self._last_id = 0
+        # Ids within reorder_window of _last_id that were already delivered
+        self._delivered: set[int] = set()
+        self._task: asyncio.Task | None = None
+
+    async def start(self, bus: "InvalidationBus"):
+        async with self.session_factory() as db:
+            self._last_id = (await db.execute(select(func.coalesce(func.max(CacheInvalidation.id), 0)))).scalar_one()
+            self._delivered = set((await db.execute(
+                select(CacheInvalidation.id).where(CacheInvalidation.id > self._last_id - self.reorder_window)
+            )).scalars())
+        self._task = asyncio.create_task(self._poll(bus))
+
+    async def publish(self, message: InvalidationMessage):
+        async with self.write_session_factory() as db:
+            db.add(CacheInvalidation(
+                season_id=message.season_id,
+                version=message.version,
+                prop_bet_target_ids=message.prop_bet_target_ids,
+                origin=message.origin
+            ))
+            await db.commit()
+
+    async def poll_once(self, bus: "InvalidationBus"):
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(CacheInvalidation)
+                .where(CacheInvalidation.id > self._last_id - self.reorder_window)
+                .order_by(CacheInvalidation.id)
+            )).scalars().all()
+        for row in rows:
+            if row.id in self._delivered:
+                continue
+            self._delivered.add(row.id)
+            self._last_id = max(self._last_id, row.id)
+            bus.receive(InvalidationMessage(
+                season_id=row.season_id,
+                version=row.version,
+                prop_bet_target_ids=list(row.prop_bet_target_ids or []),
+                origin=row.origin
+            ))
+        self._delivered = {id for id in self._delivered if id > self._last_id - self.reorder_window}
+
+    async def _poll(self, bus: "InvalidationBus"):
+        polls = 0
+        while True:
+            await asyncio.sleep(self.poll_interval_s)
+            try:
+                await self.poll_once(bus)
+                polls += 1
+                if polls % 60 == 0:
+                    async with self.write_session_factory() as db:
+                        await db.execute(delete(CacheInvalidation).where(CacheInvalidation.id <= self._last_id - self.retained_rows))
+                        await db.commit()
+            except Exception:
+                logger.exception("Polling cache invalidations failed")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+class PostgresNotifyInvalidationBackend(InvalidationBackend):
+    # Notifications sent while the listening connection is down are lost, so after a
+    # reconnect every worker cache is dropped.
+
+    def __init__(self, database_url: str, channel: str = "cache_invalidations", reconnect_delay_s: float = 1) -> None:
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self.reconnect_delay_s = reconnect_delay_s
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._bus: InvalidationBus | None = None
+        self._reconnect_task: asyncio.Task | None = None
+
+    async def start(self, bus: "InvalidationBus"):
+        self._bus = bus
+        await self._connect()
+
+    async def _connect(self):
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(self.channel, self._on_notification)
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+
+    def _on_notification(self, connection, pid, channel, payload: str):
+        if self._bus is not None:
+            self._bus.receive(InvalidationMessage(**json.loads(payload)))
+
+    def _on_termination(self, connection):
+        self._connection = None
+        if self._bus is not None and self._reconnect_task is None:
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while self._connection is None:
+            await asyncio.sleep(self.reconnect_delay_s)
+            try:
+                await self._connect()
+            except Exception:
+                logger.exception("Reconnecting to Postgres for cache invalidations failed")
+        self._reconnect_task = None
+        if self._bus is not None:
+            self._bus.deliver(InvalidationMessage(season_id=None, version=None))
+
+    async def publish(self, message: InvalidationMessage):
+        # The listening connection also sends, one statement at a time
+        async with self._lock:
+            if self._connection is None:
+                logger.warning("Dropping cache invalidation while disconnected from Postgres")
+                return
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, json.dumps(asdict(message)))
+
+    async def stop(self):
+        self._bus = None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+class InvalidationBus:
+
+    def __init__(self, mode: InvalidationBackendMode, poll_interval_s: float) -> None:
+        self.mode = mode
+        self.poll_interval_s = poll_interval_s
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.backend: InvalidationBackend = InProcessInvalidationBackend()
+        self._subscribers: list[Subscriber] = []
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            mode=InvalidationBackendMode(load_env_var_or_default(EnvVarName.INVALIDATION_BACKEND, InvalidationBackendMode.IN_PROCESS)),
+            poll_interval_s=float(load_env_var_or_default(EnvVarName.INVALIDATION_POLL_INTERVAL_S, "1"))
+        )
+
+    def subscribe(self, subscriber: Subscriber):
+        self._subscribers.append(subscriber)
+
+    def is_local(self, message: InvalidationMessage):
+        return message.origin == self.worker_id
+
+    async def start(self, session_factory: async_sessionmaker[AsyncSession], write_session_factory: WriteSessionFactory, database_url: str):
+        match self.mode:
+            case InvalidationBackendMode.DATABASE:
+                self.backend = DatabasePollingInvalidationBackend(session_factory, write_session_factory, self.poll_interval_s)
+            case InvalidationBackendMode.POSTGRES:
+                self.backend = PostgresNotifyInvalidationBackend(database_url)
+            case _:
+                self.backend = InProcessInvalidationBackend()
+        await self.backend.start(self)
+
+    async def stop(self):
+        await self.backend.stop()
+
+    def receive(self, message: InvalidationMessage):
+        # Backends hand every message back, including the ones this worker published
+        if not self.is_local(message):
+            self.deliver(message)
+
+    def deliver(self, message: InvalidationMessage):
+        for subscriber in self._subscribers:
+            try:
+                subscriber(message)
+            except Exception:
+                logger.exception("Cache invalidation subscriber failed")
+
+    async def publish(self, message: InvalidationMessage):
+        message.origin = self.worker_id
+        self.deliver(message)
+        try:
+            await self.backend.publish(message)
+        except Exception:
+            # The write already committed; other workers fall back on their TTLs
+            logger.exception("Publishing cache invalidation failed")
+
+invalidation_bus = InvalidationBus.from_env()
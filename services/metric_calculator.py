@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from types import UnionType
-from typing import Union
+from typing import AsyncIterable, Union
 
 from pydantic import BaseModel
 
@@ -167,26 +167,33 @@ class GamblerAdvancedMetrics(GamblerBaseMetrics):
 class GamblerMetricsCalculator:
     def __init__(self) -> None:
         self.mc = MetricCounter()
-        self._pv_pairs: list[PickVetoPair] = []
         self._target_names: dict[int, str] = {}
 
     def process_pv_pair(self, pv_pair: PickVetoPair):
         self.mc.process_pv_pair(pv_pair)
-        self._pv_pairs.append(pv_pair)
         target_id = pv_pair.get_prop_target_id()
         if target_id not in self._target_names:
             self._target_names[target_id] = pv_pair.get_prop_target_display_name()
     
+    def merge(self, later: "GamblerMetricsCalculator"):
+        self.mc.merge(later.mc)
+        for target_id, name in later._target_names.items():
+            self._target_names.setdefault(target_id, name)
+        return self
+
+    def process_parlay(self, gambler_id: int, parlay: Parlay):
+        if not parlay.result or parlay.state != ParlayState.CLOSED:
+            return
+        pv_pair = pick_veto_pair_from_parlay(gambler_id, parlay)
+        if pv_pair:
+            self.process_pv_pair(pv_pair)
+
     @classmethod
     def calculator_from_parlays(cls, gambler_id: int, parlays: list[Parlay]):
         calculator = cls()
         sorted_parlays = sorted(parlays, key=lambda p: p.order)
         for parlay in sorted_parlays:
-            if not parlay.result or parlay.state != ParlayState.CLOSED:
-                continue
-            pv_pair = pick_veto_pair_from_parlay(gambler_id, parlay)
-            if pv_pair:
-                calculator.process_pv_pair(pv_pair)
+            calculator.process_parlay(gambler_id, parlay)
         return calculator
     
     @classmethod
@@ -194,6 +201,16 @@ class GamblerMetricsCalculator:
         return {
             gambler_id: cls.calculator_from_parlays(gambler_id, parlays) for gambler_id in gambler_ids
         }
+
+    @classmethod
+    async def calculator_dict_from_parlay_stream(cls, gambler_ids: list[int], ordered_parlays: AsyncIterable[Parlay]):
+        # Parlays must arrive in order. Only the counters are kept, so memory scales
+        # with gamblers and prop targets rather than with the number of parlays.
+        calculators = {gambler_id: cls() for gambler_id in gambler_ids}
+        async for parlay in ordered_parlays:
+            for gambler_id, calculator in calculators.items():
+                calculator.process_parlay(gambler_id, parlay)
+        return calculators
     
     def get_base_metrics(self) -> GamblerBaseMetrics:
         return GamblerBaseMetrics(
@@ -12,6 +12,10 @@ def calc_rate(numer: float, denom: float, round_to=2):
     
     return rounded(100*numer/denom, to=round_to)
 
+def merge_freqs(freqs: dict[int, int], later_freqs: dict[int, int]):
+    for streak, freq in later_freqs.items():
+        freqs[streak] = freqs.get(streak, 0) + freq
+
 
 @dataclass
 class PickCategoryCounter:
@@ -67,6 +71,26 @@ class PickCategoryCounter:
         
         return self
     
+    def merge(self, later: "PickCategoryCounter"):
+        # Streaks don't carry across seasons: the longest streak is the best of the two
+        # and the current streak is the later counter's.
+        self.total += later.total
+        self.wins += later.wins
+        self.losses += later.losses
+        self.pushes += later.pushes
+        self.voids += later.voids
+        self.bozos += later.bozos
+        self.curr_win_streak = later.curr_win_streak
+        self.curr_loss_streak = later.curr_loss_streak
+        self.curr_bozo_streak = later.curr_bozo_streak
+        self.longest_win_streak = max(self.longest_win_streak, later.longest_win_streak)
+        self.longest_loss_streak = max(self.longest_loss_streak, later.longest_loss_streak)
+        self.longest_bozo_streak = max(self.longest_bozo_streak, later.longest_bozo_streak)
+        merge_freqs(self.win_streak_freqs, later.win_streak_freqs)
+        merge_freqs(self.loss_streak_freqs, later.loss_streak_freqs)
+        merge_freqs(self.bozo_streak_freqs, later.bozo_streak_freqs)
+        return self
+    
     def _corrected_total(self):
         return self.total - self.pushes - self.voids
     
@@ -120,10 +144,24 @@ class VetoCategoryCounter:
         elif pv_pair.veto_is_void():
             self.voids += 1
         elif pv_pair.veto_is_push():
-            self.pushs += 1
+            self.pushes += 1
         
         return self
     
+    def merge(self, later: "VetoCategoryCounter"):
+        self.total += later.total
+        self.goods += later.goods
+        self.bads += later.bads
+        self.pushes += later.pushes
+        self.voids += later.voids
+        self.bozos += later.bozos
+        self.bozo_savers += later.bozo_savers
+        self.curr_good_streak = later.curr_good_streak
+        self.curr_bad_streak = later.curr_bad_streak
+        self.curr_bozo_streak = later.curr_bozo_streak
+        self.curr_bozo_saver_streak = later.curr_bozo_saver_streak
+        return self
+    
     def _corrected_total(self):
         return self.total - self.pushes - self.voids
     
@@ -156,35 +194,68 @@ class MetricCounter:
     prop_types: dict[PropBetType, "MetricCounter"] | None = field(default_factory=dict)
     prop_targets: dict[int, "MetricCounter"] | None = field(default_factory=dict)
 
+    def merge(self, later: "MetricCounter"):
+        self.overall.merge(later.overall)
+        self.TD.merge(later.TD)
+        self.non_TD.merge(later.non_TD)
+        self.spicy.merge(later.spicy)
+        self.bitch.merge(later.bitch)
+        self.overs.merge(later.overs)
+        self.unders.merge(later.unders)
+        self.vetoes.merge(later.vetoes)
+        self.over_vetoes.merge(later.over_vetoes)
+        self.under_vetoes.merge(later.under_vetoes)
+
+        if self.prop_types is not None and later.prop_types is not None:
+            for prop_type, counter in later.prop_types.items():
+                self.prop_types.setdefault(prop_type, MetricCounter(prop_types=None, prop_targets=None)).merge(counter)
+
+        if self.prop_targets is not None and later.prop_targets is not None:
+            for target_id, counter in later.prop_targets.items():
+                self.prop_targets.setdefault(target_id, MetricCounter(prop_types=None, prop_targets=None)).merge(counter)
+
+        return self
+
     def process_pv_pair(self, pv_pair: PickVetoPair):
-        self.overall.process_pv_pair(pv_pair)
+        return self._process_pv_pair(pv_pair, process_picks=True)
+
+    def process_veto_pv_pair(self, pv_pair: PickVetoPair):
+        # Only updates the veto counters, for when pick counts come from elsewhere (see sql_metrics)
+        return self._process_pv_pair(pv_pair, process_picks=False)
+
+    def _process_pv_pair(self, pv_pair: PickVetoPair, process_picks: bool):
+        if process_picks:
+            self.overall.process_pv_pair(pv_pair)
+
+            if pv_pair.is_TD_pick():
+                self.TD.process_pv_pair(pv_pair)
+            else:
+                self.non_TD.process_pv_pair(pv_pair)
 
-        if pv_pair.is_TD_pick():
-            self.TD.process_pv_pair(pv_pair)
-        else:
-            self.non_TD.process_pv_pair(pv_pair)
+            if pv_pair.is_spicy_pick():
+                self.spicy.process_pv_pair(pv_pair)
+            elif pv_pair.is_bitch_pick():
+                self.bitch.process_pv_pair(pv_pair)
 
-        if pv_pair.is_spicy_pick():
-            self.spicy.process_pv_pair(pv_pair)
-        elif pv_pair.is_bitch_pick():
-            self.bitch.process_pv_pair(pv_pair)
+            if pv_pair.is_over_pick():
+                self.overs.process_pv_pair(pv_pair)
+            elif pv_pair.is_under_pick():
+                self.unders.process_pv_pair(pv_pair)
 
         if pv_pair.is_over_pick():
-            self.overs.process_pv_pair(pv_pair)
             self.over_vetoes.process_pv_pair(pv_pair)
         elif pv_pair.is_under_pick():
-            self.unders.process_pv_pair(pv_pair)
             self.under_vetoes.process_pv_pair(pv_pair)
 
         self.vetoes.process_pv_pair(pv_pair)
 
         if self.prop_types is not None:
             prop_type = pv_pair.get_prop_type()
-            self.prop_types[prop_type] = self.prop_types.get(prop_type, MetricCounter(prop_types=None, prop_targets=None)).process_pv_pair(pv_pair)
+            self.prop_types[prop_type] = self.prop_types.get(prop_type, MetricCounter(prop_types=None, prop_targets=None))._process_pv_pair(pv_pair, process_picks)
 
         if self.prop_targets is not None:
             target_id = pv_pair.get_prop_target_id()
-            self.prop_targets[target_id] = self.prop_targets.get(target_id, MetricCounter(prop_types=None, prop_targets=None)).process_pv_pair(pv_pair)
+            self.prop_targets[target_id] = self.prop_targets.get(target_id, MetricCounter(prop_types=None, prop_targets=None))._process_pv_pair(pv_pair, process_picks)
 
         return self
 
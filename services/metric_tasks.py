@@ -0,0 +1,44 @@
+from typing import *
+
+from .records import ParlayRecord
+from .metric_calculator import GamblerMetricsCalculator
+from .season_performance_calculator import SeasonPerformanceCalculator
+from .performance_time_series import TimeSeriesCalculator
+from .backtesting import backtest_season
+from .score_correctors.score_corrector import GamblerScoreCorrector
+
+# Entry points submitted to the metrics executor. Inputs are plain records or
+# counters and the results are JSON-ready dicts, so both cross a process boundary cheaply.
+
+def compute_gambler_performances(
+        calculators: dict[int, GamblerMetricsCalculator],
+        score_corrector_class: type[GamblerScoreCorrector]
+    ) -> dict[int, dict[str, Any]]:
+    performances = SeasonPerformanceCalculator(calculators, score_corrector_class).performances
+    return {
+        gambler_id: performance.model_dump(mode="json")
+        for gambler_id, performance in performances.items()
+    }
+
+def compute_time_series(
+        gambler_ids: list[int],
+        parlays: list[ParlayRecord],
+        score_corrector_class: type[GamblerScoreCorrector]
+    ) -> dict[int, list[dict[str, Any]]]:
+    time_series = TimeSeriesCalculator(gambler_ids, parlays, score_corrector_class).create_time_series()
+    return {
+        gambler_id: [datum.model_dump(mode="json") for datum in data]
+        for gambler_id, data in time_series.items()
+    }
+
+
+def compute_season_backtest(
+        calculators: dict[int, GamblerMetricsCalculator],
+        baseline_class: type[GamblerScoreCorrector],
+        score_corrector_classes: dict[str, type[GamblerScoreCorrector]]
+    ) -> dict[str, dict[int, dict[str, Any]]]:
+    results = backtest_season(calculators, baseline_class, score_corrector_classes)
+    return {
+        name: {gambler_id: result.model_dump(mode="json") for gambler_id, result in gambler_results.items()}
+        for name, gambler_results in results.items()
+    }
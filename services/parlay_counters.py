@@ -0,0 +1,74 @@
+from typing import *
+
+from sqlalchemy import Connection, exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import Parlay, Pick, PickVeto, VetoApprovalStatus
+
+# Parlay.pick_count, graded_count and pending_veto summarize a parlay's picks so list
+# views can read them off the parlay row instead of loading every pick. They're
+# recounted from the picks in the same transaction as any pick or veto change (see
+# services.change_log).
+#
+# Under READ COMMITTED a statement only sees what was committed when it started, and
+# an UPDATE that waits for a row lock doesn't re-run its subqueries. Two transactions
+# adding a pick to the same parlay could each count only their own, so the parlay rows
+# are locked first: the recount then starts after any other transaction changing the
+# same parlays has committed, and counts its picks too.
+
+def _counter_values():
+    return {
+        Parlay.pick_count: (
+            select(func.count(Pick.id)).where(Pick.parlay_id == Parlay.id).scalar_subquery()
+        ),
+        Parlay.graded_count: (
+            select(func.count(Pick.id)).where(Pick.parlay_id == Parlay.id, Pick.result.is_not(None)).scalar_subquery()
+        ),
+        Parlay.pending_veto: exists().where(
+            PickVeto.pick_id == Pick.id,
+            Pick.parlay_id == Parlay.id,
+            PickVeto.approval_status == VetoApprovalStatus.PENDING
+        ),
+        # Derived data, so not a change that should conflict with a client's version
+        # of the parlay
+        Parlay.updated_at: Parlay.updated_at,
+    }
+
+def _counters_returning(statement):
+    return statement.returning(Parlay.id, Parlay.pick_count, Parlay.graded_count, Parlay.pending_veto)
+
+def _sync_loaded_parlays(session: Session, rows: Iterable[tuple[int, int, int, bool]]):
+    # Parlays already in the session would otherwise keep serving the old counts
+    for parlay_id, pick_count, graded_count, pending_veto in rows:
+        parlay = session.identity_map.get(Session.identity_key(Parlay, parlay_id))
+        if parlay is not None:
+            set_committed_value(parlay, "pick_count", pick_count)
+            set_committed_value(parlay, "graded_count", graded_count)
+            set_committed_value(parlay, "pending_veto", pending_veto)
+
+def refresh_parlay_counters(session: Session, connection: Connection, parlay_ids: set[int]):
+    # For use inside a flush
+    if not parlay_ids:
+        return
+    # SQLite has no row locks and only ever one writer, which already sees everything
+    # committed before it
+    if connection.dialect.name != "sqlite":
+        connection.execute(select(Parlay.id).where(Parlay.id.in_(parlay_ids)).order_by(Parlay.id).with_for_update())
+    rows = connection.execute(_counters_returning(
+        update(Parlay).where(Parlay.id.in_(parlay_ids)).values(_counter_values())
+    )).tuples().all()
+    _sync_loaded_parlays(session, rows)
+
+async def refresh_season_parlay_counters(gambling_season_id: int, db: AsyncSession):
+    # Recounts a whole season, for parlays written before the counters existed. See
+    # utils.backfill_parlay_counters.
+    rows = (await db.execute(
+        _counters_returning(
+            update(Parlay).where(Parlay.gambling_season_id == gambling_season_id).values(_counter_values())
+        ),
+        execution_options={"synchronize_session": False}
+    )).tuples().all()
+    _sync_loaded_parlays(db.sync_session, rows)
+    await db.commit()
@@ -2,10 +2,11 @@ from typing import *
 
 from pydantic import BaseModel
 
-from .season_performance_calculator import SeasonPerformanceCalculator
+from .season_performance_calculator import SeasonPerformanceCalculator, calc_corrected_score
 from models import Pick, Parlay, ParlayState
 from .metric_calculator import GamblerBaseMetrics, GamblerMetricsCalculator
 from .score_correctors.score_corrector import GamblerScoreCorrector
+from .score_correctors.rule_based_score_corrector import RuleBasedScoreCorrector
 from .common import PickVetoPair, get_gambler_picks_veto_pairs, pick_veto_pair_from_parlay
 
 class TimeSeriesDatum(BaseModel):
@@ -22,6 +23,8 @@ class TimeSeriesCalculator:
         self.score_corrector_class = score_corrector_class
 
     def create_time_series(self):
+        if issubclass(self.score_corrector_class, RuleBasedScoreCorrector):
+            return self._create_rule_based_time_series(self.score_corrector_class)
 
         gambler_metrics = {gambler_id: GamblerMetricsCalculator() for gambler_id in self.gambler_ids}
         time_series_data: dict[int, list[TimeSeriesDatum]] = {gambler_id: [] for gambler_id in self.gambler_ids}
@@ -49,6 +52,37 @@ class TimeSeriesCalculator:
                 )
         
         return time_series_data
-                
-        
-    
\ No newline at end of file
+
+    def _create_rule_based_time_series(self, score_corrector_class: type[RuleBasedScoreCorrector]):
+        # Only the gamblers with a pick in a parlay have their metrics recomputed, and
+        # the rule leaders are updated incrementally instead of re-running the corrector
+        # over every gambler's full metrics after each parlay.
+        gambler_metrics = {gambler_id: GamblerMetricsCalculator() for gambler_id in self.gambler_ids}
+        base_metrics = {gambler_id: calculator.get_base_metrics() for gambler_id, calculator in gambler_metrics.items()}
+        leaderboard = score_corrector_class.create_leaderboard()
+        for gambler_id, metrics in base_metrics.items():
+            leaderboard.update(gambler_id, metrics)
+
+        time_series_data: dict[int, list[TimeSeriesDatum]] = {gambler_id: [] for gambler_id in self.gambler_ids}
+        for parlay in self.ordered_parlays:
+            if parlay.state != ParlayState.CLOSED or parlay.result is None:
+                continue
+            for gambler_id, calculator in gambler_metrics.items():
+                pv_pair = pick_veto_pair_from_parlay(gambler_id, parlay)
+                if pv_pair:
+                    calculator.process_pv_pair(pv_pair)
+                    base_metrics[gambler_id] = calculator.get_base_metrics()
+                    leaderboard.update(gambler_id, base_metrics[gambler_id])
+
+            for gambler_id, metrics in base_metrics.items():
+                time_series_data[gambler_id].append(
+                    TimeSeriesDatum(
+                        gambler_id=gambler_id,
+                        parlay_order=parlay.order,
+                        parlay_id=parlay.id,
+                        metrics=metrics,
+                        corrected_score=calc_corrected_score(metrics.overall.win_rate, leaderboard.adjustments(gambler_id))
+                    )
+                )
+
+        return time_series_data
@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import *
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Parlay, Pick, PropBetTarget, PickResult, ParlayState
+from services.invalidation import InvalidationMessage, invalidation_bus
+from utils.env_vars import EnvVarName, load_env_var_or_default
+from .metric_counter import calc_rate
+
+# Season-wide tallies per prop bet target, aggregated across every gambler. Only
+# graded picks in closed parlays count, the same picks that feed the season metrics.
+# The index remembers each pick's contribution so a regraded, moved or reopened pick
+# can be taken back out without rescanning the season.
+
+class PropTargetSortKey(StrEnum):
+    WIN_RATE = "win_rate"
+    VOLUME = "volume"
+    WINS = "wins"
+    LOSSES = "losses"
+    BOZOS = "bozos"
+
+@dataclass(slots=True)
+class PropTargetTally:
+    prop_bet_target_id: int
+    name: str
+    total: int = 0
+    wins: int = 0
+    losses: int = 0
+    bozos: int = 0
+    pushes: int = 0
+    voids: int = 0
+
+    def add(self, result: PickResult, sign: int = 1):
+        self.total += sign
+        if result == PickResult.WIN:
+            self.wins += sign
+        elif result in [PickResult.LOSS, PickResult.BOZO]:
+            self.losses += sign
+            if result == PickResult.BOZO:
+                self.bozos += sign
+        elif result == PickResult.PUSH:
+            self.pushes += sign
+        elif result == PickResult.VOID:
+            self.voids += sign
+
+    def win_rate(self):
+        return calc_rate(self.wins, self.total - self.pushes - self.voids)
+
+    def sort_value(self, key: PropTargetSortKey) -> float:
+        match key:
+            case PropTargetSortKey.WIN_RATE:
+                return self.win_rate() or 0
+            case PropTargetSortKey.VOLUME:
+                return self.total
+            case PropTargetSortKey.WINS:
+                return self.wins
+            case PropTargetSortKey.LOSSES:
+                return self.losses
+            case PropTargetSortKey.BOZOS:
+                return self.bozos
+
+@dataclass
+class SeasonPropTargetIndex:
+    season_id: int
+    version: str
+    built_at: float = field(default_factory=time.monotonic)
+    tallies: dict[int, PropTargetTally] = field(default_factory=dict)
+    # pick id -> (prop bet target id, result) currently counted for that pick
+    contributions: dict[int, tuple[int, PickResult]] = field(default_factory=dict)
+
+    def apply_pick(self, pick_id: int, target_id: int, target_name: str, result: PickResult | None):
+        previous = self.contributions.pop(pick_id, None)
+        if previous is not None:
+            previous_target_id, previous_result = previous
+            tally = self.tallies[previous_target_id]
+            tally.add(previous_result, sign=-1)
+            if tally.total == 0:
+                del self.tallies[previous_target_id]
+        if result is not None:
+            tally = self.tallies.get(target_id)
+            if tally is None:
+                tally = self.tallies[target_id] = PropTargetTally(prop_bet_target_id=target_id, name=target_name)
+            tally.add(result)
+            self.contributions[pick_id] = (target_id, result)
+
+    def top(self, key: PropTargetSortKey, limit: int, min_picks: int = 1, ascending: bool = False) -> list[PropTargetTally]:
+        candidates = (t for t in self.tallies.values() if t.total >= min_picks)
+        if key == PropTargetSortKey.WIN_RATE:
+            candidates = (t for t in candidates if t.win_rate() is not None)
+        # Higher volume wins ties either way, and the target id keeps the order stable
+        if ascending:
+            return heapq.nsmallest(limit, candidates, key=lambda t: (t.sort_value(key), -t.total, t.prop_bet_target_id))
+        return heapq.nlargest(limit, candidates, key=lambda t: (t.sort_value(key), t.total, -t.prop_bet_target_id))
+
+def _season_pick_query():
+    return (
+        select(Pick.id, Pick.prop_bet_target_id, PropBetTarget.player_name, PropBetTarget.team_name, Pick.result, Parlay.state, Parlay.result)
+        .join(Parlay, Parlay.id == Pick.parlay_id)
+        .join(PropBetTarget, PropBetTarget.id == Pick.prop_bet_target_id)
+    )
+
+def _apply_rows(index: SeasonPropTargetIndex, rows: Iterable[Row]):
+    for pick_id, target_id, player_name, team_name, pick_result, parlay_state, parlay_result in rows:
+        counted = parlay_state == ParlayState.CLOSED and parlay_result is not None
+        index.apply_pick(pick_id, target_id, player_name or team_name, pick_result if counted else None)
+
+class PropTargetIndexRegistry:
+    # Indexes are validated against the season version, so writes made by another
+    # worker trigger a rebuild on the next read. Writes made here are applied in place
+    # and the index adopts the resulting version. max_age_s bounds how long a write
+    # from another worker racing one of ours could go unnoticed.
+
+    def __init__(self, max_age_s: float) -> None:
+        self.max_age_s = max_age_s
+        self._indexes: dict[int, SeasonPropTargetIndex] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def _is_fresh(self, index: SeasonPropTargetIndex | None, version: str):
+        return index is not None and index.version == version and time.monotonic() - index.built_at < self.max_age_s
+
+    async def get(self, season_id: int, version: str, db: AsyncSession) -> SeasonPropTargetIndex:
+        index = self._indexes.get(season_id)
+        if self._is_fresh(index, version):
+            return cast(SeasonPropTargetIndex, index)
+
+        async with self._locks.setdefault(season_id, asyncio.Lock()):
+            index = self._indexes.get(season_id)
+            if self._is_fresh(index, version):
+                return cast(SeasonPropTargetIndex, index)
+            index = SeasonPropTargetIndex(season_id=season_id, version=version)
+            _apply_rows(index, (await db.execute(
+                _season_pick_query().where(
+                    Parlay.gambling_season_id == season_id,
+                    Parlay.state == ParlayState.CLOSED,
+                    Parlay.result.is_not(None)
+                )
+            )).all())
+            self._indexes[season_id] = index
+            return index
+
+    async def sync_parlay(self, parlay_id: int, db: AsyncSession) -> SeasonPropTargetIndex | None:
+        # Re-reads one parlay's picks into its season's index, if that index is loaded.
+        # The caller is responsible for bringing the index version up to date.
+        season_id = (await db.execute(
+            select(Parlay.gambling_season_id).where(Parlay.id == parlay_id)
+        )).scalar_one()
+        index = self._indexes.get(season_id)
+        if index is None:
+            return None
+        _apply_rows(index, (await db.execute(
+            _season_pick_query().where(Parlay.id == parlay_id)
+        )).all())
+        return index
+
+    def invalidate(self, message: InvalidationMessage):
+        # Writes made here already brought the index up to message.version
+        if message.season_id is None:
+            self.clear()
+            return
+        index = self._indexes.get(message.season_id)
+        if index is not None and index.version != message.version:
+            del self._indexes[message.season_id]
+
+    def clear(self):
+        self._indexes.clear()
+
+prop_target_indexes = PropTargetIndexRegistry(
+    max_age_s=float(load_env_var_or_default(EnvVarName.PROP_TARGET_INDEX_MAX_AGE_S, "300"))
+)
+invalidation_bus.subscribe(prop_target_indexes.invalidate)
@@ -0,0 +1,162 @@
+import heapq
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import *
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Parlay, Pick, PropBetTarget
+from services.invalidation import InvalidationMessage, invalidation_bus
+from utils.env_vars import EnvVarName, load_env_var_or_default
+
+# In-process autocomplete over prop bet target names. Every word of a target's player
+# and team name is inserted into a trie whose nodes hold the ids of all targets below
+# them, so a prefix lookup is a walk of len(prefix) nodes. Multi-word queries
+# intersect the matches of each word.
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in re.split(r"[^0-9a-z]+", text.casefold()) if token]
+
+@dataclass(slots=True)
+class TrieNode:
+    children: dict[str, "TrieNode"] = field(default_factory=dict)
+    target_ids: set[int] = field(default_factory=set)
+
+@dataclass(slots=True)
+class SearchableTarget:
+    id: int
+    identifier: str
+    player_name: str | None
+    team_name: str
+
+    @property
+    def name(self):
+        return self.player_name or self.team_name
+
+class PropTargetPrefixIndex:
+
+    def __init__(self) -> None:
+        self.root = TrieNode()
+        self.targets: dict[int, SearchableTarget] = {}
+
+    def __len__(self):
+        return len(self.targets)
+
+    def add(self, target: SearchableTarget):
+        if target.id in self.targets:
+            return
+        self.targets[target.id] = target
+        for token in set(tokenize(f"{target.player_name or ''} {target.team_name}")):
+            node = self.root
+            for char in token:
+                node = node.children.setdefault(char, TrieNode())
+                node.target_ids.add(target.id)
+
+    def _prefix_matches(self, prefix: str) -> set[int]:
+        node = self.root
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return set()
+            node = child
+        return node.target_ids
+
+    def search(self, query: str) -> set[int]:
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+        # Start from the rarest prefix so the intersection stays small
+        matches = sorted((self._prefix_matches(token) for token in tokens), key=len)
+        return matches[0].intersection(*matches[1:])
+
+@dataclass
+class SeasonPickCounts:
+    loaded_at: float
+    counts: Counter[int]
+
+class PropTargetSearch:
+    # Ranks prefix matches by how often each target has been picked in a season. Pick
+    # counts are loaded per season with one GROUP BY, bumped as picks are created here
+    # and reloaded after counts_ttl_s to pick up edits and deletes. Changes made by
+    # other workers arrive through the invalidation bus and are loaded on the next search.
+
+    def __init__(self, counts_ttl_s: float) -> None:
+        self.counts_ttl_s = counts_ttl_s
+        self.index = PropTargetPrefixIndex()
+        self._season_counts: dict[int, SeasonPickCounts] = {}
+        self._pending_target_ids: set[int] = set()
+        self._reload_all = False
+
+    async def load(self, db: AsyncSession):
+        index = PropTargetPrefixIndex()
+        for id, identifier, player_name, team_name in (await db.execute(
+            select(PropBetTarget.id, PropBetTarget.identifier, PropBetTarget.player_name, PropBetTarget.team_name)
+        )).all():
+            index.add(SearchableTarget(id=id, identifier=identifier, player_name=player_name, team_name=team_name))
+        self.index = index
+        self._season_counts.clear()
+        self._pending_target_ids.clear()
+        self._reload_all = False
+
+    def add_target(self, target: SearchableTarget):
+        self.index.add(target)
+
+    def invalidate(self, message: InvalidationMessage):
+        # Local writes already updated the index and counts in place
+        if invalidation_bus.is_local(message):
+            return
+        if message.season_id is None:
+            self._reload_all = True
+            return
+        self._season_counts.pop(message.season_id, None)
+        self._pending_target_ids.update(message.prop_bet_target_ids)
+
+    async def _apply_pending(self, db: AsyncSession):
+        if self._reload_all:
+            await self.load(db)
+            return
+        if not self._pending_target_ids:
+            return
+        target_ids, self._pending_target_ids = self._pending_target_ids, set()
+        for id, identifier, player_name, team_name in (await db.execute(
+            select(PropBetTarget.id, PropBetTarget.identifier, PropBetTarget.player_name, PropBetTarget.team_name)
+            .where(PropBetTarget.id.in_(target_ids))
+        )).all():
+            self.index.add(SearchableTarget(id=id, identifier=identifier, player_name=player_name, team_name=team_name))
+
+    def record_pick(self, gambling_season_id: int, prop_bet_target_id: int):
+        season_counts = self._season_counts.get(gambling_season_id)
+        if season_counts is not None:
+            season_counts.counts[prop_bet_target_id] += 1
+
+    async def _get_season_counts(self, gambling_season_id: int, db: AsyncSession) -> Counter[int]:
+        season_counts = self._season_counts.get(gambling_season_id)
+        if season_counts is None or time.monotonic() - season_counts.loaded_at >= self.counts_ttl_s:
+            counts = Counter(dict((await db.execute(
+                select(Pick.prop_bet_target_id, func.count(Pick.id))
+                .join(Parlay, Parlay.id == Pick.parlay_id)
+                .where(Parlay.gambling_season_id == gambling_season_id)
+                .group_by(Pick.prop_bet_target_id)
+            )).tuples().all()))
+            season_counts = self._season_counts[gambling_season_id] = SeasonPickCounts(loaded_at=time.monotonic(), counts=counts)
+        return season_counts.counts
+
+    async def search(self, query: str, gambling_season_id: int | None, limit: int, db: AsyncSession) -> list[tuple[SearchableTarget, int]]:
+        await self._apply_pending(db)
+        target_ids = self.index.search(query)
+        counts: Counter[int] = Counter() if gambling_season_id is None else await self._get_season_counts(gambling_season_id, db)
+        targets = self.index.targets
+        top_ids = heapq.nsmallest(
+            limit,
+            target_ids,
+            key=lambda target_id: (-counts[target_id], targets[target_id].name, target_id)
+        )
+        return [(targets[target_id], counts[target_id]) for target_id in top_ids]
+
+prop_target_search = PropTargetSearch(
+    counts_ttl_s=float(load_env_var_or_default(EnvVarName.PROP_TARGET_SEARCH_COUNTS_TTL_S, "60"))
+)
+invalidation_bus.subscribe(prop_target_search.invalidate)
@@ -0,0 +1,147 @@
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import *
+
+from utils.env_vars import EnvVarName, load_env_var_or_default
+
+# Rebuilds a season's derived data (performances, time series, prop target stats) in
+# the background after writes that change results, so reads can keep serving the last
+# build instead of computing it themselves. Requests for a season are coalesced: a
+# season already waiting is not queued again, and one requested while its rebuild is
+# running is rebuilt once more afterwards. Jobs are registered by whoever owns the
+# derived data and each one stores its own result.
+
+logger = logging.getLogger(__name__)
+
+RecomputeJob = Callable[[int], Awaitable[None]]
+
+class RecomputeStatus(StrEnum):
+    IDLE = "idle"
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+
+@dataclass
+class SeasonRecomputeState:
+    season_id: int
+    status: RecomputeStatus = RecomputeStatus.IDLE
+    requested_at: datetime.datetime | None = None
+    completed_at: datetime.datetime | None = None
+    attempts: int = 0
+    error: str | None = None
+    # Requested again while running
+    rerun: bool = False
+
+@dataclass
+class RecomputeQueueStats:
+    requested: int = 0
+    coalesced: int = 0
+    completed: int = 0
+    retried: int = 0
+    failed: int = 0
+
+class RecomputeQueue:
+
+    def __init__(self, max_concurrency: int, debounce_s: float, max_attempts: int, retry_delay_s: float) -> None:
+        self.max_concurrency = max_concurrency
+        self.debounce_s = debounce_s
+        self.max_attempts = max_attempts
+        self.retry_delay_s = retry_delay_s
+        self.stats = RecomputeQueueStats()
+        self._jobs: dict[str, RecomputeJob] = {}
+        self._states: dict[int, SeasonRecomputeState] = {}
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrency=int(load_env_var_or_default(EnvVarName.RECOMPUTE_WORKERS, "2")),
+            debounce_s=float(load_env_var_or_default(EnvVarName.RECOMPUTE_DEBOUNCE_S, "0.5")),
+            max_attempts=int(load_env_var_or_default(EnvVarName.RECOMPUTE_MAX_ATTEMPTS, "3")),
+            retry_delay_s=float(load_env_var_or_default(EnvVarName.RECOMPUTE_RETRY_DELAY_S, "1"))
+        )
+
+    @property
+    def queued(self):
+        return sum(1 for s in self._states.values() if s.status == RecomputeStatus.QUEUED)
+
+    @property
+    def running(self):
+        return sum(1 for s in self._states.values() if s.status == RecomputeStatus.RUNNING)
+
+    def register(self, name: str, job: RecomputeJob):
+        self._jobs[name] = job
+
+    def state(self, season_id: int) -> SeasonRecomputeState:
+        return self._states.get(season_id) or SeasonRecomputeState(season_id=season_id)
+
+    def is_pending(self, season_id: int):
+        return self.state(season_id).status in [RecomputeStatus.QUEUED, RecomputeStatus.RUNNING]
+
+    def enqueue(self, season_id: int):
+        self.stats.requested += 1
+        state = self._states.setdefault(season_id, SeasonRecomputeState(season_id=season_id))
+        state.requested_at = datetime.datetime.now(datetime.UTC)
+        if state.status == RecomputeStatus.QUEUED:
+            self.stats.coalesced += 1
+            return
+        if state.status == RecomputeStatus.RUNNING:
+            self.stats.coalesced += 1
+            state.rerun = True
+            return
+        state.attempts = 0
+        # Waiting a moment lets a burst of writes land before the rebuild starts
+        self._schedule(state, self.debounce_s)
+
+    def _schedule(self, state: SeasonRecomputeState, delay_s: float):
+        state.status = RecomputeStatus.QUEUED
+        asyncio.get_running_loop().call_later(delay_s, self._queue.put_nowait, state.season_id)
+
+    async def start(self):
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self):
+        while True:
+            season_id = await self._queue.get()
+            try:
+                await self._run(self._states[season_id])
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, state: SeasonRecomputeState):
+        state.status = RecomputeStatus.RUNNING
+        state.rerun = False
+        state.attempts += 1
+        try:
+            for job in self._jobs.values():
+                await job(state.season_id)
+        except Exception as e:
+            logger.exception("Recomputing season %s failed", state.season_id)
+            state.error = repr(e)
+            if state.attempts < self.max_attempts and not state.rerun:
+                self.stats.retried += 1
+                self._schedule(state, self.retry_delay_s * 2 ** (state.attempts - 1))
+                return
+            self.stats.failed += 1
+            state.status = RecomputeStatus.FAILED
+        else:
+            self.stats.completed += 1
+            state.status = RecomputeStatus.IDLE
+            state.error = None
+            state.completed_at = datetime.datetime.now(datetime.UTC)
+
+        if state.rerun:
+            state.attempts = 0
+            self._schedule(state, self.debounce_s)
+
+recompute_queue = RecomputeQueue.from_env()
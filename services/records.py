@@ -0,0 +1,144 @@
+from dataclasses import dataclass, field
+from typing import *
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Parlay, Pick, PickVeto, PropBetTarget, PickResult, VetoResult, PropBetType, PropBetDirection, SauceFactor, VetoApprovalStatus, ParlayState, ParlayResult
+
+# Plain, picklable stand-ins for the ORM graph that the metric calculators read.
+# They expose the same attribute names as the models so the calculators can
+# consume either, and can be shipped to a worker process.
+
+@dataclass(slots=True)
+class PropBetTargetRecord:
+    player_name: str | None
+    team_name: str
+
+@dataclass(slots=True)
+class VetoVoteRecord:
+    gambler_id: int
+    affirmative: bool
+
+@dataclass(slots=True)
+class PickVetoRecord:
+    id: int
+    gambler_id: int
+    approval_status: VetoApprovalStatus
+    result: VetoResult | None
+    # Only filled in by the synthetic season generator; the metrics never read votes
+    votes: list[VetoVoteRecord] = field(default_factory=list)
+
+    @classmethod
+    def from_model(cls, model: PickVeto):
+        return cls(
+            id=model.id,
+            gambler_id=model.gambler_id,
+            approval_status=model.approval_status,
+            result=model.result
+        )
+
+@dataclass(slots=True)
+class PickRecord:
+    id: int
+    gambler_id: int
+    prop_bet_target_id: int
+    prop_type: PropBetType
+    direction: PropBetDirection
+    sauce_factor: SauceFactor | None
+    result: PickResult | None
+    prop_bet_target: PropBetTargetRecord
+    vetoes: list[PickVetoRecord] = field(default_factory=list)
+
+    @classmethod
+    def from_model(cls, model: Pick):
+        return cls(
+            id=model.id,
+            gambler_id=model.gambler_id,
+            prop_bet_target_id=model.prop_bet_target_id,
+            prop_type=model.prop_type,
+            direction=model.direction,
+            sauce_factor=model.sauce_factor,
+            result=model.result,
+            prop_bet_target=PropBetTargetRecord(
+                player_name=model.prop_bet_target.player_name,
+                team_name=model.prop_bet_target.team_name
+            ),
+            vetoes=[PickVetoRecord.from_model(v) for v in model.vetoes]
+        )
+
+@dataclass(slots=True)
+class ParlayRecord:
+    id: int
+    order: int
+    state: ParlayState
+    result: ParlayResult | None
+    picks: list[PickRecord] = field(default_factory=list)
+
+    @classmethod
+    def from_model(cls, model: Parlay):
+        return cls(
+            id=model.id,
+            order=model.order,
+            state=model.state,
+            result=model.result,
+            picks=[PickRecord.from_model(p) for p in model.picks]
+        )
+
+
+def closed_parlay_rows_query(season_id: int):
+    return (
+        select(
+            Parlay.id, Parlay.order, Parlay.state, Parlay.result,
+            Pick.id, Pick.gambler_id, Pick.prop_bet_target_id, Pick.prop_type, Pick.direction, Pick.sauce_factor, Pick.result,
+            PropBetTarget.player_name, PropBetTarget.team_name,
+            PickVeto.id, PickVeto.gambler_id, PickVeto.approval_status, PickVeto.result
+        )
+        .outerjoin(Pick, Pick.parlay_id == Parlay.id)
+        .outerjoin(PropBetTarget, PropBetTarget.id == Pick.prop_bet_target_id)
+        # Only approved vetoes ever contribute to metrics
+        .outerjoin(PickVeto, and_(PickVeto.pick_id == Pick.id, PickVeto.approval_status == VetoApprovalStatus.APPROVED))
+        .where(
+            Parlay.gambling_season_id == season_id,
+            Parlay.state == ParlayState.CLOSED,
+            Parlay.result.is_not(None)
+        )
+        .order_by(Parlay.order, Parlay.id, Pick.id, PickVeto.id)
+    )
+
+async def stream_closed_parlay_records(season_id: int, db: AsyncSession, batch_size: int = 500) -> AsyncIterator[ParlayRecord]:
+    result = await db.stream(closed_parlay_rows_query(season_id).execution_options(yield_per=batch_size))
+    parlay: ParlayRecord | None = None
+    pick: PickRecord | None = None
+    async for row in result:
+        (
+            parlay_id, order, state, parlay_result,
+            pick_id, gambler_id, target_id, prop_type, direction, sauce_factor, pick_result,
+            player_name, team_name,
+            veto_id, veto_gambler_id, approval_status, veto_result
+        ) = row
+        if parlay is None or parlay.id != parlay_id:
+            if parlay is not None:
+                yield parlay
+            parlay = ParlayRecord(id=parlay_id, order=order, state=state, result=parlay_result)
+            pick = None
+        if pick_id is None:
+            continue
+        if pick is None or pick.id != pick_id:
+            pick = PickRecord(
+                id=pick_id,
+                gambler_id=gambler_id,
+                prop_bet_target_id=target_id,
+                prop_type=prop_type,
+                direction=direction,
+                sauce_factor=sauce_factor,
+                result=pick_result,
+                prop_bet_target=PropBetTargetRecord(player_name=player_name, team_name=team_name)
+            )
+            parlay.picks.append(pick)
+        if veto_id is not None:
+            pick.vetoes.append(
+                PickVetoRecord(id=veto_id, gambler_id=veto_gambler_id, approval_status=approval_status, result=veto_result)
+            )
+    if parlay is not None:
+        yield parlay
@@ -0,0 +1,135 @@
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import *
+
+from .score_corrector import GamblerScoreCorrector, GamblerScoreCorrections, ScoreCorrection
+
+if TYPE_CHECKING:
+    from services.metric_calculator import GamblerBaseMetrics
+
+class RuleComparison(StrEnum):
+    MAX = "max"
+    MIN = "min"
+
+class RuleTiePolicy(StrEnum):
+    # Every gambler tied for the lead gets the adjustment
+    ALL = "all"
+    # Nobody gets the adjustment unless there is a single leader
+    NONE = "none"
+
+@dataclass(frozen=True)
+class ScoreCorrectionRule:
+    identifier: str
+    name: str
+    # Attribute path into GamblerBaseMetrics, e.g. ("sauce_factor", "bitch", "losses")
+    metric_path: tuple[str, ...]
+    comparison: RuleComparison
+    adjustment: float
+    tie_policy: RuleTiePolicy = RuleTiePolicy.ALL
+    # No one is awarded while the leading value is still zero
+    require_nonzero: bool = True
+
+    def value(self, metrics: "GamblerBaseMetrics") -> float:
+        value: Any = metrics
+        for attr in self.metric_path:
+            value = getattr(value, attr)
+        return value
+
+    def is_better(self, value: float, other: float):
+        if self.comparison == RuleComparison.MAX:
+            return value > other
+        return value < other
+
+    def is_deduction(self):
+        return self.adjustment < 0
+
+    def correction(self, associated_value: float):
+        return ScoreCorrection(
+            identifier=self.identifier,
+            name=self.name,
+            associated_value=associated_value,
+            adjustment=self.adjustment
+        )
+
+@dataclass
+class RuleLeader:
+    rule: ScoreCorrectionRule
+    values: dict[int, float] = field(default_factory=dict)
+    best: float | None = None
+    leaders: set[int] = field(default_factory=set)
+
+    def update(self, gambler_id: int, value: float):
+        self.values[gambler_id] = value
+        if self.best is None or self.rule.is_better(value, self.best):
+            self.best = value
+            self.leaders = {gambler_id}
+        elif value == self.best:
+            self.leaders.add(gambler_id)
+        elif gambler_id in self.leaders:
+            self.leaders.discard(gambler_id)
+            if not self.leaders:
+                self._recompute()
+
+    def _recompute(self):
+        self.best = None
+        self.leaders = set()
+        for gambler_id, value in self.values.items():
+            if self.best is None or self.rule.is_better(value, self.best):
+                self.best = value
+                self.leaders = {gambler_id}
+            elif value == self.best:
+                self.leaders.add(gambler_id)
+
+    def awarded(self) -> set[int]:
+        if self.best is None or (self.rule.require_nonzero and self.best == 0):
+            return set()
+        if self.rule.tie_policy == RuleTiePolicy.NONE and len(self.leaders) > 1:
+            return set()
+        return self.leaders
+
+class RuleLeaderboard:
+    # Tracks the leaders of every rule as gamblers' metrics change. Counts only ever
+    # grow during a season, so an update is usually O(1) per rule; a full rescan only
+    # happens when the last leader of a rule falls behind.
+
+    def __init__(self, rules: Iterable[ScoreCorrectionRule]) -> None:
+        self.rule_leaders = [RuleLeader(rule) for rule in rules]
+
+    def update(self, gambler_id: int, metrics: "GamblerBaseMetrics"):
+        for rule_leader in self.rule_leaders:
+            rule_leader.update(gambler_id, rule_leader.rule.value(metrics))
+
+    def corrections(self, deductions: bool) -> GamblerScoreCorrections:
+        corrections: GamblerScoreCorrections = {}
+        for rule_leader in self.rule_leaders:
+            rule = rule_leader.rule
+            if rule.is_deduction() != deductions:
+                continue
+            for gambler_id in rule_leader.awarded():
+                corrections.setdefault(gambler_id, {})[rule.identifier] = rule.correction(rule_leader.best)
+        return corrections
+
+    def adjustments(self, gambler_id: int) -> list[float]:
+        return [
+            rule_leader.rule.adjustment
+            for rule_leader in self.rule_leaders
+            if gambler_id in rule_leader.awarded()
+        ]
+
+class RuleBasedScoreCorrector(GamblerScoreCorrector):
+    rules: ClassVar[list[ScoreCorrectionRule]] = []
+
+    def __init__(self, gambler_metrics: dict[int, "GamblerBaseMetrics"]) -> None:
+        self.leaderboard = self.create_leaderboard()
+        for gambler_id, metrics in gambler_metrics.items():
+            self.leaderboard.update(gambler_id, metrics)
+
+    @classmethod
+    def create_leaderboard(cls):
+        return RuleLeaderboard(cls.rules)
+
+    def deductions(self) -> GamblerScoreCorrections:
+        return self.leaderboard.corrections(deductions=True)
+
+    def augmentations(self) -> GamblerScoreCorrections:
+        return self.leaderboard.corrections(deductions=False)
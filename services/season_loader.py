@@ -0,0 +1,22 @@
+from enum import StrEnum
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.env_vars import EnvVarName, load_env_var_or_default
+from .metric_calculator import GamblerMetricsCalculator
+from .records import stream_closed_parlay_records
+from .sql_metrics import sql_calculator_dict
+
+class MetricsMode(StrEnum):
+    PYTHON = "python"
+    SQL = "sql"
+
+METRICS_MODE = MetricsMode(load_env_var_or_default(EnvVarName.METRICS_MODE, MetricsMode.PYTHON))
+
+async def load_season_calculators(gambler_ids: list[int], season_id: int, db: AsyncSession) -> dict[int, GamblerMetricsCalculator]:
+    if METRICS_MODE == MetricsMode.SQL:
+        return await sql_calculator_dict(gambler_ids, season_id, db)
+    return await GamblerMetricsCalculator.calculator_dict_from_parlay_stream(
+        gambler_ids,
+        stream_closed_parlay_records(season_id, db)
+    )
\ No newline at end of file
@@ -12,9 +12,19 @@ SCORE_CORRECTORS = {
     2025: GamblerScoreCorrector2025,
 }
 
+# Every corrector that can be selected by name, e.g. for backtesting
+SCORE_CORRECTOR_CLASSES: dict[str, type[GamblerScoreCorrector]] = {
+    cls.__name__: cls for cls in [GamblerScoreCorrector2025]
+}
+
 def get_season_score_corrector_class(season_year: int):
     return SCORE_CORRECTORS.get(season_year, GamblerScoreCorrector2025)
 
+def calc_corrected_score(win_rate: float | None, adjustments: Iterable[float]) -> float:
+    if win_rate is None:
+        return 0
+    return win_rate + sum(adjustments)
+
 class GamblerPerformance(BaseModel):
     gambler_id: int
     corrected_score: float
@@ -48,13 +58,9 @@ class SeasonPerformanceCalculator:
         for gambler_id, gambler_metrics in metrics.items():
             gambler_deductions = deductions.get(gambler_id, {})
             gambler_augmentations = augmentations.get(gambler_id, {})
-            win_rate = gambler_metrics.overall.win_rate
-            if win_rate is None:
-                corrected_score = 0
-            else:
-                deduction_values = [d.adjustment for d in gambler_deductions.values()]
-                augmentation_values = [a.adjustment for a in gambler_augmentations.values()]
-                corrected_score = win_rate + sum(deduction_values + augmentation_values)
+            deduction_values = [d.adjustment for d in gambler_deductions.values()]
+            augmentation_values = [a.adjustment for a in gambler_augmentations.values()]
+            corrected_score = calc_corrected_score(gambler_metrics.overall.win_rate, deduction_values + augmentation_values)
             gambler_performance = GamblerPerformance(
                 gambler_id=gambler_id,
                 corrected_score=corrected_score,
@@ -0,0 +1,264 @@
+from typing import *
+
+from sqlalchemy import Integer, and_, case, cast, func, literal_column, null, select, union_all
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Parlay, Pick, PickVeto, PropBetTarget, PickResult, PropBetType, SauceFactor, PropBetDirection, ParlayState, VetoApprovalStatus
+from .common import PickVetoPair
+from .metric_calculator import GamblerMetricsCalculator
+from .metric_counter import MetricCounter, PickCategoryCounter
+from .records import PickRecord, PickVetoRecord, PropBetTargetRecord
+
+# Computes the pick counters behind SetMetrics inside the database instead of walking
+# every parlay in Python. Each graded pick is fanned out into one row per
+# (scope, category) it belongs to, counts come from a GROUP BY over those rows and
+# streaks from gaps-and-islands window functions over parlay.order. Vetoes are rare
+# (at most one per parlay) so their counters are still fed through Python.
+
+CounterKey = tuple[int, PropBetType | None, int | None, str]
+
+def _closed_season_parlay(season_id: int):
+    return and_(
+        Parlay.gambling_season_id == season_id,
+        Parlay.state == ParlayState.CLOSED,
+        Parlay.result.is_not(None)
+    )
+
+def _flag(condition):
+    return case((condition, 1), else_=0)
+
+def _categorized_picks(season_id: int):
+    graded = (
+        select(
+            Pick.gambler_id,
+            Parlay.order.label("parlay_order"),
+            Pick.id.label("pick_id"),
+            Pick.prop_type,
+            Pick.prop_bet_target_id,
+            Pick.direction,
+            Pick.sauce_factor,
+            _flag(Pick.result == PickResult.WIN).label("is_win"),
+            _flag(Pick.result.in_([PickResult.LOSS, PickResult.BOZO])).label("is_loss"),
+            _flag(Pick.result == PickResult.BOZO).label("is_bozo"),
+            _flag(Pick.result == PickResult.PUSH).label("is_push"),
+            _flag(Pick.result == PickResult.VOID).label("is_void")
+        )
+        .join(Parlay, Parlay.id == Pick.parlay_id)
+        .where(_closed_season_parlay(season_id), Pick.result.is_not(None))
+        .cte("graded_picks")
+    )
+
+    no_prop_type = cast(null(), Pick.__table__.c.prop_type.type)
+    no_target = cast(null(), Integer)
+    # (prop_type, prop_bet_target_id) identifying the gambler's top-level counter,
+    # a per prop type counter or a per prop target counter
+    scopes = [
+        (no_prop_type, no_target),
+        (graded.c.prop_type, no_target),
+        (no_prop_type, graded.c.prop_bet_target_id)
+    ]
+    # The values are MetricCounter attribute names
+    categories = [
+        literal_column("'overall'"),
+        case((graded.c.prop_type == PropBetType.TDS, literal_column("'TD'")), else_=literal_column("'non_TD'")),
+        case(
+            (graded.c.sauce_factor == SauceFactor.SPICY, literal_column("'spicy'")),
+            (graded.c.sauce_factor == SauceFactor.BITCH, literal_column("'bitch'"))
+        ),
+        case(
+            (graded.c.direction == PropBetDirection.OVER, literal_column("'overs'")),
+            (graded.c.direction == PropBetDirection.UNDER, literal_column("'unders'"))
+        )
+    ]
+    return union_all(*[
+        select(
+            graded.c.gambler_id,
+            prop_type.label("prop_type"),
+            target_id.label("prop_bet_target_id"),
+            category.label("category"),
+            graded.c.parlay_order,
+            graded.c.pick_id,
+            graded.c.is_win,
+            graded.c.is_loss,
+            graded.c.is_bozo,
+            graded.c.is_push,
+            graded.c.is_void
+        )
+        for prop_type, target_id in scopes
+        for category in categories
+    ]).subquery("categorized_picks")
+
+def _key_columns(selectable):
+    return [selectable.c.gambler_id, selectable.c.prop_type, selectable.c.prop_bet_target_id, selectable.c.category]
+
+def season_count_query(season_id: int):
+    picks = _categorized_picks(season_id)
+    key = _key_columns(picks)
+    return (
+        select(
+            *key,
+            func.count().label("total"),
+            func.sum(picks.c.is_win).label("wins"),
+            func.sum(picks.c.is_loss).label("losses"),
+            func.sum(picks.c.is_bozo).label("bozos"),
+            func.sum(picks.c.is_push).label("pushes"),
+            func.sum(picks.c.is_void).label("voids")
+        )
+        .where(picks.c.category.is_not(None))
+        .group_by(*key)
+    )
+
+def season_streak_query(season_id: int):
+    # A win streak is the number of wins between two losses, so wins are grouped by
+    # the running count of losses. Loss and BOZO streaks only end on a win, so they
+    # are grouped by the running count of wins. Pushes and voids fall into whichever
+    # island they land in without counting towards it, matching PickCategoryCounter.
+    picks = _categorized_picks(season_id)
+    key = _key_columns(picks)
+    ordering = [picks.c.parlay_order, picks.c.pick_id]
+    windowed = (
+        select(
+            *key,
+            picks.c.is_win,
+            picks.c.is_loss,
+            picks.c.is_bozo,
+            func.sum(picks.c.is_win).over(partition_by=key, order_by=ordering).label("win_grp"),
+            func.sum(picks.c.is_loss).over(partition_by=key, order_by=ordering).label("loss_grp")
+        )
+        .where(picks.c.category.is_not(None))
+        .subquery("windowed_picks")
+    )
+    windowed_key = _key_columns(windowed)
+
+    win_islands = (
+        select(
+            *windowed_key,
+            windowed.c.loss_grp.label("grp"),
+            func.max(windowed.c.loss_grp).over(partition_by=windowed_key).label("last_grp"),
+            func.sum(windowed.c.is_win).label("wins"),
+            literal_column("0").label("losses"),
+            literal_column("0").label("bozos")
+        )
+        .group_by(*windowed_key, windowed.c.loss_grp)
+    )
+    loss_islands = (
+        select(
+            *windowed_key,
+            windowed.c.win_grp.label("grp"),
+            func.max(windowed.c.win_grp).over(partition_by=windowed_key).label("last_grp"),
+            literal_column("0").label("wins"),
+            func.sum(windowed.c.is_loss).label("losses"),
+            func.sum(windowed.c.is_bozo).label("bozos")
+        )
+        .group_by(*windowed_key, windowed.c.win_grp)
+    )
+    islands = union_all(win_islands, loss_islands).subquery("streak_islands")
+    islands_key = _key_columns(islands)
+    is_last = islands.c.grp == islands.c.last_grp
+    return (
+        select(
+            *islands_key,
+            func.max(islands.c.wins).label("longest_win_streak"),
+            func.max(islands.c.losses).label("longest_loss_streak"),
+            func.max(islands.c.bozos).label("longest_bozo_streak"),
+            func.max(case((is_last, islands.c.wins), else_=0)).label("curr_win_streak"),
+            func.max(case((is_last, islands.c.losses), else_=0)).label("curr_loss_streak"),
+            func.max(case((is_last, islands.c.bozos), else_=0)).label("curr_bozo_streak")
+        )
+        .group_by(*islands_key)
+    )
+
+def season_veto_pairs_query(season_id: int):
+    # Mirrors pick_veto_pair_from_parlay: a gambler's approved veto is paired with
+    # their own pick in the same parlay
+    own_pick = aliased(Pick)
+    vetoed_pick = aliased(Pick)
+    return (
+        select(
+            own_pick.id, own_pick.gambler_id, own_pick.prop_bet_target_id, own_pick.prop_type,
+            own_pick.direction, own_pick.sauce_factor, own_pick.result,
+            PropBetTarget.player_name, PropBetTarget.team_name,
+            PickVeto.id, PickVeto.approval_status, PickVeto.result
+        )
+        .select_from(Parlay)
+        .join(own_pick, own_pick.parlay_id == Parlay.id)
+        .join(PropBetTarget, PropBetTarget.id == own_pick.prop_bet_target_id)
+        .join(vetoed_pick, vetoed_pick.parlay_id == Parlay.id)
+        .join(PickVeto, and_(
+            PickVeto.pick_id == vetoed_pick.id,
+            PickVeto.gambler_id == own_pick.gambler_id,
+            PickVeto.approval_status == VetoApprovalStatus.APPROVED
+        ))
+        .where(_closed_season_parlay(season_id))
+        .order_by(Parlay.order, Parlay.id, own_pick.id, PickVeto.id)
+    )
+
+def _get_counter(calculator: GamblerMetricsCalculator, prop_type: PropBetType | None, target_id: int | None) -> MetricCounter:
+    if prop_type is not None:
+        return calculator.mc.prop_types.setdefault(prop_type, MetricCounter(prop_types=None, prop_targets=None))
+    if target_id is not None:
+        return calculator.mc.prop_targets.setdefault(target_id, MetricCounter(prop_types=None, prop_targets=None))
+    return calculator.mc
+
+async def sql_calculator_dict(gambler_ids: list[int], season_id: int, db: AsyncSession) -> dict[int, GamblerMetricsCalculator]:
+    calculators = {gambler_id: GamblerMetricsCalculator() for gambler_id in gambler_ids}
+    pick_counters: dict[CounterKey, PickCategoryCounter] = {}
+
+    for gambler_id, prop_type, target_id, category, total, wins, losses, bozos, pushes, voids in (await db.execute(season_count_query(season_id))).all():
+        calculator = calculators.get(gambler_id)
+        if calculator is None:
+            continue
+        counter: PickCategoryCounter = getattr(_get_counter(calculator, prop_type, target_id), category)
+        counter.total = total
+        counter.wins = wins
+        counter.losses = losses
+        counter.bozos = bozos
+        counter.pushes = pushes
+        counter.voids = voids
+        pick_counters[(gambler_id, prop_type, target_id, category)] = counter
+
+    for gambler_id, prop_type, target_id, category, *streaks in (await db.execute(season_streak_query(season_id))).all():
+        counter = pick_counters.get((gambler_id, prop_type, target_id, category))
+        if counter is None:
+            continue
+        (
+            counter.longest_win_streak, counter.longest_loss_streak, counter.longest_bozo_streak,
+            counter.curr_win_streak, counter.curr_loss_streak, counter.curr_bozo_streak
+        ) = streaks
+
+    for row in (await db.execute(season_veto_pairs_query(season_id))).all():
+        (
+            pick_id, gambler_id, target_id, prop_type, direction, sauce_factor, pick_result,
+            player_name, team_name,
+            veto_id, approval_status, veto_result
+        ) = row
+        calculator = calculators.get(gambler_id)
+        if calculator is None:
+            continue
+        pick = PickRecord(
+            id=pick_id,
+            gambler_id=gambler_id,
+            prop_bet_target_id=target_id,
+            prop_type=prop_type,
+            direction=direction,
+            sauce_factor=sauce_factor,
+            result=pick_result,
+            prop_bet_target=PropBetTargetRecord(player_name=player_name, team_name=team_name)
+        )
+        veto = PickVetoRecord(id=veto_id, gambler_id=gambler_id, approval_status=approval_status, result=veto_result)
+        calculator.mc.process_veto_pv_pair(PickVetoPair(pick=pick, veto=veto))
+
+    target_ids = {target_id for calculator in calculators.values() for target_id in calculator.mc.prop_targets}
+    if target_ids:
+        target_names = {
+            target_id: player_name or team_name
+            for target_id, player_name, team_name in (await db.execute(
+                select(PropBetTarget.id, PropBetTarget.player_name, PropBetTarget.team_name)
+                .where(PropBetTarget.id.in_(target_ids))
+            )).all()
+        }
+        for calculator in calculators.values():
+            calculator._target_names = {target_id: target_names[target_id] for target_id in calculator.mc.prop_targets}
+
+    return calculators
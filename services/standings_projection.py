@@ -0,0 +1,234 @@
+from dataclasses import dataclass
+from typing import *
+
+import numpy as np
+
+from models import PropBetType
+from .common import ProjectedGamblerStanding
+from .metric_calculator import GamblerMetricsCalculator
+from .metric_counter import PickCategoryCounter
+from .score_correctors.rule_based_score_corrector import RuleBasedScoreCorrector, ScoreCorrectionRule, RuleComparison, RuleTiePolicy
+from .season_performance_calculator import calc_corrected_score
+
+# Monte Carlo projection of final standings. Each simulated future pick draws a
+# (prop type, sauce factor, outcome) cell from the gambler's historical counts, the
+# finalize_parlay_results rule turns a parlay's single incorrect pick into a BOZO, and
+# the season's score correction rules are applied to the projected totals. Every
+# step is vectorized over all simulated seasons of a chunk at once.
+
+NO_PICK = -1
+WIN = 0
+INCORRECT = 1
+PUSH = 2
+VOID = 3
+
+NO_SAUCE = 0
+SPICY = 1
+BITCH = 2
+
+SIMULATED_FIELDS = ["total", "wins", "losses", "bozos", "pushes", "voids"]
+# Metric paths (minus the final field) that the simulation tracks, mapped to the
+# MetricCounter attribute holding the current value. Rules on other metrics are held
+# at their current value.
+SIMULATED_CATEGORIES = {
+    ("overall",): "overall",
+    ("TD",): "TD",
+    ("non_TD",): "non_TD",
+    ("sauce_factor", "spicy"): "spicy",
+    ("sauce_factor", "bitch"): "bitch",
+}
+
+@dataclass
+class GamblerPickDistribution:
+    participation: float
+    cell_probs: np.ndarray
+    cell_outcomes: np.ndarray
+    cell_sauces: np.ndarray
+    cell_is_TD: np.ndarray
+
+    @classmethod
+    def from_calculator(cls, calculator: GamblerMetricsCalculator, closed_parlay_count: int):
+        probs: list[int] = []
+        outcomes: list[int] = []
+        sauces: list[int] = []
+        is_TD: list[bool] = []
+        for prop_type, counter in (calculator.mc.prop_types or {}).items():
+            no_sauce = PickCategoryCounter(
+                wins=counter.overall.wins - counter.spicy.wins - counter.bitch.wins,
+                losses=counter.overall.losses - counter.spicy.losses - counter.bitch.losses,
+                pushes=counter.overall.pushes - counter.spicy.pushes - counter.bitch.pushes,
+                voids=counter.overall.voids - counter.spicy.voids - counter.bitch.voids
+            )
+            for sauce, sauce_counter in [(NO_SAUCE, no_sauce), (SPICY, counter.spicy), (BITCH, counter.bitch)]:
+                for outcome, count in [(WIN, sauce_counter.wins), (INCORRECT, sauce_counter.losses), (PUSH, sauce_counter.pushes), (VOID, sauce_counter.voids)]:
+                    if count > 0:
+                        probs.append(count)
+                        outcomes.append(outcome)
+                        sauces.append(sauce)
+                        is_TD.append(prop_type == PropBetType.TDS)
+
+        total = sum(probs)
+        participation = 0 if total == 0 or closed_parlay_count == 0 else min(1, total / closed_parlay_count)
+        return cls(
+            participation=participation,
+            cell_probs=np.array(probs, dtype=float) / max(total, 1),
+            cell_outcomes=np.array(outcomes, dtype=np.int8),
+            cell_sauces=np.array(sauces, dtype=np.int8),
+            cell_is_TD=np.array(is_TD, dtype=bool)
+        )
+
+@dataclass
+class ProjectionInputs:
+    gambler_ids: list[int]
+    distributions: list[GamblerPickDistribution]
+    # category -> field -> current value per gambler
+    current_counts: dict[str, dict[str, np.ndarray]]
+    rules: list[ScoreCorrectionRule]
+    # rule identifier -> current value per gambler, for rules the simulation can't move
+    fixed_rule_values: dict[str, np.ndarray]
+    remaining_parlays: int
+
+    @classmethod
+    def from_calculators(
+            cls,
+            calculators: dict[int, GamblerMetricsCalculator],
+            score_corrector_class: type[RuleBasedScoreCorrector],
+            closed_parlay_count: int,
+            remaining_parlays: int
+        ):
+        gambler_ids = list(calculators.keys())
+        current_counts = {
+            category: {
+                field: np.array([getattr(getattr(calculators[g].mc, category), field) for g in gambler_ids])
+                for field in SIMULATED_FIELDS
+            }
+            for category in SIMULATED_CATEGORIES.values()
+        }
+        base_metrics = [calculators[g].get_base_metrics() for g in gambler_ids]
+        return cls(
+            gambler_ids=gambler_ids,
+            distributions=[GamblerPickDistribution.from_calculator(calculators[g], closed_parlay_count) for g in gambler_ids],
+            current_counts=current_counts,
+            rules=list(score_corrector_class.rules),
+            fixed_rule_values={
+                rule.identifier: np.array([rule.value(m) for m in base_metrics], dtype=float)
+                for rule in score_corrector_class.rules
+                if simulated_rule_target(rule) is None
+            },
+            remaining_parlays=remaining_parlays
+        )
+
+def simulated_rule_target(rule: ScoreCorrectionRule) -> tuple[str, str] | None:
+    *path, field = rule.metric_path
+    category = SIMULATED_CATEGORIES.get(tuple(path))
+    if category is None or field not in SIMULATED_FIELDS:
+        return None
+    return category, field
+
+def simulate_standings_chunk(inputs: ProjectionInputs, simulations: int, seed: np.random.SeedSequence) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    shape = (simulations, inputs.remaining_parlays)
+    gambler_count = len(inputs.gambler_ids)
+    if gambler_count == 0:
+        # Nobody to rank, and the rules below can't take a max over no gamblers
+        return np.zeros((simulations, 0)), np.zeros((simulations, 0), dtype=int)
+
+    outcomes = np.full((gambler_count, *shape), NO_PICK, dtype=np.int8)
+    sauces = np.zeros((gambler_count, *shape), dtype=np.int8)
+    is_TD = np.zeros((gambler_count, *shape), dtype=bool)
+    for i, distribution in enumerate(inputs.distributions):
+        if distribution.participation == 0:
+            continue
+        cells = rng.choice(len(distribution.cell_probs), size=shape, p=distribution.cell_probs)
+        participates = rng.random(shape) < distribution.participation
+        outcomes[i] = np.where(participates, distribution.cell_outcomes[cells], NO_PICK)
+        sauces[i] = distribution.cell_sauces[cells]
+        is_TD[i] = distribution.cell_is_TD[cells]
+
+    incorrect = outcomes == INCORRECT
+    # A parlay missed by exactly one pick makes that pick a BOZO
+    bozos = incorrect & (incorrect.sum(axis=0) == 1)
+
+    has_pick = outcomes != NO_PICK
+    category_masks = {
+        "overall": has_pick,
+        "TD": has_pick & is_TD,
+        "non_TD": has_pick & ~is_TD,
+        "spicy": has_pick & (sauces == SPICY),
+        "bitch": has_pick & (sauces == BITCH),
+    }
+    field_masks = {
+        "total": has_pick,
+        "wins": outcomes == WIN,
+        "losses": incorrect,
+        "bozos": bozos,
+        "pushes": outcomes == PUSH,
+        "voids": outcomes == VOID,
+    }
+    # category -> field -> (simulations, gamblers)
+    totals = {
+        category: {
+            field: (category_mask & field_mask).sum(axis=2).T + inputs.current_counts[category][field]
+            for field, field_mask in field_masks.items()
+        }
+        for category, category_mask in category_masks.items()
+    }
+
+    overall = totals["overall"]
+    decided = overall["total"] - overall["pushes"] - overall["voids"]
+    win_rates = np.round(100 * overall["wins"] / np.maximum(decided, 1), 2)
+
+    adjustments = np.zeros((simulations, gambler_count))
+    for rule in inputs.rules:
+        target = simulated_rule_target(rule)
+        if target is None:
+            values = np.broadcast_to(inputs.fixed_rule_values[rule.identifier], (simulations, gambler_count))
+        else:
+            category, field = target
+            values = totals[category][field]
+        best = values.max(axis=1) if rule.comparison == RuleComparison.MAX else values.min(axis=1)
+        leaders = values == best[:, None]
+        if rule.require_nonzero:
+            leaders &= (best != 0)[:, None]
+        if rule.tie_policy == RuleTiePolicy.NONE:
+            leaders &= (leaders.sum(axis=1) == 1)[:, None]
+        adjustments += leaders * rule.adjustment
+
+    scores = np.where(decided > 0, win_rates + adjustments, 0)
+    # Competition ranking: 1 + the number of gamblers with a strictly higher score
+    ranks = 1 + (scores[:, None, :] > scores[:, :, None]).sum(axis=2)
+    return scores, ranks
+
+def summarize_projection(
+        inputs: ProjectionInputs,
+        current_scores: dict[int, float],
+        chunks: list[tuple[np.ndarray, np.ndarray]]
+    ) -> dict[int, ProjectedGamblerStanding]:
+    scores = np.concatenate([s for s, _ in chunks])
+    ranks = np.concatenate([r for _, r in chunks])
+    gambler_count = len(inputs.gambler_ids)
+    percentiles = np.percentile(scores, [10, 50, 90], axis=0)
+    standings: dict[int, ProjectedGamblerStanding] = {}
+    for i, gambler_id in enumerate(inputs.gambler_ids):
+        rank_counts = np.bincount(ranks[:, i] - 1, minlength=gambler_count)
+        standings[gambler_id] = ProjectedGamblerStanding(
+            gambler_id=gambler_id,
+            current_corrected_score=current_scores[gambler_id],
+            mean_corrected_score=round(float(scores[:, i].mean()), 2),
+            p10_corrected_score=round(float(percentiles[0, i]), 2),
+            p50_corrected_score=round(float(percentiles[1, i]), 2),
+            p90_corrected_score=round(float(percentiles[2, i]), 2),
+            expected_rank=round(float(ranks[:, i].mean()), 2),
+            rank_probabilities=[round(float(c), 4) for c in rank_counts / len(ranks)]
+        )
+    return standings
+
+def current_corrected_scores(calculators: dict[int, GamblerMetricsCalculator], score_corrector_class: type[RuleBasedScoreCorrector]):
+    base_metrics = {gambler_id: calculator.get_base_metrics() for gambler_id, calculator in calculators.items()}
+    leaderboard = score_corrector_class.create_leaderboard()
+    for gambler_id, metrics in base_metrics.items():
+        leaderboard.update(gambler_id, metrics)
+    return {
+        gambler_id: calc_corrected_score(metrics.overall.win_rate, leaderboard.adjustments(gambler_id))
+        for gambler_id, metrics in base_metrics.items()
+    }
@@ -0,0 +1,204 @@
+import asyncio
+import atexit
+import json
+import os
+import tempfile
+import unittest
+from contextlib import AsyncExitStack
+from typing import *
+from urllib.parse import urlencode
+
+# The app reads its configuration when it's imported, so this comes first. The tests
+# seed (and drop every table of) their own scratch database, never DATABASE_URL.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{SCRATCH_DIR}/app.db"
+os.environ.setdefault("SECRET", "app-tests-secret-0123456789abcdef")
+os.environ["QUERY_BUDGET_MODE"] = "enforce"
+os.environ["METRICS_EXECUTOR"] = "inline"
+os.environ["INVALIDATION_BACKEND"] = "in_process"
+# The first seeded gambler, see benchmarks.load_harness
+ADMIN_USERNAME = "load0"
+os.environ["ADMIN_USERNAMES"] = ADMIN_USERNAME
+
+from benchmarks.load_harness import PASSWORD, SeededSeason, seed_database
+from benchmarks.synthetic_season import SyntheticSeasonConfig
+from database import DATABASE_URL, engine
+from main import app
+from utils.query_budget import QueryLog, record_queries
+
+# Calls the app in-process, without a server or an HTTP client. Every test module
+# shares one seeded season and one running app: the app's caches outlive a reseed, so
+# tests add the parlays they need to the season instead of starting from scratch.
+
+SEASON_CONFIG = SyntheticSeasonConfig(gamblers=6, parlays=40, seed=7)
+
+class Response(NamedTuple):
+    status: int
+    body: Any
+    query_log: QueryLog
+    headers: dict[str, str]
+
+async def call_app(
+    method: str,
+    path: str,
+    token: str | None,
+    json_body: Any,
+    params: dict[str, Any] | None,
+    extra_headers: dict[str, str] | None = None
+) -> tuple[int, dict[str, str], Any]:
+    body = json.dumps(json_body).encode() if json_body is not None else b""
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if token is not None:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    headers.extend((name.lower().encode(), value.encode()) for name, value in (extra_headers or {}).items())
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("test", 80),
+    }
+    request_messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+    response_headers: dict[str, str] = {}
+    chunks: list[bytes] = []
+
+    async def receive():
+        if request_messages:
+            return request_messages.pop()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update((name.decode(), value.decode()) for name, value in message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    content = b"".join(chunks)
+    try:
+        return status, response_headers, json.loads(content)
+    except ValueError:
+        return status, response_headers, content.decode()
+
+async def recorded_call(
+    method: str,
+    path: str,
+    token: str | None,
+    json_body: Any,
+    params: dict[str, Any] | None,
+    extra_headers: dict[str, str] | None = None
+) -> Response:
+    with record_queries() as query_log:
+        status, headers, body = await call_app(method, path, token, json_body, params, extra_headers)
+    return Response(status, body, query_log, headers)
+
+class RunningApp(NamedTuple):
+    runner: asyncio.Runner
+    seeded: SeededSeason
+    # gambler id -> token of the user behind them
+    tokens: dict[int, str]
+
+_running_app: RunningApp | None = None
+
+def running_app() -> RunningApp:
+    # Seeds the season and starts the app on first use, stops it when the tests exit
+    global _running_app
+    if _running_app is None:
+        runner = asyncio.Runner()
+        seeded = runner.run(seed_database(DATABASE_URL, SEASON_CONFIG, open_parlays_per_gambler=2, building_parlays=3))
+        lifespan = AsyncExitStack()
+        runner.run(lifespan.enter_async_context(app.router.lifespan_context(app)))
+
+        def stop():
+            runner.run(lifespan.aclose())
+            runner.run(engine.dispose())
+            runner.close()
+        atexit.register(stop)
+
+        tokens = {}
+        for username, gambler_id in seeded.gamblers.items():
+            status, _, body = runner.run(call_app("POST", "/login", None, {"username": username, "password": PASSWORD}, None))
+            assert status == 200, body
+            tokens[gambler_id] = body["token"]
+        _running_app = RunningApp(runner, seeded, tokens)
+    return _running_app
+
+class AppTestCase(unittest.TestCase):
+    runner: asyncio.Runner
+    seeded: SeededSeason
+    tokens: dict[int, str]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.runner, cls.seeded, cls.tokens = running_app()
+
+    @property
+    def season_id(self):
+        return self.seeded.season_id
+
+    @property
+    def gambler_ids(self):
+        return list(self.tokens)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        gambler_id: int | None = None,
+        json_body: Any = None,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None
+    ) -> Response:
+        token = self.tokens[gambler_id if gambler_id is not None else self.gambler_ids[0]]
+        return self.runner.run(recorded_call(method, path, token, json_body, params, headers))
+
+    def ok(self, method: str, path: str, gambler_id: int | None = None, json_body: Any = None, params: dict[str, Any] | None = None) -> Any:
+        # For setting up a test, not checked against a budget
+        response = self.request(method, path, gambler_id, json_body, params)
+        self.assertEqual(response.status, 200, response.body)
+        return response.body
+
+    def target(self, identifier: str):
+        return {"identifier": identifier, "team_name": "Team 1", "player_name": f"Player {identifier}"}
+
+    def pick_body(self, gambler_id: int, parlay_id: int, identifier: str):
+        return {
+            "gambler_id": gambler_id,
+            "parlay_id": parlay_id,
+            "target": self.target(identifier),
+            "direction": "Over",
+            "line": 1.5,
+            "sauce_factor": None,
+            "prop_type": "Receptions",
+        }
+
+    def new_parlay(self, owner_id: int, pickers: Iterable[int] = ()) -> dict:
+        parlay_id = self.ok("POST", "/parlays/", owner_id, json_body={
+            "gambling_season_id": self.season_id,
+            "competition_date": "2025-12-25",
+            "slate_type": "Xmas",
+            "wager_pp": 5,
+            "owner_id": owner_id,
+        })["parlay"]["id"]
+        for gambler_id in pickers:
+            identifier = self.seeded.target_identifiers[gambler_id % len(self.seeded.target_identifiers)]
+            self.ok("POST", "/picks/", gambler_id, json_body=self.pick_body(gambler_id, parlay_id, identifier))
+        return self.ok("GET", f"/parlays/{parlay_id}", owner_id)["parlay"]
+
+    def open_parlay(self, owner_id: int, pickers: Iterable[int]) -> dict:
+        parlay = self.new_parlay(owner_id, pickers)
+        return self.ok("POST", f"/parlays/{parlay['id']}/lock", owner_id, json_body={"pick_overrides": {}})["parlay"]
+
+    def grade(self, parlay: dict):
+        for pick in parlay["picks"]:
+            self.ok("POST", f"/picks/{pick['id']}/result", parlay["owner_id"], json_body={"result": "Win"})
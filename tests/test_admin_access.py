@@ -0,0 +1,14 @@
+from app_harness import ADMIN_USERNAME, AppTestCase
+
+# Operational endpoints are for the usernames in ADMIN_USERNAMES only
+
+class AdminAccessTest(AppTestCase):
+
+    def test_admin_only_routes(self):
+        admin_id = self.seeded.gamblers[ADMIN_USERNAME]
+        gambler_id = next(gambler_id for gambler_id in self.gambler_ids if gambler_id != admin_id)
+        for path in ("/gambling_seasons/cache_stats", "/admin/profiles"):
+            with self.subTest(path):
+                response = self.request("GET", path, gambler_id)
+                self.assertEqual(response.status, 403, response.body)
+                self.ok("GET", path, admin_id)
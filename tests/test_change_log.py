@@ -0,0 +1,105 @@
+from sqlalchemy import select
+
+from app_harness import AppTestCase
+from database import async_session, write_session
+from models import ChangeEntityType, SeasonChange
+from services.change_log import compact_season_changes
+
+# Clients poll /changes with the cursor of their last poll and apply what comes back
+# instead of refetching the season, so the log has to name every parlay a change
+# touched, whatever the handler that made it.
+
+class SeasonChangeLogTest(AppTestCase):
+
+    def poll(self, since: int, limit: int = 1000) -> dict:
+        return self.ok("GET", f"/gambling_seasons/{self.season_id}/changes", params={"since": since, "limit": limit})
+
+    def cursor(self) -> int:
+        batch = self.poll(0)
+        while batch["has_more"]:
+            batch = self.poll(batch["cursor"])
+        return batch["cursor"]
+
+    def changed_parlay_ids(self, since: int) -> list[int]:
+        batch = self.poll(since)
+        self.assertFalse(batch["has_more"])
+        return [parlay["id"] for parlay in batch["parlays"]]
+
+    def test_poll_returns_parlays_changed_since_cursor(self):
+        owner_id, picker_id, vetoer_id = self.gambler_ids[:3]
+        untouched, picked, edited, vetoed = (self.new_parlay(owner_id, [owner_id]) for _ in range(4))
+        since = self.cursor()
+
+        created = self.new_parlay(owner_id)
+        self.ok("POST", "/picks/", picker_id, json_body=self.pick_body(picker_id, picked["id"], "change-log-pick"))
+        self.ok("PATCH", "/parlays/", owner_id, json_body={
+            "parlay_id": edited["id"], "competition_date": None, "slate_type": "MNF", "owner_id": None, "wager_pp": None
+        })
+        self.ok("POST", "/vetoes/", vetoer_id, json_body={"pick_id": vetoed["picks"][0]["id"], "gambler_id": vetoer_id})
+
+        # Oldest change first
+        self.assertEqual(self.changed_parlay_ids(since), [created["id"], picked["id"], edited["id"], vetoed["id"]])
+        self.assertNotIn(untouched["id"], self.changed_parlay_ids(since))
+
+        cursor = self.cursor()
+        self.assertGreater(cursor, since)
+        batch = self.poll(cursor)
+        self.assertEqual((batch["cursor"], batch["parlays"], batch["deleted_parlay_ids"]), (cursor, [], []))
+
+    def test_deleted_parlays_are_listed_as_deleted(self):
+        owner_id = self.gambler_ids[0]
+        parlay = self.new_parlay(owner_id, [owner_id])
+        since = self.cursor()
+        self.ok("DELETE", f"/parlays/{parlay['id']}", owner_id)
+
+        batch = self.poll(since)
+        self.assertEqual(batch["parlays"], [])
+        self.assertEqual(batch["deleted_parlay_ids"], [parlay["id"]])
+        self.assertIn(parlay["id"], self.poll(0)["deleted_parlay_ids"])
+
+    def test_pages_never_split_a_sequence(self):
+        owner_id = self.gambler_ids[1]
+        first, second, third = (self.new_parlay(owner_id) for _ in range(3))
+        since = self.cursor()
+
+        # One commit, so one sequence number for both parlays
+        self.ok("POST", "/parlays/swap_order", owner_id, json_body={"parlay_id_1": first["id"], "parlay_id_2": second["id"]})
+        self.ok("DELETE", f"/parlays/{third['id']}", owner_id)
+
+        page = self.poll(since, limit=1)
+        self.assertEqual(sorted(parlay["id"] for parlay in page["parlays"]), [first["id"], second["id"]])
+        self.assertTrue(page["has_more"])
+        page = self.poll(page["cursor"], limit=1)
+        self.assertEqual((page["parlays"], page["deleted_parlay_ids"], page["has_more"]), ([], [third["id"]], False))
+
+    def test_compaction_keeps_latest_change_of_each_entity(self):
+        owner_id = self.gambler_ids[2]
+        parlay = self.new_parlay(owner_id, [owner_id])
+        since = self.cursor()
+        for slate_type in ("MNF", "TNF", "SNF"):
+            self.ok("PATCH", "/parlays/", owner_id, json_body={
+                "parlay_id": parlay["id"], "competition_date": None, "slate_type": slate_type, "owner_id": None, "wager_pp": None
+            })
+        last_change = self.cursor()
+
+        self.runner.run(self.compact())
+        rows = self.runner.run(self.season_changes())
+        entities = [(row.entity_type, row.entity_id, row.parlay_id) for row in rows]
+        self.assertEqual(len(entities), len(set(entities)))
+        self.assertIn((ChangeEntityType.PARLAY, parlay["id"], parlay["id"], last_change), [(*entity, row.sequence) for entity, row in zip(entities, rows)])
+
+        # Polls from before the compaction still see the parlay, with its latest state
+        batch = self.poll(since)
+        self.assertEqual([p["id"] for p in batch["parlays"]], [parlay["id"]])
+        self.assertEqual(batch["parlays"][0]["slate_type"], "SNF")
+        self.assertEqual(self.cursor(), last_change)
+
+    async def compact(self):
+        async with write_session() as db:
+            await compact_season_changes(self.season_id, db)
+
+    async def season_changes(self) -> list[SeasonChange]:
+        async with async_session() as db:
+            return list((await db.execute(
+                select(SeasonChange).where(SeasonChange.gambling_season_id == self.season_id).order_by(SeasonChange.id)
+            )).scalars().all())
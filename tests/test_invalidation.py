@@ -0,0 +1,69 @@
+import asyncio
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from typing import *
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import Base, CacheInvalidation
+from services.invalidation import DatabasePollingInvalidationBackend, InvalidationBackendMode, InvalidationBus, InvalidationMessage
+
+# Rows in cache_invalidations get their id when they're inserted but become visible
+# to the polling workers when they commit, which on Postgres need not be in id order.
+
+class DatabasePollingInvalidationTest(unittest.TestCase):
+
+    def test_rows_committed_out_of_id_order_are_delivered_once(self):
+        with tempfile.TemporaryDirectory(prefix="invalidation-") as directory:
+            received = asyncio.run(self.poll_out_of_order(f"sqlite+aiosqlite:///{directory}/invalidation.db"))
+        self.assertEqual(received, [[12], [11], [], [13], []])
+
+    async def poll_out_of_order(self, database_url: str) -> list[list[int | None]]:
+        # Returns the seasons delivered by each poll
+        engine = create_async_engine(database_url)
+        try:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+            @asynccontextmanager
+            async def write_session():
+                async with session_factory() as session:
+                    yield session
+
+            async def commit(row_id: int, season_id: int):
+                async with write_session() as db:
+                    db.add(CacheInvalidation(id=row_id, season_id=season_id, version="1", prop_bet_target_ids=[], origin="other-worker"))
+                    await db.commit()
+
+            # Already there when the worker starts, so never delivered to it
+            await commit(10, 10)
+
+            bus = InvalidationBus(InvalidationBackendMode.DATABASE, poll_interval_s=3600)
+            messages: list[InvalidationMessage] = []
+            bus.subscribe(messages.append)
+            backend = DatabasePollingInvalidationBackend(session_factory, write_session, poll_interval_s=3600, reorder_window=5)
+            await backend.start(bus)
+
+            received = []
+            async def poll():
+                messages.clear()
+                await backend.poll_once(bus)
+                received.append([message.season_id for message in messages])
+
+            try:
+                # 11 was inserted first but commits after 12 has been read
+                await commit(12, 12)
+                await poll()
+                await commit(11, 11)
+                await poll()
+                await poll()
+                await commit(13, 13)
+                await poll()
+                await poll()
+            finally:
+                await backend.stop()
+            return received
+        finally:
+            await engine.dispose()
@@ -0,0 +1,113 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app_harness import AppTestCase
+from database import engine
+
+# Parlays and picks carry a version. Clients send the ETags they last saw in If-Match
+# and get a 409 when a row moved on; without If-Match, a row changed between a
+# request's read and its write also ends in a 409, see main.py.
+
+def parlay_etag(parlay: dict):
+    return f'"parlay-{parlay["id"]}.{parlay["version"]}"'
+
+def pick_etag(pick: dict):
+    return f'"pick-{pick["id"]}.{pick["version"]}"'
+
+@contextmanager
+def concurrent_update(table: str, row_id: int):
+    # Bumps the row's version right before the request writes it, as a request that
+    # committed in between would
+    bumped = False
+
+    def bump_version(connection, cursor, statement: str, parameters, context, executemany):
+        nonlocal bumped
+        if not bumped and statement.startswith(f"UPDATE {table} SET"):
+            bumped = True
+            cursor.execute(f"UPDATE {table} SET version_id = version_id + 1 WHERE id = ?", (row_id,))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", bump_version)
+    try:
+        yield
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", bump_version)
+
+class OptimisticConcurrencyTest(AppTestCase):
+
+    def update_parlay_body(self, parlay: dict, slate_type: str):
+        return {"parlay_id": parlay["id"], "competition_date": None, "slate_type": slate_type, "owner_id": None, "wager_pp": None}
+
+    def test_get_parlay_returns_etag(self):
+        owner_id = self.gambler_ids[0]
+        parlay = self.new_parlay(owner_id)
+        response = self.request("GET", f"/parlays/{parlay['id']}", owner_id)
+        self.assertEqual(response.status, 200, response.body)
+        self.assertEqual(response.headers["etag"], parlay_etag(response.body["parlay"]))
+
+    def test_update_parlay_checks_if_match(self):
+        owner_id = self.gambler_ids[0]
+        parlay = self.new_parlay(owner_id)
+        read_etag = parlay_etag(parlay)
+
+        updated = self.ok("PATCH", "/parlays/", owner_id, json_body=self.update_parlay_body(parlay, "MNF"))["parlay"]
+        self.assertEqual(updated["version"], parlay["version"] + 1)
+
+        response = self.request("PATCH", "/parlays/", owner_id, json_body=self.update_parlay_body(parlay, "TNF"), headers={"If-Match": read_etag})
+        self.assertEqual(response.status, 409, response.body)
+        self.assertIn(parlay_etag(updated), response.body["detail"])
+        self.assertEqual(self.ok("GET", f"/parlays/{parlay['id']}", owner_id)["parlay"]["slate_type"], "MNF")
+
+        # The current ETag, also weak or listed with others
+        for if_match in ("{}", "W/{}", '"parlay-0.1", {}'):
+            with self.subTest(if_match=if_match):
+                current = self.ok("GET", f"/parlays/{parlay['id']}", owner_id)["parlay"]
+                response = self.request("PATCH", "/parlays/", owner_id, json_body=self.update_parlay_body(parlay, "TNF"), headers={"If-Match": if_match.format(parlay_etag(current))})
+                self.assertEqual(response.status, 200, response.body)
+        response = self.request("PATCH", "/parlays/", owner_id, json_body=self.update_parlay_body(parlay, "SNF"), headers={"If-Match": "*"})
+        self.assertEqual(response.status, 200, response.body)
+
+    def test_update_pick_checks_if_match(self):
+        owner_id = self.gambler_ids[1]
+        pick = self.new_parlay(owner_id, [owner_id])["picks"][0]
+        updated = self.ok("PATCH", f"/picks/{pick['id']}", owner_id, json_body={"line": 2.5})["pick"]
+
+        response = self.request("PATCH", f"/picks/{pick['id']}", owner_id, json_body={"line": 3.5}, headers={"If-Match": pick_etag(pick)})
+        self.assertEqual(response.status, 409, response.body)
+        response = self.request("PATCH", f"/picks/{pick['id']}", owner_id, json_body={"line": 3.5}, headers={"If-Match": pick_etag(updated)})
+        self.assertEqual(response.status, 200, response.body)
+        self.assertEqual(response.body["pick"]["line"], 3.5)
+
+    def test_swap_parlay_order_checks_both_etags(self):
+        owner_id = self.gambler_ids[2]
+        first, second = self.new_parlay(owner_id), self.new_parlay(owner_id)
+        changed_second = self.ok("PATCH", "/parlays/", owner_id, json_body=self.update_parlay_body(second, "MNF"))["parlay"]
+        body = {"parlay_id_1": first["id"], "parlay_id_2": second["id"]}
+
+        response = self.request("POST", "/parlays/swap_order", owner_id, json_body=body, headers={"If-Match": f"{parlay_etag(first)}, {parlay_etag(second)}"})
+        self.assertEqual(response.status, 409, response.body)
+        self.assertIn(parlay_etag(changed_second), response.body["detail"])
+        self.assertNotIn(parlay_etag(first), response.body["detail"])
+
+        response = self.request("POST", "/parlays/swap_order", owner_id, json_body=body, headers={"If-Match": parlay_etag(first)})
+        self.assertEqual(response.status, 409, response.body)
+
+        response = self.request("POST", "/parlays/swap_order", owner_id, json_body=body, headers={"If-Match": f"{parlay_etag(first)}, {parlay_etag(changed_second)}"})
+        self.assertEqual(response.status, 200, response.body)
+
+    def test_concurrent_parlay_update_is_a_conflict(self):
+        owner_id = self.gambler_ids[3]
+        parlay = self.new_parlay(owner_id)
+        with concurrent_update("parlays", parlay["id"]):
+            response = self.request("PATCH", "/parlays/", owner_id, json_body=self.update_parlay_body(parlay, "MNF"))
+        self.assertEqual(response.status, 409, response.body)
+        self.assertIn("Modified by another request", response.body["detail"])
+        self.assertEqual(self.ok("GET", f"/parlays/{parlay['id']}", owner_id)["parlay"]["slate_type"], parlay["slate_type"])
+
+    def test_concurrent_pick_update_is_a_conflict(self):
+        owner_id = self.gambler_ids[3]
+        pick = self.new_parlay(owner_id, [owner_id])["picks"][0]
+        with concurrent_update("picks", pick["id"]):
+            response = self.request("PATCH", f"/picks/{pick['id']}", owner_id, json_body={"line": 7.5})
+        self.assertEqual(response.status, 409, response.body)
+        self.assertIn("Modified by another request", response.body["detail"])
@@ -0,0 +1,37 @@
+from app_harness import AppTestCase
+
+# Anyone in the season can add and edit picks while a parlay is BUILDING. Once it's
+# locked only its owner can.
+
+class PickPermissionsTest(AppTestCase):
+
+    def test_non_owner_cannot_change_picks_on_open_parlay(self):
+        owner_id, picker_id = self.gambler_ids[0], self.gambler_ids[1]
+        parlay = self.open_parlay(owner_id, [owner_id, picker_id])
+        picker_pick = next(pick for pick in parlay["picks"] if pick["gambler_id"] == picker_id)
+
+        requests = {
+            "create_pick": ("POST", "/picks/", self.pick_body(picker_id, parlay["id"], "late-pick")),
+            "create_picks": ("POST", "/picks/bulk", {"picks": [self.pick_body(picker_id, parlay["id"], "late-bulk-pick")]}),
+            "update_pick": ("PATCH", f"/picks/{picker_pick['id']}", {"line": 4.5}),
+        }
+        for operation_id, (method, path, json_body) in requests.items():
+            with self.subTest(operation_id):
+                response = self.request(method, path, picker_id, json_body=json_body)
+                self.assertEqual(response.status, 500, response.body)
+                self.assertIn("only the owner", response.body["detail"])
+
+        picks = self.ok("GET", f"/parlays/{parlay['id']}", owner_id)["parlay"]["picks"]
+        self.assertEqual(len(picks), 2)
+        self.assertEqual(next(pick for pick in picks if pick["id"] == picker_pick["id"])["line"], picker_pick["line"])
+
+    def test_owner_can_change_picks_on_open_parlay(self):
+        owner_id, picker_id = self.gambler_ids[0], self.gambler_ids[1]
+        parlay = self.open_parlay(owner_id, [owner_id, picker_id])
+        picker_pick = next(pick for pick in parlay["picks"] if pick["gambler_id"] == picker_id)
+        self.ok("PATCH", f"/picks/{picker_pick['id']}", owner_id, json_body={"line": 4.5})
+
+    def test_non_owner_can_change_picks_while_building(self):
+        owner_id, picker_id = self.gambler_ids[0], self.gambler_ids[1]
+        parlay = self.new_parlay(owner_id, [picker_id])
+        self.ok("PATCH", f"/picks/{parlay['picks'][0]['id']}", picker_id, json_body={"line": 4.5})
@@ -0,0 +1,218 @@
+from app_harness import ADMIN_USERNAME, PASSWORD, AppTestCase, Response, recorded_call
+from database import engine
+from main import app
+from utils.query_budget import DEFAULT_QUERY_BUDGET, ROUTE_QUERY_BUDGETS
+
+# Drives every route with a budget in ROUTE_QUERY_BUDGETS through the app in-process
+# and checks the statements it ran against that budget. Budgets count statements per
+# request, so they must not grow with the size of the season: routes that return or
+# touch a variable number of rows are also run at two sizes and must run the same
+# number of statements at both.
+
+class QueryBudgetTest(AppTestCase):
+
+    def assert_within_budget(self, operation_id: str, response: Response):
+        # In enforce mode an overrun also turns the response into a 500 that lists the
+        # statements, so a failing status here can be a budget failure too
+        self.assertEqual(response.status, 200, response.body)
+        budget = ROUTE_QUERY_BUDGETS.get(operation_id, DEFAULT_QUERY_BUDGET)
+        self.assertLessEqual(
+            len(response.query_log), budget,
+            f"{operation_id} ran {len(response.query_log)} statements, over its budget of {budget}:\n{response.query_log.describe()}"
+        )
+
+    def assert_same_statement_count(self, operation_id: str, small: Response, large: Response, extra_inserts: int = 0):
+        # extra_inserts: rows the large request inserts on top of the small one. The ORM
+        # only batches inserts that return generated ids where it can match the returned
+        # rows to its objects, which SQLite doesn't allow, so there each is a statement.
+        self.assert_within_budget(operation_id, small)
+        self.assert_within_budget(operation_id, large)
+        unbatched_inserts = extra_inserts if engine.dialect.name == "sqlite" else 0
+        self.assertEqual(
+            len(small.query_log) + unbatched_inserts, len(large.query_log),
+            f"{operation_id} ran more statements for more rows:\n{large.query_log.describe()}"
+        )
+
+    def test_login(self):
+        username = next(iter(self.seeded.gamblers))
+        response = self.runner.run(recorded_call("POST", "/login", None, {"username": username, "password": PASSWORD}, None))
+        self.assert_within_budget("login", response)
+
+    def test_season_reads(self):
+        season = f"/gambling_seasons/{self.season_id}"
+        reads = {
+            "get_user_gambling_seasons": ("/gambling_seasons/", None),
+            "get_gambling_season": (season, None),
+            "get_season_changes": (f"{season}/changes", None),
+            "get_season_gambler_performances": (f"{season}/gambler_performances", None),
+            "get_season_time_series": (f"/gambling_seasons{self.season_id}/time_series", None),
+            "get_season_dashboard": (f"{season}/dashboard", None),
+            "get_season_projected_standings": (f"{season}/projected_standings", {"remaining_parlays": 5, "simulations": 200}),
+            "get_season_prop_target_leaderboard": (f"{season}/prop_target_leaderboard", None),
+            "get_user_career": ("/users/me/career", None),
+            "search_prop_bet_targets": ("/prop_bet_targets/search", {"q": "Player", "season_id": self.season_id}),
+        }
+        for operation_id, (path, params) in reads.items():
+            with self.subTest(operation_id):
+                self.assert_within_budget(operation_id, self.request("GET", path, params=params))
+
+    def test_season_cache_stats(self):
+        response = self.request("GET", "/gambling_seasons/cache_stats", self.seeded.gamblers[ADMIN_USERNAME])
+        self.assert_within_budget("get_season_cache_stats", response)
+
+    def test_backtest_score_correctors(self):
+        response = self.request("POST", "/gambling_seasons/score_corrector_backtest", json_body={"score_correctors": ["GamblerScoreCorrector2025"]})
+        self.assert_within_budget("backtest_score_correctors", response)
+
+    def test_parlay_lists(self):
+        season = f"/gambling_seasons/{self.season_id}"
+        lists = {
+            "get_season_parlays": (f"{season}/parlays", {}),
+            "get_season_parlay_summaries": (f"{season}/parlay_summaries", {}),
+            "search_parlays": ("/parlays/search", {"gambling_season_id": self.season_id}),
+        }
+        for operation_id, (path, params) in lists.items():
+            with self.subTest(operation_id):
+                # Both pages include parlays with vetoes and votes, so every eager load
+                # runs at both sizes
+                small = self.request("GET", path, params={**params, "limit": 15})
+                large = self.request("GET", path, params={**params, "limit": 45})
+                self.assert_same_statement_count(operation_id, small, large)
+
+    def test_get_parlay(self):
+        owner_id, picker_ids = self.gambler_ids[0], self.gambler_ids[1:]
+        small = self.new_parlay(owner_id, picker_ids[:1])
+        large = self.new_parlay(owner_id, picker_ids)
+        self.assert_same_statement_count(
+            "get_parlay",
+            self.request("GET", f"/parlays/{small['id']}"),
+            self.request("GET", f"/parlays/{large['id']}")
+        )
+
+    def test_parlay_edits(self):
+        owner_id, other_id = self.gambler_ids[1], self.gambler_ids[2]
+        parlay = self.new_parlay(owner_id, [owner_id, other_id])
+        other = self.new_parlay(owner_id)
+
+        self.assert_within_budget("update_parlay", self.request("PATCH", "/parlays/", owner_id, json_body={
+            "parlay_id": parlay["id"], "competition_date": None, "slate_type": "MNF", "owner_id": None, "wager_pp": None
+        }))
+        self.assert_within_budget("swap_parlay_order", self.request("POST", "/parlays/swap_order", owner_id, json_body={
+            "parlay_id_1": parlay["id"], "parlay_id_2": other["id"]
+        }))
+        self.assert_within_budget("claim_parlay", self.request("POST", f"/parlays/{parlay['id']}/claim", other_id, json_body={
+            "gambler_id": other_id
+        }))
+
+    def test_delete_parlay(self):
+        owner_id = self.gambler_ids[1]
+        small = self.new_parlay(owner_id, [owner_id])
+        large = self.new_parlay(owner_id, self.gambler_ids)
+        self.assert_same_statement_count(
+            "delete_parlay",
+            self.request("DELETE", f"/parlays/{small['id']}", owner_id),
+            self.request("DELETE", f"/parlays/{large['id']}", owner_id)
+        )
+
+    def test_create_parlay(self):
+        owner_id = self.gambler_ids[0]
+        response = self.request("POST", "/parlays/", owner_id, json_body={
+            "gambling_season_id": self.season_id, "competition_date": "2025-12-25", "slate_type": "Xmas", "wager_pp": 5, "owner_id": owner_id
+        })
+        self.assert_within_budget("create_parlay", response)
+
+    def test_create_pick(self):
+        owner_id, picker_id = self.gambler_ids[0], self.gambler_ids[1]
+        parlay = self.new_parlay(owner_id)
+        known_target = self.seeded.target_identifiers[0]
+        with self.subTest("known target"):
+            response = self.request("POST", "/picks/", picker_id, json_body=self.pick_body(picker_id, parlay["id"], known_target))
+            self.assert_within_budget("create_pick", response)
+        with self.subTest("new target"):
+            response = self.request("POST", "/picks/", owner_id, json_body=self.pick_body(owner_id, parlay["id"], "new-pick-target"))
+            self.assert_within_budget("create_pick", response)
+
+    def test_create_picks(self):
+        gambler_id = self.gambler_ids[0]
+        small_parlay = self.new_parlay(gambler_id)
+        large_parlay = self.new_parlay(gambler_id)
+        small = self.request("POST", "/picks/bulk", gambler_id, json_body={"picks": [
+            self.pick_body(gambler_id, small_parlay["id"], "bulk-small-0")
+        ]})
+        large = self.request("POST", "/picks/bulk", gambler_id, json_body={"picks": [
+            self.pick_body(gambler_id, large_parlay["id"], f"bulk-large-{i}") for i in range(5)
+        ]})
+        self.assert_same_statement_count("create_picks", small, large, extra_inserts=4)
+
+    def test_create_picks_across_parlays(self):
+        gambler_id = self.gambler_ids[0]
+        small_parlay = self.new_parlay(gambler_id)
+        large_parlays = [self.new_parlay(gambler_id) for _ in range(3)]
+        small = self.request("POST", "/picks/bulk", gambler_id, json_body={"picks": [
+            self.pick_body(gambler_id, small_parlay["id"], f"spread-small-{i}") for i in range(3)
+        ]})
+        large = self.request("POST", "/picks/bulk", gambler_id, json_body={"picks": [
+            self.pick_body(gambler_id, parlay["id"], f"spread-large-{i}") for i, parlay in enumerate(large_parlays)
+        ]})
+        self.assert_same_statement_count("create_picks", small, large)
+
+    def test_update_pick(self):
+        gambler_id = self.gambler_ids[2]
+        pick = self.new_parlay(gambler_id, [gambler_id])["picks"][0]
+        response = self.request("PATCH", f"/picks/{pick['id']}", gambler_id, json_body={"line": 2.5, "target": self.target("updated-pick-target")})
+        self.assert_within_budget("update_pick", response)
+
+    def test_vetoes(self):
+        owner_id, picker_id, vetoer_id = self.gambler_ids[:3]
+        pick = self.new_parlay(owner_id, [picker_id])["picks"][0]
+
+        response = self.request("POST", "/vetoes/", vetoer_id, json_body={"pick_id": pick["id"], "gambler_id": vetoer_id})
+        self.assert_within_budget("create_pick_veto", response)
+        veto_id = response.body["veto"]["id"]
+        self.assert_within_budget("delete_veto", self.request("DELETE", f"/vetoes/{veto_id}", vetoer_id))
+
+    def test_submit_veto_vote(self):
+        for veto_id, (vetoer_id, picker_id) in self.seeded.pending_vetoes.items():
+            voter_id = next(g for g in self.gambler_ids if g not in (vetoer_id, picker_id))
+            response = self.request("POST", f"/vetoes/{veto_id}/vote", voter_id, json_body={"gambler_id": voter_id, "affirmative": True})
+            self.assert_within_budget("submit_veto_vote", response)
+
+    def test_lock_and_unlock_parlay(self):
+        owner_id, vetoer_id = self.gambler_ids[3], self.gambler_ids[4]
+        small = self.new_parlay(owner_id, [owner_id])
+        large = self.new_parlay(owner_id, self.gambler_ids)
+        # Locking settles the parlay's pending veto, of which there's at most one
+        for parlay in (small, large):
+            self.ok("POST", "/vetoes/", vetoer_id, json_body={"pick_id": parlay["picks"][0]["id"], "gambler_id": vetoer_id})
+        locks = [
+            self.request("POST", f"/parlays/{parlay['id']}/lock", owner_id, json_body={"pick_overrides": {}})
+            for parlay in (small, large)
+        ]
+        self.assert_same_statement_count("lock_parlay", *locks)
+        unlocks = [self.request("POST", f"/parlays/{parlay['id']}/unlock", owner_id, json_body={}) for parlay in (small, large)]
+        self.assert_same_statement_count("unlock_parlay", *unlocks)
+
+    def test_open_parlay_picks(self):
+        owner_id = self.gambler_ids[4]
+        parlay = self.open_parlay(owner_id, self.gambler_ids)
+        first, second = parlay["picks"][:2]
+
+        response = self.request("POST", f"/picks/{first['id']}/override", owner_id, json_body={"line": 3.5, "target": self.target("override-pick-target")})
+        self.assert_within_budget("apply_pick_override", response)
+        response = self.request("POST", f"/picks/{second['id']}/result", owner_id, json_body={"result": "Loss"})
+        self.assert_within_budget("update_pick_result", response)
+
+    def test_close_and_reopen_parlay(self):
+        owner_id = self.gambler_ids[5]
+        parlay = self.open_parlay(owner_id, self.gambler_ids)
+        self.grade(parlay)
+
+        response = self.request("POST", f"/parlays/{parlay['id']}/finalize_results", owner_id, json_body={})
+        self.assert_within_budget("finalize_parlay_result", response)
+        response = self.request("POST", f"/parlays/{parlay['id']}/close", owner_id, json_body={"parlay_result": response.body["possible_results"][0]})
+        self.assert_within_budget("close_parlay", response)
+        self.assert_within_budget("reopen_parlay", self.request("POST", f"/parlays/{parlay['id']}/reopen", owner_id, json_body={}))
+
+    def test_budgets_name_routes(self):
+        operation_ids = {getattr(route, "operation_id", None) for route in app.routes}
+        self.assertEqual(set(ROUTE_QUERY_BUDGETS) - operation_ids, set())
@@ -0,0 +1,135 @@
+import unittest
+from typing import *
+
+from benchmarks.synthetic_season import SyntheticSeasonConfig, generate_synthetic_season
+from services.metric_calculator import GamblerBaseMetrics, GamblerMetricsCalculator
+from services.performance_time_series import TimeSeriesCalculator
+from services.score_correctors.rule_based_score_corrector import RuleBasedScoreCorrector, RuleComparison, RuleLeaderboard, RuleTiePolicy, ScoreCorrectionRule
+from services.score_correctors.score_corrector import GamblerScoreCorrector
+from services.score_correctors.score_corrector_2025 import GamblerScoreCorrector2025
+
+# The 2025 awards are declared as rules (services/score_correctors/score_corrector_2025.py).
+# These pin what they award, and check that the time series, which keeps the rule
+# leaders up to date parlay by parlay, agrees with re-running the corrector each time.
+
+def base_metrics(bozos: int = 0, bitch_losses: int = 0, spicy_wins: int = 0) -> GamblerBaseMetrics:
+    metrics = GamblerMetricsCalculator().get_base_metrics()
+    metrics.overall.bozos = bozos
+    metrics.sauce_factor.bitch.losses = bitch_losses
+    metrics.sauce_factor.spicy.wins = spicy_wins
+    return metrics
+
+def awards(corrector: GamblerScoreCorrector) -> dict[int, dict[str, tuple[float, float]]]:
+    # gambler id -> rule -> (associated value, adjustment)
+    awarded: dict[int, dict[str, tuple[float, float]]] = {}
+    for corrections in (corrector.deductions(), corrector.augmentations()):
+        for gambler_id, correction_set in corrections.items():
+            for identifier, correction in correction_set.items():
+                awarded.setdefault(gambler_id, {})[identifier] = (correction.associated_value, correction.adjustment)
+    return awarded
+
+class ScoreCorrector2025Test(unittest.TestCase):
+
+    def test_single_leaders(self):
+        corrector = GamblerScoreCorrector2025(cast(Any, {
+            1: base_metrics(bozos=3, bitch_losses=1, spicy_wins=0),
+            2: base_metrics(bozos=1, bitch_losses=4, spicy_wins=2),
+            3: base_metrics(bozos=0, bitch_losses=0, spicy_wins=5),
+        }))
+        self.assertEqual(awards(corrector), {
+            1: {"most-bozos": (3, -2)},
+            2: {"most-bitch-losses": (4, -2)},
+            3: {"most-spicy-hits": (5, 2)},
+        })
+
+    def test_ties_award_every_leader(self):
+        # Spicy hit ties used to award only the first leader
+        corrector = GamblerScoreCorrector2025(cast(Any, {
+            1: base_metrics(bozos=2, spicy_wins=3),
+            2: base_metrics(bozos=2, spicy_wins=3),
+            3: base_metrics(bozos=1, spicy_wins=1),
+        }))
+        self.assertEqual(awards(corrector), {
+            1: {"most-bozos": (2, -2), "most-spicy-hits": (3, 2)},
+            2: {"most-bozos": (2, -2), "most-spicy-hits": (3, 2)},
+        })
+
+    def test_nothing_awarded_for_a_zero_lead(self):
+        corrector = GamblerScoreCorrector2025(cast(Any, {gambler_id: base_metrics() for gambler_id in (1, 2, 3)}))
+        self.assertEqual(awards(corrector), {})
+
+class RuleEngineTest(unittest.TestCase):
+
+    def corrector(self, rule: ScoreCorrectionRule, values: dict[int, int]) -> GamblerScoreCorrector:
+        class Corrector(RuleBasedScoreCorrector):
+            rules = [rule]
+        return Corrector(cast(Any, {gambler_id: base_metrics(bozos=value) for gambler_id, value in values.items()}))
+
+    def rule(self, **kwargs: Any) -> ScoreCorrectionRule:
+        return ScoreCorrectionRule(**{
+            "identifier": "bozos",
+            "name": "Bozos",
+            "metric_path": ("overall", "bozos"),
+            "comparison": RuleComparison.MAX,
+            "adjustment": 1,
+            **kwargs
+        })
+
+    def test_require_nonzero(self):
+        self.assertEqual(awards(self.corrector(self.rule(), {1: 0, 2: 0})), {})
+        self.assertEqual(
+            awards(self.corrector(self.rule(require_nonzero=False), {1: 0, 2: 0})),
+            {1: {"bozos": (0, 1)}, 2: {"bozos": (0, 1)}}
+        )
+
+    def test_min_comparison(self):
+        rule = self.rule(comparison=RuleComparison.MIN, require_nonzero=False)
+        self.assertEqual(awards(self.corrector(rule, {1: 4, 2: 1, 3: 2})), {2: {"bozos": (1, 1)}})
+
+    def test_tie_policy_none(self):
+        rule = self.rule(tie_policy=RuleTiePolicy.NONE)
+        self.assertEqual(awards(self.corrector(rule, {1: 3, 2: 3, 3: 1})), {})
+        self.assertEqual(awards(self.corrector(rule, {1: 3, 2: 4, 3: 1})), {2: {"bozos": (4, 1)}})
+
+    def test_leader_falling_behind(self):
+        leaderboard = RuleLeaderboard([self.rule()])
+        for gambler_id, value in {1: 5, 2: 3, 3: 3}.items():
+            leaderboard.update(gambler_id, base_metrics(bozos=value))
+        leaderboard.update(1, base_metrics(bozos=2))
+        self.assertEqual(set(leaderboard.corrections(deductions=False)), {2, 3})
+        self.assertEqual([leaderboard.adjustments(gambler_id) for gambler_id in (1, 2, 3)], [[], [1], [1]])
+
+class FullRecomputeScoreCorrector2025(GamblerScoreCorrector):
+    # Not rule-based, so TimeSeriesCalculator re-runs it over every gambler's metrics
+    # after each parlay instead of updating the rule leaders
+
+    def __init__(self, gambler_metrics: dict[int, Any]) -> None:
+        self.corrector = GamblerScoreCorrector2025(gambler_metrics)
+
+    def deductions(self):
+        return self.corrector.deductions()
+
+    def augmentations(self):
+        return self.corrector.augmentations()
+
+class IncrementalTimeSeriesTest(unittest.TestCase):
+
+    def test_matches_full_recompute(self):
+        for config in (
+            SyntheticSeasonConfig(gamblers=6, parlays=60, seed=0),
+            SyntheticSeasonConfig(gamblers=3, parlays=40, seed=1, participation=0.5),
+            SyntheticSeasonConfig(gamblers=8, parlays=80, seed=2, veto_rate=0.3),
+        ):
+            with self.subTest(seed=config.seed):
+                season = generate_synthetic_season(config)
+                parlays = cast(Any, season.parlays)
+                incremental = TimeSeriesCalculator(season.gambler_ids, parlays, GamblerScoreCorrector2025).create_time_series()
+                full = TimeSeriesCalculator(season.gambler_ids, parlays, FullRecomputeScoreCorrector2025).create_time_series()
+
+                self.assertEqual(incremental.keys(), full.keys())
+                corrected = 0
+                for gambler_id, data in full.items():
+                    self.assertEqual([d.model_dump() for d in incremental[gambler_id]], [d.model_dump() for d in data], f"gambler {gambler_id}")
+                    corrected += sum(d.corrected_score != (d.metrics.overall.win_rate or 0) for d in data)
+                # The seasons do award corrections along the way
+                self.assertGreater(corrected, 0)
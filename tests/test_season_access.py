@@ -0,0 +1,38 @@
+from app_harness import AppTestCase
+from database import write_session
+from models import GamblingSeason, GamblingSeasonState
+
+# Season data is only for the season's gamblers, whatever the route
+
+class SeasonAccessTest(AppTestCase):
+    other_season_id: int
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.other_season_id = cls.runner.run(cls.create_season())
+
+    @staticmethod
+    async def create_season() -> int:
+        # A season none of the seeded users gamble in
+        async with write_session() as db:
+            season = GamblingSeason(year=2024, name="Other season", state=GamblingSeasonState.IN_PROGRESS)
+            db.add(season)
+            await db.commit()
+            return season.id
+
+    def test_non_gamblers_are_refused(self):
+        season = f"/gambling_seasons/{self.other_season_id}"
+        reads = {
+            "get_season_parlay_summaries": (f"{season}/parlay_summaries", None),
+            "get_season_changes": (f"{season}/changes", None),
+            "get_season_dashboard": (f"{season}/dashboard", None),
+            "get_season_projected_standings": (f"{season}/projected_standings", {"remaining_parlays": 5, "simulations": 10}),
+            "get_season_prop_target_leaderboard": (f"{season}/prop_target_leaderboard", None),
+            "search_parlays": ("/parlays/search", {"gambling_season_id": self.other_season_id}),
+            "search_prop_bet_targets": ("/prop_bet_targets/search", {"q": "Player", "season_id": self.other_season_id}),
+        }
+        for operation_id, (path, params) in reads.items():
+            with self.subTest(operation_id):
+                response = self.request("GET", path, params=params)
+                self.assertEqual(response.status, 403, response.body)
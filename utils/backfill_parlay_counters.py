@@ -0,0 +1,25 @@
+import asyncio
+
+from sqlalchemy import select
+
+from database import async_session, write_session
+from models import GamblingSeason
+from services.parlay_counters import refresh_season_parlay_counters
+
+# Parlay.pick_count, graded_count and pending_veto are kept up to date by every write
+# from the moment the columns exist. Run this once after adding them to fill them in
+# for the parlays already in the database:
+#
+#   python -m utils.backfill_parlay_counters
+
+async def backfill():
+    async with async_session() as db:
+        season_ids = (await db.execute(select(GamblingSeason.id).order_by(GamblingSeason.id))).scalars().all()
+    # One season per transaction, so writers are never held up for long
+    for season_id in season_ids:
+        async with write_session() as db:
+            await refresh_season_parlay_counters(season_id, db)
+        print(f"Recounted the parlays of season {season_id}")
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
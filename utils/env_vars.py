@@ -4,6 +4,35 @@ import os
 class EnvVarName(StrEnum):
     SECRET="SECRET"
     DATABASE_URL="DATABASE_URL"
+    METRICS_EXECUTOR="METRICS_EXECUTOR"
+    METRICS_EXECUTOR_WORKERS="METRICS_EXECUTOR_WORKERS"
+    METRICS_EXECUTOR_TIMEOUT_S="METRICS_EXECUTOR_TIMEOUT_S"
+    METRICS_EXECUTOR_MAX_PENDING="METRICS_EXECUTOR_MAX_PENDING"
+    METRICS_INLINE_MAX_PARLAYS="METRICS_INLINE_MAX_PARLAYS"
+    METRICS_MODE="METRICS_MODE"
+    SEASON_CACHE_MAX_ENTRIES="SEASON_CACHE_MAX_ENTRIES"
+    SEASON_CACHE_TTL_S="SEASON_CACHE_TTL_S"
+    CAREER_CACHE_MAX_ENTRIES="CAREER_CACHE_MAX_ENTRIES"
+    PROP_TARGET_INDEX_MAX_AGE_S="PROP_TARGET_INDEX_MAX_AGE_S"
+    PROP_TARGET_SEARCH_COUNTS_TTL_S="PROP_TARGET_SEARCH_COUNTS_TTL_S"
+    PROP_BET_TARGET_ID_CACHE_MAX_ENTRIES="PROP_BET_TARGET_ID_CACHE_MAX_ENTRIES"
+    QUERY_BUDGET_MODE="QUERY_BUDGET_MODE"
+    ADMIN_USERNAMES="ADMIN_USERNAMES"
+    PROFILE_OUTPUT_DIR="PROFILE_OUTPUT_DIR"
+    PROFILE_SAMPLE_INTERVAL_MS="PROFILE_SAMPLE_INTERVAL_MS"
+    INVALIDATION_BACKEND="INVALIDATION_BACKEND"
+    INVALIDATION_POLL_INTERVAL_S="INVALIDATION_POLL_INTERVAL_S"
+    RECOMPUTE_WORKERS="RECOMPUTE_WORKERS"
+    RECOMPUTE_DEBOUNCE_S="RECOMPUTE_DEBOUNCE_S"
+    RECOMPUTE_MAX_ATTEMPTS="RECOMPUTE_MAX_ATTEMPTS"
+    RECOMPUTE_RETRY_DELAY_S="RECOMPUTE_RETRY_DELAY_S"
+    SQLITE_PROFILE="SQLITE_PROFILE"
+    SQLITE_BUSY_TIMEOUT_MS="SQLITE_BUSY_TIMEOUT_MS"
+    SQLITE_MMAP_SIZE_MB="SQLITE_MMAP_SIZE_MB"
+    SQLITE_CACHE_SIZE_MB="SQLITE_CACHE_SIZE_MB"
 
 def load_env_var(env_var: EnvVarName):
-    return os.environ[env_var.value]
\ No newline at end of file
+    return os.environ[env_var.value]
+
+def load_env_var_or_default(env_var: EnvVarName, default: str):
+    return os.environ.get(env_var.value, default)
\ No newline at end of file
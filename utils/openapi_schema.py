@@ -0,0 +1,74 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import *
+
+from fastapi import FastAPI
+
+# The app serves the committed openapi.json instead of generating the schema from
+# every route on the first /openapi.json or /docs request. After changing routes or
+# request/response models, regenerate it and check it in:
+#
+#   python -m utils.openapi_schema --write
+#   python -m utils.openapi_schema --check   # fails if the committed file is stale
+
+OPENAPI_PATH = Path(__file__).resolve().parent.parent / "openapi.json"
+
+def serialize_openapi(schema: dict[str, Any]) -> str:
+    return json.dumps(schema, separators=(",", ":"))
+
+def build_openapi(app: FastAPI) -> dict[str, Any]:
+    # Bypasses serve_committed_openapi so the schema really comes from the routes
+    cached = app.openapi_schema
+    app.openapi_schema = None
+    try:
+        return FastAPI.openapi(app)
+    finally:
+        app.openapi_schema = cached
+
+def serve_committed_openapi(app: FastAPI, path: Path = OPENAPI_PATH):
+    def openapi():
+        if app.openapi_schema is None:
+            # Fall back to generating it if the file hasn't been committed
+            app.openapi_schema = json.loads(path.read_text()) if path.exists() else build_openapi(app)
+        return app.openapi_schema
+    app.openapi = openapi
+
+def _changed_operations(committed: dict[str, Any], built: dict[str, Any]) -> list[str]:
+    changes: list[str] = []
+    committed_paths, built_paths = committed.get("paths", {}), built.get("paths", {})
+    for path in sorted(set(committed_paths) | set(built_paths)):
+        for method in sorted(set(committed_paths.get(path, {})) | set(built_paths.get(path, {}))):
+            if committed_paths.get(path, {}).get(method) != built_paths.get(path, {}).get(method):
+                changes.append(f"{method.upper()} {path}")
+    for name in sorted(set(committed.get("components", {}).get("schemas", {})) | set(built.get("components", {}).get("schemas", {}))):
+        if committed.get("components", {}).get("schemas", {}).get(name) != built.get("components", {}).get("schemas", {}).get(name):
+            changes.append(f"schema {name}")
+    return changes
+
+def main():
+    parser = argparse.ArgumentParser(description="Write or check the committed openapi.json")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--write", action="store_true")
+    group.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    from main import app
+    built = build_openapi(app)
+    if args.write:
+        OPENAPI_PATH.write_text(serialize_openapi(built))
+        print(f"Wrote {OPENAPI_PATH}")
+        return
+
+    committed = json.loads(OPENAPI_PATH.read_text()) if OPENAPI_PATH.exists() else {}
+    if committed == built:
+        print(f"{OPENAPI_PATH.name} matches the app")
+        return
+    print(f"{OPENAPI_PATH.name} is out of date, run python -m utils.openapi_schema --write")
+    for change in _changed_operations(committed, built) or ["top level fields"]:
+        print(f"  {change}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import contextlib
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import *
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+# Catches hidden round trips (N+1 selects, re-queries after commit, lazy loads while
+# serializing) before they ship. With QUERY_BUDGET_MODE=enforce every request records
+# the statements it runs and fails if it goes over the budget declared for its
+# operation_id, and every ORM query raises instead of lazy loading a relationship
+# that wasn't eagerly loaded.
+
+logger = logging.getLogger(__name__)
+
+class QueryBudgetMode(StrEnum):
+    OFF="off"
+    ENFORCE="enforce"
+
+# Maximum statements per request, including the user lookup done by the auth
+# dependency, the change log writes of every flush and the cache invalidation row written
+# by the database backend. Loads shared through a SingleFlightCache aren't counted
+# against the request that happens to start them. Routes without an entry fall back to
+# DEFAULT_QUERY_BUDGET.
+#
+# tests/test_query_budgets.py runs every route against a seeded season, and each budget
+# is what its route runs there. A change that needs more statements raises the budget
+# in the same diff, so the cost is reviewed along with it.
+ROUTE_QUERY_BUDGETS: dict[str, int] = {
+    "login": 3,
+    "get_user_gambling_seasons": 3,
+    "get_season_cache_stats": 3,
+    "backtest_score_correctors": 6,
+    "get_gambling_season": 6,
+    "get_season_parlays": 8,
+    "get_season_parlay_summaries": 4,
+    "get_season_gambler_performances": 4,
+    "get_season_time_series": 4,
+    "get_season_projected_standings": 7,
+    # Including building the season's index after a change
+    "get_season_prop_target_leaderboard": 5,
+    "get_season_dashboard": 16,
+    "get_season_changes": 14,
+    "search_parlays": 4,
+    "get_parlay": 11,
+    "delete_parlay": 18,
+    "create_parlay": 18,
+    "update_parlay": 24,
+    "claim_parlay": 17,
+    "unlock_parlay": 27,
+    # With a pending veto to settle
+    "lock_parlay": 29,
+    "finalize_parlay_result": 12,
+    "close_parlay": 25,
+    "reopen_parlay": 25,
+    "swap_parlay_order": 23,
+    "create_pick": 22,
+    # Five picks. SQLite inserts each separately (see the tests), other databases in one.
+    "create_picks": 23,
+    "update_pick": 29,
+    "apply_pick_override": 26,
+    "update_pick_result": 24,
+    "create_pick_veto": 19,
+    "submit_veto_vote": 15,
+    "delete_veto": 16,
+    "get_user_career": 4,
+    "search_prop_bet_targets": 4,
+}
+DEFAULT_QUERY_BUDGET = 10
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+@dataclass
+class QueryLog:
+    statements: list[str] = field(default_factory=list)
+    # The recording this one was started inside of, which sees its statements too
+    parent: "QueryLog | None" = None
+
+    def __len__(self):
+        return len(self.statements)
+
+    def describe(self):
+        return "\n".join(f"  {i + 1}. {' '.join(s.split())[:300]}" for i, s in enumerate(self.statements))
+
+current_query_log: ContextVar[QueryLog | None] = ContextVar("current_query_log", default=None)
+
+def install_query_recorder(engine: AsyncEngine):
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # The BEGIN issued by the tuned SQLite profile; other drivers don't report theirs
+        if statement.startswith("BEGIN"):
+            return
+        query_log = current_query_log.get()
+        while query_log is not None:
+            query_log.statements.append(statement)
+            query_log = query_log.parent
+
+@contextlib.contextmanager
+def record_queries():
+    # Every statement run in this context (and tasks started from it) is logged, e.g.
+    #   with record_queries() as log:
+    #       await client.get(...)
+    #   assert len(log) <= 3, log.describe()
+    query_log = QueryLog(parent=current_query_log.get())
+    token = current_query_log.set(query_log)
+    try:
+        yield query_log
+    finally:
+        current_query_log.reset(token)
+
+def check_query_budget(operation_id: str, query_log: QueryLog):
+    budget = ROUTE_QUERY_BUDGETS.get(operation_id, DEFAULT_QUERY_BUDGET)
+    if len(query_log) > budget:
+        raise QueryBudgetExceeded(
+            f"{operation_id} ran {len(query_log)} statements, over its budget of {budget}:\n{query_log.describe()}"
+        )
+
+def _raise_on_lazy_load(orm_execute_state: ORMExecuteState):
+    # sql_only lets lazy loads that are served from the identity map through; anything
+    # that would emit SQL raises, naming the relationship that needs an eager load
+    if orm_execute_state.is_select and not orm_execute_state.is_column_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*", sql_only=True))
+
+def enable_raiseload():
+    if not event.contains(Session, "do_orm_execute", _raise_on_lazy_load):
+        event.listen(Session, "do_orm_execute", _raise_on_lazy_load)
+
+class QueryBudgetMiddleware:
+    # Only installed in enforce mode. The handler has finished by the time its response
+    # starts, so a request over its budget gets a 500 listing its statements instead.
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        over_budget = False
+
+        async def send_checked(message):
+            nonlocal over_budget
+            if message["type"] == "http.response.start":
+                operation_id = getattr(scope.get("route"), "operation_id", None)
+                try:
+                    if operation_id is not None:
+                        check_query_budget(operation_id, query_log)
+                except QueryBudgetExceeded as e:
+                    over_budget = True
+                    logger.error(str(e))
+                    body = str(e).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())]
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            elif over_budget:
+                return
+            await send(message)
+
+        with record_queries() as query_log:
+            await self.app(scope, receive, send_checked)
@@ -0,0 +1,180 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import *
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Request latency, SQL statement counts and pool stats in the Prometheus text format.
+# Everything is recorded with plain counters under the event loop (no locks, no
+# label parsing) so instrumenting a request costs a couple of microseconds.
+
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; counts are cumulated when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class RequestQueryStats:
+    __slots__ = ("statements", "db_time_s")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_time_s = 0.0
+
+# Set by the middleware for the duration of a request. SQLAlchemy runs cursor events
+# in a greenlet that shares the request's context, so the hooks below can find it.
+current_query_stats: ContextVar[RequestQueryStats | None] = ContextVar("current_query_stats", default=None)
+
+class OperationMetrics:
+    __slots__ = ("latency", "statements", "db_time", "responses")
+
+    def __init__(self) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS_S)
+        self.statements = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS_S)
+        self.responses: defaultdict[int, int] = defaultdict(int)
+
+class MetricsRegistry:
+
+    def __init__(self) -> None:
+        self.operations: defaultdict[str, OperationMetrics] = defaultdict(OperationMetrics)
+        # Statements run outside any request (startup, background tasks)
+        self.background_statements = 0
+        self.background_db_time_s = 0.0
+        self.pool_checkouts = 0
+        self.pool_connects = 0
+        self.engines: list[AsyncEngine] = []
+        # Extra gauges (e.g. cache stats) read at scrape time
+        self.collectors: list[Callable[[], Iterable[tuple[str, str, float]]]] = []
+
+    def record_request(self, operation_id: str, status: int, elapsed_s: float, query_stats: RequestQueryStats):
+        operation = self.operations[operation_id]
+        operation.latency.observe(elapsed_s)
+        operation.statements.observe(query_stats.statements)
+        operation.db_time.observe(query_stats.db_time_s)
+        operation.responses[status] += 1
+
+    def instrument_engine(self, engine: AsyncEngine):
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info["query_start"] = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed_s = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+            query_stats = current_query_stats.get()
+            if query_stats is None:
+                self.background_statements += 1
+                self.background_db_time_s += elapsed_s
+            else:
+                query_stats.statements += 1
+                query_stats.db_time_s += elapsed_s
+
+        @event.listens_for(sync_engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            self.pool_checkouts += 1
+
+        @event.listens_for(sync_engine, "connect")
+        def connect(dbapi_connection, connection_record):
+            self.pool_connects += 1
+
+        self.engines.append(engine)
+
+    def add_collector(self, collector: Callable[[], Iterable[tuple[str, str, float]]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        operations = sorted(self.operations.items())
+        _render_histograms(lines, "http_request_duration_seconds", "Request latency by operation_id", [(o, m.latency) for o, m in operations])
+        _render_histograms(lines, "http_request_sql_statements", "SQL statements executed per request", [(o, m.statements) for o, m in operations])
+        _render_histograms(lines, "http_request_sql_duration_seconds", "Time spent in SQL per request", [(o, m.db_time) for o, m in operations])
+
+        lines.append("# HELP http_responses_total Responses by operation_id and status code")
+        lines.append("# TYPE http_responses_total counter")
+        for operation_id, operation in operations:
+            for status, count in sorted(operation.responses.items()):
+                lines.append(f'http_responses_total{{operation_id="{operation_id}",status="{status}"}} {count}')
+
+        lines.append("# TYPE sql_background_statements_total counter")
+        lines.append(f"sql_background_statements_total {self.background_statements}")
+        lines.append("# TYPE sql_background_duration_seconds_total counter")
+        lines.append(f"sql_background_duration_seconds_total {self.background_db_time_s}")
+        lines.append("# TYPE db_pool_checkouts_total counter")
+        lines.append(f"db_pool_checkouts_total {self.pool_checkouts}")
+        lines.append("# TYPE db_pool_connects_total counter")
+        lines.append(f"db_pool_connects_total {self.pool_connects}")
+        for engine in self.engines:
+            pool = engine.pool
+            # Static and null pools (e.g. in-memory SQLite) don't track these
+            for name, attribute in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+                if hasattr(pool, attribute):
+                    lines.append(f"# TYPE db_pool_{name} gauge")
+                    lines.append(f'db_pool_{name}{{database="{engine.url.get_backend_name()}"}} {getattr(pool, attribute)()}')
+
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+def _render_histograms(lines: list[str], name: str, help: str, histograms: list[tuple[str, Histogram]]):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} histogram")
+    for operation_id, histogram in histograms:
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{operation_id="{operation_id}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{operation_id="{operation_id}"}} {histogram.sum}')
+        lines.append(f'{name}_count{{operation_id="{operation_id}"}} {histogram.count}')
+
+request_metrics = MetricsRegistry()
+
+class RequestMetricsMiddleware:
+    # Plain ASGI middleware rather than @app.middleware("http"), which wraps every
+    # request in extra tasks and streams and costs far more than the measurement.
+
+    def __init__(self, app, registry: MetricsRegistry = request_metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        query_stats = RequestQueryStats()
+        token = current_query_stats.set(query_stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed_s = time.perf_counter() - start
+            current_query_stats.reset(token)
+            # The router records the matched route on the scope
+            route = scope.get("route")
+            operation_id = getattr(route, "operation_id", None) or getattr(route, "name", None) or "unmatched"
+            self.registry.record_request(operation_id, status, elapsed_s, query_stats)
@@ -0,0 +1,208 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import *
+from urllib.parse import parse_qs
+
+from .request_metrics import current_query_stats
+
+# Opt-in profiling of a single request. An admin adds ?profile=1 or an X-Profile
+# header; the request then runs under a sampling profiler and the collapsed stacks
+# (the input format of flamegraph.pl and speedscope) are written to the profile
+# directory. The response carries the profile id and a Server-Timing header that
+# splits the event loop's time across SQL, ORM, services and serialization.
+#
+# Samples come from every thread in the process, so concurrent requests show up in
+# the profile too; Server-Timing says how many there were. The middleware is only
+# installed when admins are configured.
+
+PROFILE_CATEGORIES = ("sql", "orm", "services", "serialization", "await", "other")
+
+_PACKAGE_ROOT = str(Path(__file__).resolve().parent.parent)
+_STDLIB_ROOT = os.path.dirname(os.__file__)
+_SQL_PATHS = ("sqlalchemy/engine", "sqlalchemy/dialects", "sqlalchemy/pool", "aiosqlite", "asyncpg", "sqlite3")
+_ORM_PATHS = ("sqlalchemy/orm", "sqlalchemy/sql")
+_SERIALIZATION_PATHS = ("pydantic", "fastapi/encoders", "fastapi/routing", "json")
+_IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+
+def _frame_category(filename: str) -> str | None:
+    if any(p in filename for p in _SQL_PATHS):
+        return "sql"
+    if any(p in filename for p in _ORM_PATHS):
+        return "orm"
+    if filename.startswith(_PACKAGE_ROOT) and f"{os.sep}services{os.sep}" in filename:
+        return "services"
+    if any(p in filename for p in _SERIALIZATION_PATHS):
+        return "serialization"
+    return None
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PACKAGE_ROOT):
+        filename = filename[len(_PACKAGE_ROOT) + 1:]
+    elif filename.startswith(_STDLIB_ROOT) and "site-packages" not in filename:
+        filename = filename[len(_STDLIB_ROOT) + 1:]
+    else:
+        filename = filename.rsplit("site-packages" + os.sep, 1)[-1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+class StackSampler(threading.Thread):
+
+    def __init__(self, interval_s: float, loop_thread_id: int) -> None:
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval_s = interval_s
+        self.loop_thread_id = loop_thread_id
+        self.stacks: Counter[str] = Counter()
+        self.categories: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        thread_names = {}
+        while not self._stop_event.wait(self.interval_s):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                idle = frame.f_code.co_filename.endswith(_IDLE_FILES)
+                # Idle worker threads are noise; an idle event loop means the request
+                # is waiting on something (usually the database driver's thread)
+                if idle and thread_id != self.loop_thread_id:
+                    continue
+                category = "await" if idle else None
+                labels: list[str] = []
+                while frame is not None:
+                    if category is None:
+                        category = _frame_category(frame.f_code.co_filename)
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if thread_id not in thread_names:
+                    thread_names = {t.ident: t.name for t in threading.enumerate()}
+                labels.append(thread_names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(labels))] += 1
+                # The time split only follows the event loop, so SQL running on a
+                # driver thread isn't counted twice (once there and once as await)
+                if thread_id == self.loop_thread_id:
+                    self.categories[category or "other"] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+class RequestProfilerMiddleware:
+    # is_admin receives the request's bearer token. Requests that ask for a profile
+    # without an admin token, or while another profile is running, run unprofiled.
+
+    def __init__(self, app, is_admin: Callable[[str], Awaitable[bool]], output_dir: Path, interval_s: float) -> None:
+        self.app = app
+        self.is_admin = is_admin
+        self.output_dir = output_dir
+        self.interval_s = interval_s
+        self._running = False
+        self._in_flight = 0
+        # Other requests that ran at some point during the running profile
+        self._overlapping = 0
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if "1" in query.get("profile", []):
+            return True
+        return any(name == b"x-profile" for name, _ in scope["headers"])
+
+    @staticmethod
+    def _bearer_token(scope) -> str | None:
+        for name, value in scope["headers"]:
+            if name == b"authorization" and value[:7].lower() == b"bearer ":
+                return value[7:].decode()
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self._in_flight += 1
+        if self._running:
+            self._overlapping += 1
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _handle(self, scope, receive, send):
+        if self._running or not self._requested(scope):
+            return await self.app(scope, receive, send)
+        token = self._bearer_token(scope)
+        if token is None or not await self.is_admin(token):
+            return await self.app(scope, receive, send)
+
+        self._running = True
+        self._overlapping = self._in_flight - 1
+        switch_interval = sys.getswitchinterval()
+        # Let the sampler take the GIL from CPU-bound code at the sampling rate
+        sys.setswitchinterval(min(switch_interval, self.interval_s))
+        sampler = StackSampler(self.interval_s, threading.get_ident())
+        query_stats = current_query_stats.get()
+        db_time_before_s = query_stats.db_time_s if query_stats is not None else 0.0
+        start = time.perf_counter()
+        sampler.start()
+
+        finished = False
+
+        def finish():
+            # Also runs if the sampler thread died, so profiling is never left on
+            nonlocal finished
+            if finished:
+                return None
+            finished = True
+            try:
+                sampler.stop()
+            finally:
+                sys.setswitchinterval(switch_interval)
+                self._running = False
+            return time.perf_counter() - start
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                elapsed_s = finish()
+                if elapsed_s is not None:
+                    db_time_s = query_stats.db_time_s - db_time_before_s if query_stats is not None else None
+                    profile_id = self.write_profile(scope, sampler, elapsed_s)
+                    message = {
+                        **message,
+                        "headers": [
+                            *message.get("headers", []),
+                            (b"x-profile-id", profile_id.encode()),
+                            (b"server-timing", server_timing(sampler, elapsed_s, db_time_s, self._overlapping).encode()),
+                        ]
+                    }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            finish()
+
+    def write_profile(self, scope, sampler: StackSampler, elapsed_s: float) -> str:
+        operation_id = getattr(scope.get("route"), "operation_id", None) or "unmatched"
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{operation_id}-{uuid.uuid4().hex[:8]}"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        (self.output_dir / f"{profile_id}.folded").write_text(
+            "".join(f"{stack} {count}\n" for stack, count in sampler.stacks.most_common())
+        )
+        return profile_id
+
+def server_timing(sampler: StackSampler, elapsed_s: float, db_time_s: float | None, overlapping: int) -> str:
+    total_samples = sum(sampler.categories.values())
+    metrics = [f"total;dur={elapsed_s * 1000:.1f}"]
+    # The categories below are shares of the event loop, which these requests used too
+    metrics.append(f"concurrent;desc=\"Other requests sampled alongside: {overlapping}\"")
+    if db_time_s is not None:
+        # Measured by the cursor hooks rather than sampled
+        metrics.append(f"db;desc=\"SQL statements\";dur={db_time_s * 1000:.1f}")
+    for category in PROFILE_CATEGORIES:
+        share = sampler.categories[category] / total_samples if total_samples else 0
+        metrics.append(f"{category};dur={share * elapsed_s * 1000:.1f}")
+    return ", ".join(metrics)
@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import *
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+@dataclass
+class SingleFlightStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+
+class SingleFlightCache(Generic[K, V]):
+    # Concurrent callers asking for the same key share one in-flight computation, and
+    # finished results are kept in a bounded LRU for a short TTL. Keys should carry
+    # whatever version makes a stale value unreachable (e.g. the season version).
+
+    def __init__(self, max_entries: int, ttl_s: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.stats = SingleFlightStats()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._in_flight: dict[K, asyncio.Task[V]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def _get_fresh(self, key: K) -> tuple[bool, V | None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: K, value: V):
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _finish(self, key: K, task: asyncio.Task[V]):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, task.result())
+
+    async def get_or_compute(self, key: K, compute: Callable[[], Awaitable[V]]) -> V:
+        found, value = self._get_fresh(key)
+        if found:
+            self.stats.hits += 1
+            return cast(V, value)
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+            # The computation runs as its own task so that one caller disconnecting
+            # does not cancel it for everyone else waiting on the same key. It's shared,
+            # so it also runs outside the caller's context variables: its statements
+            # aren't recorded against whichever request happened to start it.
+            task = asyncio.get_running_loop().create_task(compute(), context=contextvars.Context())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def invalidate(self, predicate: Callable[[K], bool]):
+        for key in [k for k in self._entries if predicate(k)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
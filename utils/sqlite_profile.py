@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import *
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.env_vars import EnvVarName, load_env_var_or_default
+
+# Settings for running the app on a single SQLite file. The tuned profile applies
+# these pragmas to every new connection:
+#
+#   journal_mode=WAL      readers and the writer no longer block each other
+#   synchronous=NORMAL    fsync at checkpoints instead of every commit, safe with WAL
+#   busy_timeout          wait for the write lock instead of failing with "database is locked"
+#   mmap_size, cache_size keep the working set in memory
+#
+# It also takes over transaction control from the driver, so a transaction opened with
+# the SQLITE_BEGIN_OPTION execution option set to IMMEDIATE takes the write lock up
+# front (see database.begin_write). A deferred transaction that reads and then writes
+# can't wait for the lock: SQLite fails its upgrade right away if another connection
+# wrote since its snapshot. Writers are therefore serialized at BEGIN and queue on
+# busy_timeout. Every other transaction stays deferred, so reads never hold the lock.
+
+SQLITE_BEGIN_OPTION = "sqlite_begin"
+
+class SqliteProfile(StrEnum):
+    # Whatever the driver does out of the box
+    DEFAULT = "default"
+    TUNED = "tuned"
+
+@dataclass
+class SqlitePragmas:
+    busy_timeout_ms: int
+    mmap_size_mb: int
+    cache_size_mb: int
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            busy_timeout_ms=int(load_env_var_or_default(EnvVarName.SQLITE_BUSY_TIMEOUT_MS, "5000")),
+            mmap_size_mb=int(load_env_var_or_default(EnvVarName.SQLITE_MMAP_SIZE_MB, "256")),
+            cache_size_mb=int(load_env_var_or_default(EnvVarName.SQLITE_CACHE_SIZE_MB, "64"))
+        )
+
+    def statements(self) -> list[str]:
+        return [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+            f"PRAGMA mmap_size={self.mmap_size_mb * 1024 * 1024}",
+            # Negative sizes are in KiB
+            f"PRAGMA cache_size=-{self.cache_size_mb * 1024}",
+            "PRAGMA temp_store=MEMORY",
+        ]
+
+def is_sqlite_url(database_url: str):
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+def configure_sqlite_engine(engine: AsyncEngine, profile: SqliteProfile, pragmas: SqlitePragmas):
+    if profile == SqliteProfile.DEFAULT:
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        # Stops the driver from issuing its own BEGIN, see begin_transaction
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for statement in pragmas.statements():
+            cursor.execute(statement)
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin_transaction(conn):
+        conn.exec_driver_sql(f"BEGIN {conn.get_execution_options().get(SQLITE_BEGIN_OPTION, 'DEFERRED')}")